@@ -15,16 +15,39 @@ import csv
 import re
 import json
 import pandas as pd
+import numpy as np
 from functools import wraps
 import glob
+import io
+import heapq
+import importlib.util
+import concurrent.futures
+import mmap
+import tempfile
+import sqlite3
+import base64
+import binascii
+import hashlib
+import shutil
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
 
 # Импорт библиотеки для работы с буфером обмена (удалено - не используется)
 # import pyperclip
 
 # Импорт библиотек для работы с Excel
+from openpyxl import Workbook
 from openpyxl.styles import PatternFill, Font, Alignment
 from openpyxl.utils import get_column_letter
-from openpyxl.formatting.rule import ColorScaleRule, CellIsRule
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.styles.numbers import BUILTIN_FORMATS_REVERSE
+from openpyxl.utils.cell import absolute_coordinate, coordinate_to_tuple
+from openpyxl.utils.datetime import to_excel
+from openpyxl.xml.functions import tostring
+from openpyxl.formatting.rule import ColorScaleRule, CellIsRule, FormulaRule
+from openpyxl.formatting.formatting import ConditionalFormattingList
 from pandas.core.missing import F
 
 # =============================================================================
@@ -53,7 +76,61 @@ FILE_EXTENSIONS = {
     "CSV": ".csv",    # Ключ: формат CSV файлов
     "TXT": ".txt",    # Ключ: формат текстовых файлов  
     "JSON": ".json",  # Ключ: формат JSON файлов
-    "EXCEL": ".xlsx"  # Ключ: формат Excel файлов
+    "EXCEL": ".xlsx",  # Ключ: формат Excel файлов
+    "PARQUET": ".parquet",  # Ключ: формат Parquet файлов
+    "FEATHER": ".feather",  # Ключ: формат Feather файлов
+    "SQLITE": ".sqlite"  # Ключ: формат базы SQLite (LoadDB)
+}
+
+# База SQLite для накопления результатов всех запусков (формат "sqlite" в output_formats, папка OUTPUT)
+LOAD_DB_FILE = "LoadDB"
+
+# Идентификатор запуска программы: колонка run_id во всех таблицах LoadDB
+RUN_ID = datetime.datetime.now().strftime('%Y-%m-%d-%H-%M-%S')
+
+# Индексы таблиц LoadDB: создаются для колонок (наборов колонок), присутствующих в таблице
+LOAD_DB_INDEXES = [
+    ("run_id",),
+    ("employeeNumber",),
+    ("tournamentId",),
+    ("rewardCode",),
+    ("rating_businessBlock", "rating_timePeriod")
+]
+
+# Количество строк в одном executemany при записи в LoadDB
+LOAD_DB_BATCH_ROWS = 50000
+
+# Максимальное количество строк данных на листе Excel (1 048 576 строк минус заголовок)
+EXCEL_MAX_DATA_ROWS = 1048575
+
+# Парсер JSON выгрузок: "auto" - первый доступный из JSON_PARSE_BACKENDS (orjson → simdjson → json),
+# либо имя конкретного парсера ("orjson", "simdjson", "json")
+JSON_PARSE_BACKEND = "auto"
+
+# Библиотека для этапов после разворачивания JSON (преобразования типов column_settings и расчет мест rankings):
+# "pandas" или "polars" (многопоточные выражения Polars; результат возвращается в pandas для записи файлов)
+DATAFRAME_BACKEND = "pandas"
+
+# Бенчмарк парсеров: при загрузке каждой выгрузки разобрать ее всеми доступными парсерами
+# и записать в лог время, скорость (МБ/с) и ускорение относительно json
+JSON_PARSE_BENCHMARK = False
+
+# Пространства имен XML частей пакета XLSX (параллельная сборка книги)
+XLSX_NAMESPACES = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",  # Ключ: SpreadsheetML
+    "relationships": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",  # Ключ: типы связей частей
+    "package_relationships": "http://schemas.openxmlformats.org/package/2006/relationships",  # Ключ: файлы .rels
+    "content_types": "http://schemas.openxmlformats.org/package/2006/content-types"  # Ключ: [Content_Types].xml
+}
+XLSX_XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# Расширения сжатых CSV файлов по названию сжатия (pandas to_csv compression)
+CSV_COMPRESSION_EXTENSIONS = {
+    "gzip": "gz",  # Ключ: gzip → .csv.gz
+    "bz2": "bz2",  # Ключ: bzip2 → .csv.bz2
+    "zip": "zip",  # Ключ: zip → .csv.zip
+    "xz": "xz",  # Ключ: xz → .csv.xz
+    "zstd": "zst"  # Ключ: zstandard → .csv.zst
 }
 
 # Выбор активных скриптов для генерации (глобально)
@@ -88,7 +165,20 @@ EXCEL_COLORS = {
     "header": "366092",     # Ключ: темно-синий цвет для заголовков (основной)
     "subheader": "9BC2E6",  # Ключ: светло-синий цвет для подзаголовков
     "alternate": "E7E6E6",  # Ключ: светло-серый цвет для чередующихся строк
-    "highlight": "FFEB9C"   # Ключ: желтый цвет для выделения важных данных
+    "highlight": "FFEB9C",  # Ключ: желтый цвет для выделения важных данных
+    "scale_low": "F8696B",  # Ключ: цвет минимума цветовой шкалы (красный)
+    "scale_mid": "FFEB84",  # Ключ: цвет медианы цветовой шкалы (желтый)
+    "scale_high": "63BE7B"  # Ключ: цвет максимума цветовой шкалы (зеленый)
+}
+
+# Условное форматирование листов DATA: одно правило на диапазон колонки или листа
+# вместо стилей отдельных ячеек (стоимость записи не зависит от количества строк)
+EXCEL_CONDITIONAL_FORMATTING = {
+    "enabled": False,  # Ключ: включить условное форматирование
+    "row_banding": True,  # Ключ: чередование цвета строк (EXCEL_COLORS["alternate"])
+    "top_n": 10,  # Ключ: выделять места 1..N (EXCEL_COLORS["highlight"]); 0 - не выделять
+    "top_n_suffixes": ["_placeByCrystals", "_placeInRating"],  # Ключ: окончания имен колонок мест
+    "color_scale_columns": ["indicatorValue_numeric", "successValue_numeric", "crystalsEarned"]  # Ключ: числовые колонки с цветовой шкалой
 }
 
 # Настройки для TXT файлов
@@ -97,6 +187,93 @@ EXCEL_COLORS = {
 # Включает знаки препинания, пробелы, переносы строк и специальные символы
 TXT_DELIMITERS = [",", ";", "\t", " ", "\n", "\r\n", "|", ":", ".", "!", "?", "@", "#", "$", "%", "^", "&", "*", "(", ")", "[", "]", "{", "}", "<", ">", "/", "\\", "=", "+", "~", "`", "'", '"']
 
+# Настройки общего JavaScript runtime (вставляется в начало каждого сгенерированного скрипта)
+# Управляют повторами запросов при ответах 429/5xx и сетевых ошибках
+JS_RUNTIME_SETTINGS = {
+    "retry_statuses": [429, 500, 502, 503, 504],  # Ключ: HTTP статусы, при которых запрос повторяется
+    "backoff_base_ms": 1000,  # Ключ: базовая задержка экспоненциального backoff (мс), удваивается с каждой попыткой
+    "backoff_max_ms": 30000,  # Ключ: максимальная задержка backoff (мс)
+    "retry_after_max_ms": 120000  # Ключ: верхняя граница ожидания по заголовку Retry-After (мс)
+}
+
+# Настройки планировщика типов данных DataFrame (выполняется перед apply_column_settings)
+# После разворачивания JSON все колонки имеют тип object; планировщик уменьшает занимаемую память
+DTYPE_PLANNER_SETTINGS = {
+    "enabled": True,  # Ключ: включить планирование типов данных
+    "category_max_unique_ratio": 0.5,  # Ключ: максимальная доля уникальных значений для перевода строк в category
+    "category_min_rows": 100,  # Ключ: минимальное количество строк для перевода в category
+    "numeric_downcast": True  # Ключ: переводить колонки с числами Python (int/float) в минимальный nullable Int/Float
+}
+
+# Колонки, по которым считаются показатели листов SUMMARY, STATISTICS и REWARD_SUMMARY
+# (один проход на колонку). Значение - нужно ли распределение значений (value_counts);
+# для остальных колонок считается только количество уникальных значений
+SUMMARY_AGGREGATE_COLUMNS = {
+    "employeeNumber": False,  # Уникальные сотрудники и заполненные табельные номера
+    "employeeStatus": True,  # Участники со статусом CONTESTANT
+    "terDivisionName": True,  # Статистика по территориальным подразделениям
+    "businessBlock": True,  # Статистика по бизнес-блокам
+    "rewardCode": False,  # Уникальные коды наград
+    "badgeType": True,  # Статистика по типам наград
+    "badgeCategory": True,  # Статистика по категориям наград
+    "structure": True  # Статистика по структурам данных
+}
+
+# Листы-справочники для нормализованного вывода (normalized_output в *_processing)
+# Атрибуты награды/турнира выносятся из DATA в отдельный лист, в DATA остается только ключ
+DIMENSION_TABLES = {
+    "leaders_for_admin": {  # Ключ: справочник турниров
+        "sheet": "TOURNAMENTS",  # Ключ: имя листа-справочника
+        "key": "tournamentId",  # Ключ: колонка-ключ (остается в DATA)
+        "columns": ["tournamentIndicator", "tournamentStatus", "contestants"]  # Ключ: колонки, выносимые в справочник
+    },
+    "reward": {  # Ключ: справочник наград
+        "sheet": "BADGES",
+        "key": "rewardCode",
+        "columns": ["badgeId", "badgeName", "badgeDescription", "badgeType", "badgeCategory", "contestants"]
+    }
+}
+
+# Колонки листов длинного формата для тегов и полученных наград лидеров (long_format_tags)
+LEADER_TAGS_COLUMNS = ["employeeNumber", "rewardCode", "tagIndex", "tagId", "tagName", "tagColor"]
+LEADER_BADGES_COLUMNS = ["employeeNumber", "rewardCode", "badgeIndex", "badgeId", "badgeName"]
+
+# Обогащение таблиц фактов атрибутами сотрудников из всех наборов данных запуска.
+# При включении файлы результатов сохраняются после обработки всех JSON (этап 2):
+# по всем DataFrame строится одно измерение сотрудников (индекс - employeeNumber),
+# для каждого атрибута берется непустое значение из самой свежей выгрузки
+EMPLOYEE_ENRICHMENT_SETTINGS = {
+    "enabled": False,  # Ключ: включить обогащение (результаты держатся в памяти до конца этапа 2)
+    "key": "employeeNumber",  # Ключ: колонка-ключ сотрудника
+    "attributes": ["terDivisionName", "gosbCode", "businessBlock", "employeeStatus"],  # Ключ: атрибуты измерения
+    "prefix": "emp_"  # Ключ: префикс добавляемых колонок; пусто - значения измерения заменяют собственные колонки
+}
+
+# Вложенные конфигурации обработки JSON → Excel для каждого скрипта
+PROCESSING_CONFIG_KEYS = {
+    "leaders_for_admin": "leaders_processing",  # Ключ: скрипт, значение: ключ вложенной конфигурации обработки
+    "reward": "reward_processing",
+    "rating_list": "rating_processing"
+}
+
+# Структура выгрузок для проверки полноты JSON и генерации скриптов догрузки
+# contestants_path - путь к тексту количества участников в ответе API
+# page_size_option - ключ processing_options с размером страницы (None - одна страница на ключ)
+GAP_FILL_LAYOUTS = {
+    "leaders_for_admin": {
+        "contestants_path": ("body", "tournament", "contestants"),
+        "page_size_option": None
+    },
+    "reward": {
+        "contestants_path": ("body", "badge", "contestants"),
+        "page_size_option": "max_profiles_per_request"
+    },
+    "rating_list": {
+        "contestants_path": ("body", "rating", "contestants"),
+        "page_size_option": "max_participants_per_page"
+    }
+}
+
 # Настройки для CSV файлов (перенесены в конфигурацию каждого скрипта)
 # CSV_DELIMITER = ";"  # Разделитель колонок в CSV файлах (точка с запятой для европейского формата)
 # CSV_ENCODING = "utf-8"  # Кодировка для CSV файлов (поддерживает кириллицу и специальные символы)
@@ -204,6 +381,10 @@ LOG_MESSAGES = {
     # Сообщения для обработки данных
     "float_conversion_error": "Ошибка преобразования '{val}' в float: {ex} | Context: {context}",  # Ключ: ошибка преобразования в float
     "reward_summary_sheet_created": "Лист REWARD_SUMMARY создан успешно",  # Ключ: лист наград создан
+    "dimension_table_created": "Справочник {sheet}: {rows} строк по ключу {key}, из DATA вынесены колонки {columns}",  # Ключ: создан лист-справочник
+    "dimension_column_kept": "Колонка {column} не зависит только от {key}, остается в DATA",  # Ключ: колонка не вынесена в справочник
+    "extra_sheet_written": "Лист {sheet} записан: {rows} строк",  # Ключ: записан дополнительный лист
+    "conditional_formatting_applied": "Условное форматирование листа {sheet}: {rules} правил",  # Ключ: правила условного форматирования добавлены
     "variant_selected": "Выбранный вариант: {variant}",  # Ключ: выбранный вариант
     "script_generation_start": "=== ГЕНЕРАЦИЯ СКРИПТА: {script_name} ===",  # Ключ: начало генерации скрипта
     "data_loading": "Загрузка данных и конфигурации...",  # Ключ: загрузка данных
@@ -216,7 +397,40 @@ LOG_MESSAGES = {
     "script_saving": "Сохранение скрипта в файл...",  # Ключ: сохранение скрипта
     "script_generated_success": "Скрипт {script_name} сгенерирован успешно (данных: {count})",  # Ключ: скрипт сгенерирован успешно
     "json_load_error": "Ошибка при загрузке JSON файла {file_path}: {error}",  # Ключ: ошибка загрузки JSON
+    "json_parse_done": "JSON разобран парсером {backend}: {size} МБ за {seconds:.2f} сек ({speed:.1f} МБ/с)",  # Ключ: JSON разобран
+    "json_parse_backend_unavailable": "Парсер JSON {backend} недоступен, используется {fallback}",  # Ключ: парсер недоступен
+    "json_parse_fallback": "Парсер JSON {backend} не разобрал {file_name} ({error}), повторный разбор стандартным json",  # Ключ: откат на стандартный json
+    "json_structure_detected": "Структура {file_name} определена по началу файла: {converter} ({layout})",  # Ключ: структура выгрузки определена
+    "json_parallel_start": "Параллельный разбор {file_name}: {size} МБ, членов верхнего уровня {members}, частей {chunks}, процессов {workers} (сканирование {seconds:.2f} сек)",  # Ключ: начало параллельного разбора JSON
+    "dataframe_backend_unavailable": "Библиотека {backend} не установлена, преобразования и расчет мест выполняются в pandas",  # Ключ: DATAFRAME_BACKEND недоступен
+    "snapshot_diff_keys_missing": "Сравнение снимков пропущено: нет колонок ключа {keys}",  # Ключ: нет ключей для сравнения снимков
+    "snapshot_diff_no_previous": "Сравнение снимков пропущено: предыдущий снимок для {config_key} не найден",  # Ключ: нет предыдущего снимка
+    "snapshot_diff_keys_skipped": "Сравнение снимков ({snapshot}): исключено строк с пустым ключом {empty}, повторов ключа {duplicates}",  # Ключ: пустые и повторяющиеся ключи снимка
+    "snapshot_diff_done": "Сравнение с {source}: изменилось {changed}, новых {new}, выбыло {dropped}, без изменений {unchanged} за {seconds:.2f} сек",  # Ключ: сравнение снимков выполнено
+    "employee_rollup_columns_missing": "Сводка EMPLOYEE_ROLLUP: нет колонок {columns} - показатели пропущены",  # Ключ: нет колонок для сводки по сотрудникам
+    "employee_rollup_done": "Лист EMPLOYEE_ROLLUP: {rows} строк, {columns} колонок за {seconds:.2f} сек",  # Ключ: сводка по сотрудникам построена
+    "pivot_sheet_columns_missing": "Сводный лист {sheet}: нет колонок {columns} - лист пропущен",  # Ключ: нет колонок для сводного листа
+    "pivot_sheet_done": "Сводный лист {sheet}: {rows} строк, {columns} колонок за {seconds:.2f} сек",  # Ключ: сводный лист построен
+    "employee_enrichment_queued": "Сохранение {file_path} отложено до построения измерения сотрудников",  # Ключ: результат поставлен в очередь обогащения
+    "employee_dimension_built": "Измерение сотрудников: {employees} сотрудников, атрибуты {attributes}, источников {sources}",  # Ключ: измерение сотрудников построено
+    "employee_enrichment_no_key": "В {file_path} нет колонки {key} - обогащение пропущено",  # Ключ: нет ключа сотрудника
+    "employee_enrichment_write_failed": "Отложенный результат {file_path} не сохранен",  # Ключ: ошибка записи обогащенного результата
+    "employee_enrichment_failed": "Не все отложенные результаты этапа 2 сохранены (см. ошибки выше)",  # Ключ: ошибка сохранения пакета обогащения
+    "employee_enrichment_done": "Обогащение {file_path}: найдено {matched} из {rows} строк, колонки {columns}",  # Ключ: таблица обогащена
+    "duckdb_engine_unavailable": "Движок duckdb недоступен (библиотека duckdb не установлена), используется pandas",  # Ключ: DuckDB не установлена
+    "duckdb_engine_unsupported_fields": "Описание flatten_fields содержит поля, не поддерживаемые движком duckdb, используется pandas",  # Ключ: поля не поддерживаются DuckDB
+    "duckdb_engine_done": "DuckDB: {file_name} преобразован, строк {rows} за {seconds:.2f} сек",  # Ключ: преобразование DuckDB завершено
+    "json_parallel_done": "Параллельный разбор {file_name} завершен: строк {rows} за {seconds:.2f} сек",  # Ключ: параллельный разбор JSON завершен
+    "json_parse_benchmark": "Бенчмарк JSON {file_name} [{shape}]: {backend} - {seconds:.2f} сек, {speed:.1f} МБ/с, ускорение x{speedup:.2f}",  # Ключ: результат бенчмарка парсера
     "excel_creation_error": "Ошибка при создании Excel файла: {error}",  # Ключ: ошибка создания Excel
+    "xlsx_assembly_start": "Параллельная сборка {filename}: листов {sheets}, блоков {blocks}, процессов {workers}",  # Ключ: начало параллельной сборки XLSX
+    "excel_split_start": "Разбиение DATA ({rows} строк) на {parts} частей: ключ {key}, вывод {target}",  # Ключ: начало разбиения на части
+    "excel_split_part": "Часть {part}/{parts} записана: {name} ({rows} строк)",  # Ключ: часть записана
+    "load_db_table_saved": "LoadDB: таблица {table} - записано строк {rows} (run_id {run_id}) за {seconds:.2f} сек",  # Ключ: таблица LoadDB записана
+    "output_sink_saved": "Файл {format} сохранен: {file_path} (размер: {size})",  # Ключ: выходной файл сохранен
+    "output_sink_error": "Ошибка при сохранении файла {format}: {error}",  # Ключ: ошибка сохранения выходного файла
+    "output_sink_unavailable": "Формат {format} недоступен: не установлена библиотека {library}",  # Ключ: нет библиотеки для формата
+    "output_sink_unknown": "Неизвестный формат вывода: {format}",  # Ключ: неизвестный формат вывода
     "tournaments_processed": "Обработано турниров: {tournaments}, общее количество лидеров: {leaders}",  # Ключ: турниры обработаны
     "no_data_warning": "Нет данных для обработки",  # Ключ: нет данных
     "json_leaders_conversion_error": "Ошибка при конвертации JSON лидеров в Excel: {error}",  # Ключ: ошибка конвертации лидеров
@@ -262,6 +476,8 @@ LOG_MESSAGES = {
     "photo_data_removal_disabled": "Удаление photoData отключено в настройках",  # Ключ: удаление photoData отключено
     "photo_data_removing": "Удаляем поля photoData из результатов",  # Ключ: удаление photoData
     "photo_data_removed": "Поля photoData удалены из результатов",  # Ключ: photoData удалены
+    "photo_data_skipped": "Значения photoData пропущены при разборе JSON: {size} МБ",  # Ключ: photoData пропущены при разборе
+    "photo_data_exported": "photoData сохранены в файлы: значений {values}, файлов {files} в {directory} за {seconds:.2f} сек",  # Ключ: photoData вынесены в файлы
     "delay_after_response": "Ожидание {delay} мс после получения ответа",  # Ключ: ожидание после ответа
     "next_request_after_delay": "Выполнение следующего запроса после задержки {delay} мс",  # Ключ: следующий запрос после задержки
     
@@ -272,6 +488,10 @@ LOG_MESSAGES = {
     "crystal_rankings_tb_level": "Расчет мест на уровне TB для {ter_division} в {business_block}_{time_period}",  # Ключ: расчет мест на уровне TB
     "crystal_rankings_gosb_level": "Расчет мест на уровне GOSB для {ter_division}_{gosb_code} в {business_block}_{time_period}",  # Ключ: расчет мест на уровне GOSB
     "crystal_rankings_same_crystals": "Найдено {count} участников с {crystals} кристаллами - присваиваем место {rank}",  # Ключ: участники с одинаковыми кристаллами
+    "dtype_planning_column": "Тип колонки {column}: object → {dtype}",  # Ключ: изменение типа колонки
+    "dtype_planning_completed": "Планирование типов: колонок изменено {count}, память {before:.2f} МБ → {after:.2f} МБ (сэкономлено {saved:.2f} МБ)",  # Ключ: итог планирования типов
+    "ranking_metric_start": "Расчет мест по {metric}: уровни {levels}, метод {method}",  # Ключ: расчет мест по показателю
+    "ranking_metric_missing": "Колонка {metric} для расчета мест не найдена, пропускаем",  # Ключ: нет колонки показателя
     
     # Сообщения для обработки рейтинга
     "rating_processing_start": "Начинаем обработку рейтинга участников...",  # Ключ: начало обработки рейтинга
@@ -288,6 +508,24 @@ LOG_MESSAGES = {
     "data_validation_completed": "Валидация данных завершена",  # Ключ: завершение валидации данных
     "data_cleaning_start": "Начинаем очистку данных...",  # Ключ: начало очистки данных
     "data_cleaning_completed": "Очистка данных завершена",  # Ключ: завершение очистки данных
+    
+    # Сообщения для проверки полноты JSON и догрузки пропусков
+    "gap_fill_check_start": "Проверка полноты JSON {file_name} для {config_key}",  # Ключ: начало проверки полноты
+    "gap_fill_check_result": "Полнота JSON: ожидается ключей {expected}, найдено {present}, отсутствует {missing}, неполных {incomplete}",  # Ключ: результат проверки полноты
+    "gap_fill_incomplete_key": "Ключ {key}: страниц {present} из {expected}, догрузка страниц: {pages}",  # Ключ: неполный ключ
+    "gap_fill_complete": "JSON {file_name} полный, догрузка не требуется",  # Ключ: догрузка не требуется
+    "gap_fill_script_generated": "Скрипт догрузки пропусков сгенерирован: {count} задач, запросов не менее {requests}",  # Ключ: скрипт догрузки сгенерирован
+    "gap_fill_merge_start": "Слияние догрузки {gap_file} с {original_file}",  # Ключ: начало слияния
+    "gap_fill_merge_completed": "Слияние завершено: добавлено ключей {added}, обновлено ключей {updated}, файл: {file_path}",  # Ключ: слияние завершено
+    "gap_fill_unsupported": "Проверка полноты не поддерживается для {config_key}",  # Ключ: неподдерживаемый тип
+    
+    # Сообщения для шардирования скриптов и слияния шардов
+    "shard_plan": "Шардирование {config_key}: шардов {count}, кодов по шардам: {sizes}, стоимость по шардам: {costs}",  # Ключ: план разбиения на шарды
+    "shard_cost_source": "Оценка стоимости кодов по {file_path}: известно {known} из {total}, по умолчанию {default}",  # Ключ: источник оценки стоимости
+    "shard_cost_unavailable": "Файл оценки стоимости не задан или не найден, стоимость каждого кода = 1",  # Ключ: нет файла оценки стоимости
+    "shard_merge_start": "Слияние шардов {group}: найдено файлов {found} из {expected}",  # Ключ: начало слияния шардов
+    "shard_merge_incomplete": "Найдены не все шарды {group}: отсутствуют {missing}",  # Ключ: неполный набор шардов
+    "shard_merge_completed": "Слияние шардов завершено: ключей {count}, файл: {file_path}",  # Ключ: слияние шардов завершено
 }
 
 # =============================================================================
@@ -297,6 +535,23 @@ LOG_MESSAGES = {
 # Словарь с конфигурацией для каждого типа скрипта
 # Содержит параметры для генерации JavaScript и обработки данных
 # Каждая конфигурация включает: домен, API пути, параметры запросов, настройки файлов
+# Описание полей плоских строк (flatten_fields в *_processing), компилируется в функции при запуске:
+# строка - поле с тем же именем и значением по умолчанию "";
+# {"column", "path" (ключи через точку), "type": "int", "default", "empty_values"} - поле с преобразованием;
+# {"kind": "param"} - аргумент функции; "concat" - склейка полей; "count" / "join_list" - длина и список
+# значений массива; "index" - первые limit элементов массива; "fanout" - элементы массива по значению key
+DIVISION_RATINGS_FANOUT = {  # Ключ: divisionRatings → BANK_*, TB_*, GOSB_*
+    "kind": "fanout",
+    "path": "divisionRatings",
+    "key": "groupCode",
+    "values": ["BANK", "TB", "GOSB"],
+    "fields": [
+        {"column": "groupId", "path": "groupId", "type": "int"},
+        {"column": "placeInRating", "path": "placeInRating", "type": "int"},
+        {"column": "ratingCategoryName", "path": "ratingCategoryName"}
+    ]
+}
+
 FUNCTION_CONFIGS = {
     "leaders_for_admin": {  # Ключ: конфигурация для скрипта LeadersForAdmin (информация по участникам турнира)
         "name": "LeadersForAdmin",  # Ключ: название скрипта для отображения
@@ -331,6 +586,10 @@ FUNCTION_CONFIGS = {
             "include_division_ratings": True,  # Ключ: включать ли рейтинги подразделений
             "include_tournament_info": True  # Ключ: включать ли информацию о турнирах
         },
+        "sharding": {  # Ключ: разбиение списка кодов на шарды (отдельный скрипт на каждую вкладку браузера)
+            "shards": 1,  # Ключ: количество шардов (1 = без разбиения)
+            "cost_json_file": ""  # Ключ: JSON прошлой выгрузки (без расширения) для оценки стоимости кодов по contestants
+        },
         "data_source": "external_file",  # Ключ: источник данных (external_file/variable)
         "input_format": "CSV",  # Ключ: формат входного файла
         "csv_column": "TOURNAMENT_CODE",  # Ключ: название столбца для извлечения данных
@@ -350,6 +609,101 @@ FUNCTION_CONFIGS = {
             "json_file": "leadersForAdmin_SIGMA_20250728-013758",  # Ключ: имя JSON файла для обработки (без расширения)
             "excel_file": "LeadersForAdmin",  # Ключ: имя Excel файла для создания (без расширения)
             "excel_freeze_cell": "B2",  # Ключ: ячейка для закрепления в Excel (B2 = первая строка и первая колонка)
+            "flatten_fields": [  # Ключ: поля плоской строки лидера турнира (flatten_leader_data)
+                "employeeNumber", "lastName", "firstName", "photoData", "indicatorValue", "successValue",
+                "terDivisionName", "employeeStatus", "businessBlock",
+                "tournamentId", "tournamentIndicator", "tournamentStatus", "contestants",
+                {"column": "fullName", "kind": "concat", "paths": ["lastName", "firstName"]},
+                DIVISION_RATINGS_FANOUT
+            ],
+            "excel_split": {  # Ключ: разбиение DATA на части (обязательно при превышении лимита строк Excel)
+                "max_rows": 1000000,  # Ключ: максимум строк данных в одной части (не больше 1 048 575)
+                "key": "",  # Ключ: колонка для разбиения по значениям (например rewardCode); пусто - только по количеству строк
+                "target": "sheets",  # Ключ: "sheets" - листы DATA_1..N в одной книге, "workbooks" - отдельные книги
+                "workers": 1  # Ключ: количество процессов для параллельной записи книг (target = "workbooks")
+            },
+            "parallel_xlsx": {  # Ключ: сборка XLSX из XML частей листов в нескольких процессах
+                "enabled": False,  # Ключ: включить параллельную сборку (вместо openpyxl ExcelWriter)
+                "workers": 4,  # Ключ: количество процессов
+                "block_rows": 100000  # Ключ: строк в одном блоке листа (блоки формируются независимо)
+            },
+            "parallel_json": {  # Ключ: разбор и преобразование выгрузки по диапазонам ключей в нескольких процессах
+                "enabled": False,  # Ключ: включить параллельный разбор (только для объекта верхнего уровня)
+                "workers": 4,  # Ключ: количество процессов
+                "min_size_mb": 100  # Ключ: минимальный размер файла (МБ), с которого включается параллельный разбор
+            },
+            "photo_data": {  # Ключ: обработка base64 photoData при конвертации JSON
+                "mode": "keep",  # Ключ: "keep" - оставить как есть, "skip" - пропустить при разборе, "files" - сохранить изображения в файлы (колонка photoHash)
+                "workers": 4,  # Ключ: количество потоков для декодирования и записи файлов (режим "files")
+                "directory": "photos"  # Ключ: подпапка OUTPUT для файлов изображений (имя файла - хеш содержимого)
+            },
+            "output_formats": ["xlsx"],  # Ключ: форматы выходных файлов ("xlsx", "csv", "parquet", "feather", "sqlite" - база LoadDB)
+            "output_compression": None,  # Ключ: сжатие для csv/parquet/feather ("gzip", "zstd", "snappy", "lz4" или None)
+            "load_db_table": "leaders",  # Ключ: таблица базы LoadDB для формата "sqlite" (дополнительные листы - <таблица>_<лист>)
+            "snapshot_diff": {  # Ключ: сравнение с предыдущей выгрузкой (листы DIFF / DIFF_TOP)
+                "enabled": False,  # Ключ: включить сравнение
+                "previous_json_file": "",  # Ключ: JSON предыдущей выгрузки (без расширения); пусто - последний прошлый запуск из LoadDB (load_db_table)
+                "keys": ["employeeNumber", "tournamentId"],  # Ключ: колонки соединения снимков
+                "metrics": [  # Ключ: сравниваемые показатели (первый - для лидеров изменения DIFF_TOP)
+                    {"column": "BANK_placeInRating", "lower_is_better": True},
+                    {"column": "indicatorValue", "lower_is_better": False}
+                ],
+                "columns": ["fullName", "terDivisionName"],  # Ключ: описательные колонки в DIFF
+                "top_movers": 20,  # Ключ: строк роста и падения в DIFF_TOP
+                "output": "sheet"  # Ключ: "sheet" - листы в книге, "parquet" - файлы <имя>_DIFF.parquet / <имя>_DIFF_TOP.parquet
+            },
+            "employee_rollup": {  # Ключ: сводка по сотрудникам (лист EMPLOYEE_ROLLUP) одной группировкой groupby/agg
+                "enabled": False,  # Ключ: включить сводку
+                "keys": ["employeeNumber"],  # Ключ: колонки группировки (строка листа)
+                "columns": ["fullName", "terDivisionName"],  # Ключ: описательные колонки (первое значение в группе)
+                "aggregations": {  # Ключ: {колонка результата: [колонка, функция pandas]}
+                    "tournaments": ["tournamentId", "nunique"],
+                    "bestPlaceInRating": ["BANK_placeInRating", "min"],
+                    "medianPlaceInRating": ["BANK_placeInRating", "median"],
+                    "indicatorValueSum": ["indicatorValue_numeric", "sum"]
+                },
+                "empty_values": [""],  # Ключ: значения keys/pivot_column, считающиеся пустыми (пустые и NaN - всегда)
+                "empty_label": "",  # Ключ: подпись для пустых значений; пусто - строки с пустыми ключами не учитываются
+                "pivot_column": ""  # Ключ: колонка, значения которой разворачиваются в колонки <результат>_<значение>; пусто - без разворота
+            },
+            "pivot_sheets": {  # Ключ: сводные листы (pivot_table / crosstab), записываются статичными значениями
+                "enabled": False,  # Ключ: включить сводные листы
+                "sheets": [  # Ключ: описания листов
+                    {
+                        "sheet": "PIVOT_TOURNAMENT_TB",  # Ключ: имя листа (до 31 символа)
+                        "index": ["tournamentId"],  # Ключ: колонки строк
+                        "columns": ["terDivisionName"],  # Ключ: колонки, значения которых становятся колонками листа
+                        "values": {  # Ключ: {показатель: [колонка, функция pandas]}; пусто - количество строк (crosstab)
+                            "participants": ["employeeNumber", "nunique"],
+                            "indicatorMean": ["indicatorValue_numeric", "mean"]
+                        },
+                        "empty_values": [""],  # Ключ: значения ключей index/columns, считающиеся пустыми (пустые и NaN - всегда)
+                        "empty_label": "",  # Ключ: подпись для пустых ключей; пусто - строки с пустыми ключами не учитываются
+                        "margins": False  # Ключ: добавить итоговые строку и колонку "Итого"
+                    },
+                    {
+                        "sheet": "PIVOT_TB_STATUS",
+                        "index": ["terDivisionName"],
+                        "columns": ["employeeStatus"],
+                        "values": {},
+                        "margins": True
+                    }
+                ]
+            },
+            "normalized_output": False,  # Ключ: вынести атрибуты турнира в лист TOURNAMENTS (в DATA остается tournamentId)
+            "gap_fill_check": False,  # Ключ: проверять полноту JSON и генерировать скрипт догрузки пропусков
+            "gap_fill_json_file": "",  # Ключ: имя JSON файла догрузки (без расширения) для слияния с основным перед конвертацией
+            "rankings": [  # Ключ: расчет мест по показателям (формат как в rating_processing.rankings)
+                # {
+                #     "metric": "indicatorValue",
+                #     "ascending": False,
+                #     "method": "min",
+                #     "levels": {
+                #         "TOURNAMENT_placeByIndicator": ["tournamentId"],
+                #         "TB_placeByIndicator": ["tournamentId", "terDivisionName"]
+                #     }
+                # }
+            ],
             "column_settings": {  # Ключ: настройки обработки колонок
                 "columns_to_keep": [],  # Ключ: колонки для сохранения (если пусто - оставляем все)
                 "columns_to_remove": [  # Ключ: колонки для удаления
@@ -417,6 +771,10 @@ FUNCTION_CONFIGS = {
             "max_profiles_per_request": 100,  # Ключ: максимальное количество профилей на запрос
             "skip_empty_profiles": True  # Ключ: пропускать ли пустые профили
         },
+        "sharding": {  # Ключ: разбиение списка кодов на шарды (отдельный скрипт на каждую вкладку браузера)
+            "shards": 1,  # Ключ: количество шардов (1 = без разбиения)
+            "cost_json_file": ""  # Ключ: JSON прошлой выгрузки (без расширения) для оценки стоимости кодов по contestants
+        },
         "reward_processing": {  # Ключ: конфигурация для обработки профилей наград (JSON → Excel)
             "name": "Reward Profiles",  # Ключ: название скрипта для отображения
             "description": "Обработка профилей наград из JSON в Excel",  # Ключ: описание назначения скрипта
@@ -424,6 +782,61 @@ FUNCTION_CONFIGS = {
             "json_file": "profiles_SIGMA_20250728-013712",  # Ключ: имя JSON файла для обработки (без расширения)
             "excel_file": "RewardProfiles",  # Ключ: имя Excel файла для создания (без расширения)
             "excel_freeze_cell": "F2",  # Ключ: ячейка для закрепления в Excel (B2 = первая строка и первая колонка)
+            "flatten_profile_fields": [  # Ключ: поля плоской строки профиля награды (flatten_reward_profile_data)
+                "rewardCode", "badgeName", "badgeDescription", "badgeType", "badgeCategory",
+                "employeeNumber", "lastName", "firstName", "middleName",
+                {"column": "fullName", "kind": "concat", "path": "fullName", "paths": ["lastName", "firstName", "middleName"], "skip_empty": True},
+                "photoData", "email", "phone", "mobilePhone",
+                "terDivisionName", "divisionName", "departmentName", "positionName", "employeeStatus", "businessBlock",
+                "awardDate", "awardReason", "awardLevel", "awardValue",
+                "indicatorValue", "successValue", "rating", "placeInRating",
+                "photoUrl", "isActive", "lastActivityDate",
+                dict(DIVISION_RATINGS_FANOUT, only_if_present=True)
+            ],
+            "flatten_leader_fields": [  # Ключ: поля плоской строки лидера награды (flatten_reward_leader_data); "mode": "wide" - только без long_format_tags
+                {"column": "rewardCode", "kind": "param", "param": "reward_code"},
+                "employeeNumber", "lastName", "firstName", "photoData", "terDivisionName", "gosbCode",
+                "employeeStatus", "receivingDate",
+                {"column": "isMarked", "path": "isMarked", "default": False},
+                {"column": "fullName", "kind": "concat", "paths": ["lastName", "firstName"]},
+                {"column": "colorPrimary", "path": "colorCode.primary"},
+                {"column": "colorSecondary", "path": "colorCode.secondary"},
+                {"column": "earnedBadgesCount", "kind": "count", "path": "earnedBadges"},
+                {"column": "earnedBadgesList", "kind": "join_list", "path": "earnedBadges", "item_key": "name", "mode": "wide"},
+                {"column": "tagsCount", "kind": "count", "path": "tags"},
+                {"column": "tagsList", "kind": "join_list", "path": "tags", "item_key": "tagName", "mode": "wide"},
+                {"kind": "index", "path": "tags", "limit": 5, "prefix": "tag", "mode": "wide", "fields": [
+                    {"column": "id", "path": "tagId"}, {"column": "name", "path": "tagName"}, {"column": "color", "path": "tagColor"}
+                ]}
+            ],
+            "excel_split": {  # Ключ: разбиение DATA на части (обязательно при превышении лимита строк Excel)
+                "max_rows": 1000000,  # Ключ: максимум строк данных в одной части (не больше 1 048 575)
+                "key": "",  # Ключ: колонка для разбиения по значениям (например rewardCode); пусто - только по количеству строк
+                "target": "sheets",  # Ключ: "sheets" - листы DATA_1..N в одной книге, "workbooks" - отдельные книги
+                "workers": 1  # Ключ: количество процессов для параллельной записи книг (target = "workbooks")
+            },
+            "parallel_xlsx": {  # Ключ: сборка XLSX из XML частей листов в нескольких процессах
+                "enabled": False,  # Ключ: включить параллельную сборку (вместо openpyxl ExcelWriter)
+                "workers": 4,  # Ключ: количество процессов
+                "block_rows": 100000  # Ключ: строк в одном блоке листа (блоки формируются независимо)
+            },
+            "parallel_json": {  # Ключ: разбор и преобразование выгрузки по диапазонам ключей в нескольких процессах
+                "enabled": False,  # Ключ: включить параллельный разбор (только для объекта верхнего уровня)
+                "workers": 4,  # Ключ: количество процессов
+                "min_size_mb": 100  # Ключ: минимальный размер файла (МБ), с которого включается параллельный разбор
+            },
+            "photo_data": {  # Ключ: обработка base64 photoData при конвертации JSON
+                "mode": "keep",  # Ключ: "keep" - оставить как есть, "skip" - пропустить при разборе, "files" - сохранить изображения в файлы (колонка photoHash)
+                "workers": 4,  # Ключ: количество потоков для декодирования и записи файлов (режим "files")
+                "directory": "photos"  # Ключ: подпапка OUTPUT для файлов изображений (имя файла - хеш содержимого)
+            },
+            "output_formats": ["xlsx"],  # Ключ: форматы выходных файлов ("xlsx", "csv", "parquet", "feather", "sqlite" - база LoadDB)
+            "output_compression": None,  # Ключ: сжатие для csv/parquet/feather ("gzip", "zstd", "snappy", "lz4" или None)
+            "load_db_table": "reward",  # Ключ: таблица базы LoadDB для формата "sqlite" (лидеры наград - <таблица>_leaders, дополнительные листы - <таблица>_<лист>)
+            "normalized_output": False,  # Ключ: вынести атрибуты награды в лист BADGES (в DATA остается rewardCode)
+            "long_format_tags": False,  # Ключ: теги и earnedBadges в листах LEADER_TAGS / LEADER_BADGES вместо tag1..tag5 и списков через запятую
+            "gap_fill_check": False,  # Ключ: проверять полноту JSON и генерировать скрипт догрузки пропусков
+            "gap_fill_json_file": "",  # Ключ: имя JSON файла догрузки (без расширения) для слияния с основным перед конвертацией
             "column_settings": {  # Ключ: настройки обработки колонок
                 "columns_to_keep": [],  # Ключ: колонки для сохранения (если пусто - оставляем все)
                 "columns_to_remove": [  # Ключ: колонки для удаления
@@ -618,6 +1031,95 @@ FUNCTION_CONFIGS = {
             "json_file": "rating_list_SIGMA_20250814-165701",  # Ключ: имя JSON файла (без расширения)
             "excel_file": "RatingList",  # Ключ: имя Excel файла для создания (без расширения)
             "excel_freeze_cell": "E2",  # Ключ: ячейка для закрепления в Excel
+            "flatten_fields": [  # Ключ: поля плоской строки лидера рейтинга (flatten_rating_leader_data)
+                "employeeNumber", "lastName", "firstName", "terDivisionName",
+                {"column": "gosbCode", "path": "gosbCode", "empty_values": ["-"]},
+                {"column": "placeInRating", "path": "placeInRating", "empty_values": ["-"]},
+                {"column": "crystalsEarned", "path": "crystalsEarned", "empty_values": ["-"]},
+                "employeeStatus", "businessBlock",
+                {"column": "fullName", "kind": "concat", "paths": ["lastName", "firstName"]},
+                {"column": "rating_businessBlock", "kind": "param", "param": "business_block"},
+                {"column": "rating_timePeriod", "kind": "param", "param": "time_period"}
+            ],
+            "excel_split": {  # Ключ: разбиение DATA на части (обязательно при превышении лимита строк Excel)
+                "max_rows": 1000000,  # Ключ: максимум строк данных в одной части (не больше 1 048 575)
+                "key": "",  # Ключ: колонка для разбиения по значениям (например rating_businessBlock); пусто - только по количеству строк
+                "target": "sheets",  # Ключ: "sheets" - листы DATA_1..N в одной книге, "workbooks" - отдельные книги
+                "workers": 1  # Ключ: количество процессов для параллельной записи книг (target = "workbooks")
+            },
+            "parallel_xlsx": {  # Ключ: сборка XLSX из XML частей листов в нескольких процессах
+                "enabled": False,  # Ключ: включить параллельную сборку (вместо openpyxl ExcelWriter)
+                "workers": 4,  # Ключ: количество процессов
+                "block_rows": 100000  # Ключ: строк в одном блоке листа (блоки формируются независимо)
+            },
+            "parallel_json": {  # Ключ: разбор и преобразование выгрузки по диапазонам ключей в нескольких процессах
+                "enabled": False,  # Ключ: включить параллельный разбор (только для объекта верхнего уровня)
+                "workers": 4,  # Ключ: количество процессов
+                "min_size_mb": 100  # Ключ: минимальный размер файла (МБ), с которого включается параллельный разбор
+            },
+            "photo_data": {  # Ключ: обработка base64 photoData при конвертации JSON
+                "mode": "keep",  # Ключ: "keep" - оставить как есть, "skip" - пропустить при разборе, "files" - сохранить изображения в файлы (колонка photoHash)
+                "workers": 4,  # Ключ: количество потоков для декодирования и записи файлов (режим "files")
+                "directory": "photos"  # Ключ: подпапка OUTPUT для файлов изображений (имя файла - хеш содержимого)
+            },
+            "output_formats": ["xlsx"],  # Ключ: форматы выходных файлов ("xlsx", "csv", "parquet", "feather", "sqlite" - база LoadDB)
+            "output_compression": None,  # Ключ: сжатие для csv/parquet/feather ("gzip", "zstd", "snappy", "lz4" или None)
+            "load_db_table": "rating",  # Ключ: таблица базы LoadDB для формата "sqlite" (дополнительные листы - <таблица>_<лист>)
+            "engine": "pandas",  # Ключ: движок преобразования ("pandas"; "duckdb" - разворачивание, места и типы одним SQL запросом во встроенной DuckDB)
+            "duckdb_threads": 0,  # Ключ: потоков DuckDB (0 - все ядра)
+            "snapshot_diff": {  # Ключ: сравнение с предыдущей выгрузкой (листы DIFF / DIFF_TOP)
+                "enabled": False,  # Ключ: включить сравнение
+                "previous_json_file": "",  # Ключ: JSON предыдущей выгрузки (без расширения); пусто - последний прошлый запуск из LoadDB (load_db_table)
+                "keys": ["employeeNumber", "rating_businessBlock", "rating_timePeriod"],  # Ключ: колонки соединения снимков
+                "metrics": [  # Ключ: сравниваемые показатели (первый - для лидеров изменения DIFF_TOP)
+                    {"column": "BANK_placeByCrystals", "lower_is_better": True},
+                    {"column": "crystalsEarned", "lower_is_better": False}
+                ],
+                "columns": ["fullName", "terDivisionName"],  # Ключ: описательные колонки в DIFF
+                "top_movers": 20,  # Ключ: строк роста и падения в DIFF_TOP
+                "output": "sheet"  # Ключ: "sheet" - листы в книге, "parquet" - файлы <имя>_DIFF.parquet / <имя>_DIFF_TOP.parquet
+            },
+            "employee_rollup": {  # Ключ: сводка по сотрудникам (лист EMPLOYEE_ROLLUP) одной группировкой groupby/agg
+                "enabled": False,  # Ключ: включить сводку
+                "keys": ["employeeNumber"],  # Ключ: колонки группировки (строка листа)
+                "columns": ["fullName", "terDivisionName"],  # Ключ: описательные колонки (первое значение в группе)
+                "aggregations": {  # Ключ: {колонка результата: [колонка, функция pandas]}
+                    "crystals": ["crystalsEarned", "sum"]
+                },
+                "empty_values": [""],  # Ключ: значения keys/pivot_column, считающиеся пустыми (пустые и NaN - всегда)
+                "empty_label": "",  # Ключ: подпись для пустых значений; пусто - строки с пустыми ключами не учитываются
+                "pivot_column": "rating_timePeriod"  # Ключ: колонка, значения которой разворачиваются в колонки <результат>_<значение>; пусто - без разворота
+            },
+            "pivot_sheets": {  # Ключ: сводные листы (pivot_table / crosstab), записываются статичными значениями
+                "enabled": False,  # Ключ: включить сводные листы
+                "sheets": [  # Ключ: описания листов (формат как в leaders_processing.pivot_sheets)
+                    {
+                        "sheet": "PIVOT_BLOCK_GOSB",
+                        "index": ["rating_businessBlock"],
+                        "columns": ["gosbCode"],
+                        "values": {
+                            "crystals": ["crystalsEarned", "sum"]
+                        },
+                        "empty_values": ["", 0],  # Ключ: пустой gosbCode после integer_fields преобразуется в 0
+                        "empty_label": "Без ГОСБ",
+                        "margins": False
+                    }
+                ]
+            },
+            "gap_fill_check": False,  # Ключ: проверять полноту JSON и генерировать скрипт догрузки пропусков
+            "gap_fill_json_file": "",  # Ключ: имя JSON файла догрузки (без расширения) для слияния с основным перед конвертацией
+            "rankings": [  # Ключ: расчет мест (показатель, уровни, метод при равенстве, направление)
+                {
+                    "metric": "crystalsEarned",  # Ключ: колонка показателя
+                    "ascending": False,  # Ключ: направление (False = больше значение — лучше место)
+                    "method": "min",  # Ключ: метод при равенстве ("min", "max", "dense", "first")
+                    "levels": {  # Ключ: уровни {колонка результата: ключи группировки}
+                        "BANK_placeByCrystals": ["rating_businessBlock", "rating_timePeriod"],
+                        "TB_placeByCrystals": ["rating_businessBlock", "rating_timePeriod", "terDivisionName"],
+                        "GOSB_placeByCrystals": ["rating_businessBlock", "rating_timePeriod", "terDivisionName", "gosbCode"]
+                    }
+                }
+            ],
             "column_settings": {  # Ключ: настройки обработки колонок для Excel
                 "columns_to_keep": [],
                 "columns_to_remove": ["photoData", "isMarked", "colorCode", "placeInRating"],
@@ -935,7 +1437,7 @@ def get_data():
     return []
 
 @measure_time
-def save_script_to_file(script_content, script_name, config_key=None, variant=None):
+def save_script_to_file(script_content, script_name, config_key=None, variant=None, shard=None):
     """
     Сохранение сгенерированного скрипта в файл TXT
     
@@ -947,6 +1449,7 @@ def save_script_to_file(script_content, script_name, config_key=None, variant=No
         script_name (str): Название скрипта для формирования имени файла
         config_key (str, optional): Ключ конфигурации для дополнительной информации
         variant (str, optional): Вариант скрипта (sigma/alpha)
+        shard (str, optional): Метка шарда (например SHARD1of3)
         
     Returns:
         str: Путь к сохраненному файлу или None в случае ошибки
@@ -960,7 +1463,9 @@ def save_script_to_file(script_content, script_name, config_key=None, variant=No
         safe_name = script_name.replace(' ', '_').replace('(', '').replace(')', '').replace('/', '_')
         
         # Добавляем информацию о варианте если есть
-        if variant:
+        if variant and shard:
+            filename = f"{safe_name}_{variant.upper()}_{shard}_{timestamp}.txt"
+        elif variant:
             filename = f"{safe_name}_{variant.upper()}_{timestamp}.txt"
         else:
             filename = f"{safe_name}_{timestamp}.txt"
@@ -1009,6 +1514,41 @@ def save_script_to_file(script_content, script_name, config_key=None, variant=No
 # ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ДЛЯ JSON И EXCEL
 # =============================================================================
 
+def get_processing_config(config_key):
+    """
+    Получение вложенной конфигурации обработки JSON → Excel
+
+    Args:
+        config_key (str): Ключ конфигурации (leaders_for_admin, reward, reward_processing, rating_list)
+
+    Returns:
+        tuple: (base_key, processing_config) - ключ скрипта в FUNCTION_CONFIGS и словарь *_processing
+    """
+    base_key = "reward" if config_key == "reward_processing" else config_key
+    config = FUNCTION_CONFIGS.get(base_key, {})
+    processing_key = PROCESSING_CONFIG_KEYS.get(base_key)
+    processing_config = config.get(processing_key, {}) if processing_key else {}
+    return base_key, processing_config
+
+def parse_contestants_count(contestants_text):
+    """
+    Извлечение количества участников из текста API (например: "1 557 участников по стране")
+
+    Args:
+        contestants_text: Текст или число из поля contestants
+
+    Returns:
+        int: Количество участников или None, если число не найдено
+    """
+    if contestants_text is None or contestants_text == "":
+        return None
+    if isinstance(contestants_text, (int, float)):
+        return int(contestants_text)
+    match = re.search(r"(\d+(?:\s*\d+)*)", str(contestants_text))
+    if not match:
+        return None
+    return int(re.sub(r"\s+", "", match.group(1)))
+
 def parse_float_safe(val, context=None):
     """Безопасное преобразование в float с обработкой европейского формата"""
     if val is None or val == "":
@@ -1026,115 +1566,360 @@ def parse_float_safe(val, context=None):
             logger.warning(LOG_MESSAGES['float_conversion_error'].format(val=val, ex=ex, context=context))
         return None
 
+def compile_flattener(name, fields, exclude_modes=()):
+    """
+    Генерация функции преобразования записи JSON в плоскую строку по описанию полей
+
+    Для каждого поля генерируется отдельная инструкция (без обхода описания во время
+    работы): прямые обращения .get(), развернутые циклы для "index" и таблица колонок
+    для "fanout". Описание полей - см. DIVISION_RATINGS_FANOUT и flatten_fields.
+
+    Args:
+        name (str): Имя генерируемой функции
+        fields (list): Описание полей (строки или словари)
+        exclude_modes (tuple): Значения "mode", поля с которыми пропускаются
+
+    Returns:
+        callable: flatten(record, <параметры "param">) → dict
+    """
+    namespace = {}
+    params = []
+    lines = []
+
+    def constant(value):
+        const_name = f"const_{len(namespace)}"
+        namespace[const_name] = value
+        return const_name
+
+    def emit_get(indent, var, path, default):
+        keys = path.split('.') if path else []
+        if not keys:
+            lines.append(f"{indent}value = {var}")
+            return
+        if len(keys) == 1:
+            lines.append(f"{indent}value = {var}.get({keys[0]!r}, {default})")
+            return
+        lines.append(f"{indent}value = {var}")
+        for key in keys[:-1]:
+            lines.append(f"{indent}value = value.get({key!r}) if isinstance(value, dict) else None")
+        lines.append(f"{indent}value = value.get({keys[-1]!r}, {default}) if isinstance(value, dict) else {default}")
+
+    def emit_field(indent, var, field, target):
+        default = constant(field.get("default", ""))
+        emit_get(indent, var, field.get("path", field.get("column")), default)
+        if field.get("type") == "int":
+            lines.append(f"{indent}try:")
+            lines.append(f"{indent}    {target} = int(float(value)) if value else {default}")
+            lines.append(f"{indent}except (ValueError, TypeError):")
+            lines.append(f"{indent}    {target} = {default}")
+        elif field.get("empty_values"):
+            empty_values = constant(tuple(field["empty_values"]))
+            lines.append(f"{indent}{target} = {default} if value in {empty_values} else value")
+        else:
+            lines.append(f"{indent}{target} = value")
+
+    for field in fields:
+        if isinstance(field, str):
+            field = {"column": field, "path": field}
+        if field.get("mode") in exclude_modes:
+            continue
+        kind = field.get("kind", "field")
+        target = f"flattened[{field.get('column')!r}]"
+
+        if kind == "field":
+            emit_field("    ", "record", field, target)
+        elif kind == "param":
+            params.append(f"{field['param']}={constant(field.get('default', ''))}")
+            lines.append(f"    {target} = {field['param']}")
+        elif kind == "concat":
+            parts = ", ".join(f"record.get({path!r}, '')" for path in field["paths"])
+            if field.get("skip_empty"):
+                joined = f"' '.join(str(part) for part in ({parts},) if part).strip()"
+            else:
+                joined = f"' '.join(str(part) for part in ({parts},)).strip()"
+            if field.get("path"):
+                lines.append(f"    value = record.get({field['path']!r}, '')")
+                lines.append(f"    {target} = value if value else {joined}")
+            else:
+                lines.append(f"    {target} = {joined}")
+        elif kind == "count":
+            emit_get("    ", "record", field["path"], "None")
+            lines.append(f"    {target} = len(value or [])")
+        elif kind == "join_list":
+            emit_get("    ", "record", field["path"], "None")
+            item_key = field["item_key"]
+            lines.append(f"    {target} = ', '.join([item.get({item_key!r}, '') for item in (value or []) if item.get({item_key!r})])")
+        elif kind == "index":
+            emit_get("    ", "record", field["path"], "None")
+            lines.append("    items = value or []")
+            for index in range(field["limit"]):
+                lines.append(f"    if len(items) > {index}:")
+                lines.append(f"        item = items[{index}]")
+                for sub_field in field["fields"]:
+                    emit_field("        ", "item", sub_field, f"flattened[{field['prefix'] + str(index + 1) + '_' + sub_field['column']!r}]")
+                lines.append("    else:")
+                for sub_field in field["fields"]:
+                    default = constant(sub_field.get("default", ""))
+                    lines.append(f"        flattened[{field['prefix'] + str(index + 1) + '_' + sub_field['column']!r}] = {default}")
+        elif kind == "fanout":
+            indent = "    "
+            if field.get("only_if_present"):
+                lines.append(f"    if {field['path']!r} in record:")
+                indent = "        "
+            columns = {value: tuple(f"{value}_{sub_field['column']}" for sub_field in field["fields"]) for value in field["values"]}
+            for value in field["values"]:
+                for sub_field, column in zip(field["fields"], columns[value]):
+                    lines.append(f"{indent}flattened[{column!r}] = {constant(sub_field.get('default', ''))}")
+            columns_name = constant(columns)
+            emit_get(indent, "record", field["path"], "None")
+            lines.append(f"{indent}for item in (value or []):")
+            lines.append(f"{indent}    if not isinstance(item, dict):")
+            lines.append(f"{indent}        continue")
+            lines.append(f"{indent}    columns = {columns_name}.get(item.get({field['key']!r}, ''))")
+            lines.append(f"{indent}    if columns is None:")
+            lines.append(f"{indent}        continue")
+            for index, sub_field in enumerate(field["fields"]):
+                emit_field(f"{indent}    ", "item", sub_field, f"flattened[columns[{index}]]")
+        else:
+            raise ValueError(f"Неизвестный вид поля {kind} в описании {name}")
+
+    source = "\n".join(
+        [f"def {name}(record{''.join(', ' + param for param in params)}):", "    flattened = {}"]
+        + lines + ["    return flattened"]
+    )
+    exec(compile(source, f"<flattener {name}>", "exec"), namespace)
+    function = namespace[name]
+    function.source = source
+    return function
+
+def build_flatteners():
+    """
+    Компиляция функций преобразования записей по описаниям полей из FUNCTION_CONFIGS
+
+    Returns:
+        dict: {имя: функция} - leader, rating_leader, reward_profile, reward_leader, reward_leader_long
+    """
+    leaders_config = FUNCTION_CONFIGS["leaders_for_admin"]["leaders_processing"]
+    rating_config = FUNCTION_CONFIGS["rating_list"]["rating_processing"]
+    reward_config = FUNCTION_CONFIGS["reward"]["reward_processing"]
+    return {
+        "leader": compile_flattener("flatten_leader", leaders_config["flatten_fields"]),
+        "rating_leader": compile_flattener("flatten_rating_leader", rating_config["flatten_fields"]),
+        "reward_profile": compile_flattener("flatten_reward_profile", reward_config["flatten_profile_fields"]),
+        "reward_leader": compile_flattener("flatten_reward_leader", reward_config["flatten_leader_fields"]),
+        "reward_leader_long": compile_flattener("flatten_reward_leader_long", reward_config["flatten_leader_fields"], ("wide",))
+    }
+
+# Скомпилированные функции преобразования записей (см. build_flatteners)
+FLATTENERS = build_flatteners()
+
 def flatten_leader_data(leader_data):
-    """Преобразование данных лидера в плоскую структуру"""
-    flattened = {}
-    
-    # Основные поля из структуры LeadersForAdmin
-    flattened['employeeNumber'] = leader_data.get('employeeNumber', '')
-    flattened['lastName'] = leader_data.get('lastName', '')
-    flattened['firstName'] = leader_data.get('firstName', '')
-    flattened['photoData'] = leader_data.get('photoData', '')  # Добавляем photoData
-    flattened['indicatorValue'] = leader_data.get('indicatorValue', '')
-    flattened['successValue'] = leader_data.get('successValue', '')
-    flattened['terDivisionName'] = leader_data.get('terDivisionName', '')
-    flattened['employeeStatus'] = leader_data.get('employeeStatus', '')
-    flattened['businessBlock'] = leader_data.get('businessBlock', '')
-    
-    # Поля турнира (добавлены при обработке всех турниров)
-    flattened['tournamentId'] = leader_data.get('tournamentId', '')
-    flattened['tournamentIndicator'] = leader_data.get('tournamentIndicator', '')
-    flattened['tournamentStatus'] = leader_data.get('tournamentStatus', '')
-    flattened['contestants'] = leader_data.get('contestants', '')
-    
-    # Создаем полное имя
-    flattened['fullName'] = f"{leader_data.get('lastName', '')} {leader_data.get('firstName', '')}".strip()
-    
-    # Обработка вложенной структуры divisionRatings
-    division_ratings = leader_data.get('divisionRatings', [])
-    
-    # Инициализируем колонки для каждой категории (BANK, TB, GOSB)
-    categories = ['BANK', 'TB', 'GOSB']
-    for category in categories:
-        flattened[f'{category}_groupId'] = ''
-        flattened[f'{category}_placeInRating'] = ''
-        flattened[f'{category}_ratingCategoryName'] = ''
-    
-    # Заполняем данные из divisionRatings
-    for rating in division_ratings:
-        group_code = rating.get('groupCode', '')
-        if group_code in categories:
-            # Преобразуем groupId в целое число
-            group_id_raw = rating.get('groupId', '')
-            try:
-                flattened[f'{group_code}_groupId'] = int(float(group_id_raw)) if group_id_raw else ''
-            except (ValueError, TypeError):
-                flattened[f'{group_code}_groupId'] = ''
-            
-            # Преобразуем placeInRating в целое число
-            place_in_rating_raw = rating.get('placeInRating', '')
-            try:
-                flattened[f'{group_code}_placeInRating'] = int(float(place_in_rating_raw)) if place_in_rating_raw else ''
-            except (ValueError, TypeError):
-                flattened[f'{group_code}_placeInRating'] = ''
-            
-            flattened[f'{group_code}_ratingCategoryName'] = rating.get('ratingCategoryName', '')
-    
-    return flattened
+    """Преобразование данных лидера в плоскую структуру (поля - leaders_processing.flatten_fields)"""
+    return FLATTENERS["leader"](leader_data)
+
+def get_ranking_group_codes(df, keys, cache):
+    """
+    Коды групп для набора ключей (факторизация с кэшированием по префиксу ключей)
+
+    Каждая колонка ключа факторизуется один раз; коды вложенных уровней строятся
+    из кодов родительского уровня, поэтому BANK → TB → GOSB не пересчитывают
+    строковые ключи заново. Пропуск в любом ключе дает код -1 (строка не ранжируется,
+    как в groupby).
+
+    Args:
+        df (pd.DataFrame): Входной DataFrame
+        keys (list): Колонки группировки
+        cache (dict): Кэш {tuple(keys): codes}
+
+    Returns:
+        np.ndarray: Плотные коды групп (int64), -1 для строк с пропусками в ключах
+    """
+    keys = tuple(keys)
+    if keys in cache:
+        return cache[keys]
+    if not keys:
+        codes = np.zeros(len(df), dtype=np.int64)
+    else:
+        parent_codes = get_ranking_group_codes(df, keys[:-1], cache)
+        column_codes = cache.get(("__column__", keys[-1]))
+        if column_codes is None:
+            column_codes, _ = pd.factorize(df[keys[-1]], sort=False)
+            column_codes = column_codes.astype(np.int64)
+            cache[("__column__", keys[-1])] = column_codes
+        combined = parent_codes * (int(column_codes.max(initial=-1)) + 1) + column_codes
+        combined[(parent_codes < 0) | (column_codes < 0)] = -1
+        codes, _ = pd.factorize(combined, sort=False)
+        codes = codes.astype(np.int64)
+        codes[combined < 0] = -1
+    cache[keys] = codes
+    return codes
+
+def rank_within_groups(values, group_codes, order, method="min"):
+    """
+    Места внутри групп по заранее отсортированному порядку строк
+
+    Args:
+        values (np.ndarray): Значения показателя (уже с учетом направления сортировки)
+        group_codes (np.ndarray): Коды групп (-1 = строка не ранжируется)
+        order (np.ndarray): Индексы строк, отсортированные по показателю (без NaN)
+        method (str): Метод при равенстве ("min", "max", "dense", "first")
+
+    Returns:
+        np.ndarray: Места (float64, NaN для нерангируемых строк)
+    """
+    ranks = np.full(len(values), np.nan)
+    order = order[group_codes[order] >= 0]
+    if len(order) == 0:
+        return ranks
+
+    # Устойчивая сортировка по целочисленным кодам групп сохраняет порядок по показателю
+    idx = order[np.argsort(group_codes[order], kind="stable")]
+    groups = group_codes[idx]
+    sorted_values = values[idx]
+    positions = np.arange(len(idx))
+
+    new_group = np.empty(len(idx), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = groups[1:] != groups[:-1]
+    new_value = new_group.copy()
+    new_value[1:] |= sorted_values[1:] != sorted_values[:-1]
 
-def calculate_crystal_rankings(df):
+    group_start = np.maximum.accumulate(np.where(new_group, positions, 0))
+    ordinal = positions - group_start + 1
+    if method == "first":
+        result = ordinal
+    elif method == "dense":
+        dense = np.cumsum(new_value)
+        result = dense - dense[group_start] + 1
+    elif method == "max":
+        run_end = np.empty(len(idx), dtype=bool)
+        run_end[-1] = True
+        run_end[:-1] = new_value[1:]
+        run_end_position = np.minimum.accumulate(np.where(run_end, positions, len(idx))[::-1])[::-1]
+        result = ordinal[run_end_position]
+    else:
+        run_start = np.maximum.accumulate(np.where(new_value, positions, 0))
+        result = ordinal[run_start]
+
+    ranks[idx] = result
+    return ranks
+
+def calculate_rankings(df, rankings):
     """
-    Расчет мест по количеству кристаллов на уровнях BANK/TB/GOSB.
-    Правило ранжирования: чем больше кристаллов — тем лучше место (меньше число).
-    При равенстве кристаллов участники делят одно место, следующее место
-    пропускает позиции (1, 2, 2, 4, 5) — метод ранжирования 'min'.
+    Расчет мест по настройкам rankings (показатели, уровни, метод, направление).
+
+    Для каждого показателя строки сортируются один раз, затем места на всех
+    уровнях (например BANK/TB/GOSB) считаются векторно по кодам групп.
+    При методе 'min' участники с равным значением делят одно место, следующее
+    место пропускает позиции (1, 2, 2, 4, 5).
 
     Args:
         df (pd.DataFrame): входной DataFrame
+        rankings (list): Список настроек вида {"metric", "ascending", "method", "levels"},
+                         где levels - словарь {колонка результата: ключи группировки}
 
     Returns:
-        pd.DataFrame: копия с добавленными колонками мест
+        pd.DataFrame: DataFrame с добавленными колонками мест
     """
+    if get_dataframe_backend() == "polars":
+        return calculate_rankings_polars(df, rankings)
+
     logger = logging.getLogger(__name__)
-    logger.info(LOG_MESSAGES['crystal_rankings_start'])
+    group_cache = {}
+    for ranking in rankings:
+        metric = ranking["metric"]
+        if metric not in df.columns:
+            logger.warning(LOG_MESSAGES['ranking_metric_missing'].format(metric=metric))
+            continue
+        levels = {
+            column: keys for column, keys in ranking.get("levels", {}).items()
+            if all(key in df.columns for key in keys)
+        }
+        method = ranking.get("method", "min")
+        logger.info(LOG_MESSAGES['ranking_metric_start'].format(metric=metric, levels=", ".join(levels), method=method))
 
-    result_df = df.copy()
+        values = pd.to_numeric(df[metric], errors='coerce').to_numpy(dtype=float)
+        if not ranking.get("ascending", False):
+            values = -values
+        valid = np.flatnonzero(~np.isnan(values))
+        order = valid[np.argsort(values[valid], kind="stable")]
 
-    # Готовим числовую колонку для корректной сортировки и ранжирования
-    crystals_col = 'crystalsEarned'
-    numeric_col = '_crystals_numeric_for_ranking'
-    result_df[numeric_col] = pd.to_numeric(result_df[crystals_col], errors='coerce')
+        for column, keys in levels.items():
+            ranks = rank_within_groups(values, get_ranking_group_codes(df, keys, group_cache), order, method)
+            df[column] = pd.array(ranks, dtype="Float64").astype("Int64")
+    return df
 
-    # BANK: в рамках (businessBlock, timePeriod)
-    result_df['BANK_placeByCrystals'] = (
-        result_df.groupby(['rating_businessBlock', 'rating_timePeriod'])[numeric_col]
-                 .rank(method='min', ascending=False)
-                 .astype('Int64')
-    )
+def get_dataframe_backend():
+    """
+    Выбор библиотеки для преобразований и расчета мест по настройке DATAFRAME_BACKEND
 
-    # TB: в рамках (businessBlock, timePeriod, terDivisionName)
-    result_df['TB_placeByCrystals'] = (
-        result_df.groupby(['rating_businessBlock', 'rating_timePeriod', 'terDivisionName'])[numeric_col]
-                 .rank(method='min', ascending=False)
-                 .astype('Int64')
-    )
+    Returns:
+        str: "polars" (если выбрана и установлена) или "pandas"
+    """
+    if DATAFRAME_BACKEND == "polars":
+        if importlib.util.find_spec("polars") is not None:
+            return "polars"
+        logging.getLogger('GameScriptGenerator').warning(LOG_MESSAGES['dataframe_backend_unavailable'].format(backend=DATAFRAME_BACKEND))
+    return "pandas"
 
-    # GOSB: в рамках (businessBlock, timePeriod, terDivisionName, gosbCode)
-    result_df['GOSB_placeByCrystals'] = (
-        result_df.groupby(['rating_businessBlock', 'rating_timePeriod', 'terDivisionName', 'gosbCode'])[numeric_col]
-                 .rank(method='min', ascending=False)
-                 .astype('Int64')
-    )
+# Методы ранжирования calculate_rankings → методы Polars rank
+POLARS_RANK_METHODS = {"min": "min", "max": "max", "dense": "dense", "first": "ordinal"}
+
+def calculate_rankings_polars(df, rankings):
+    """
+    Расчет мест в Polars: все уровни показателя - выражения rank().over() в одном select
+
+    Показатель приводится к числу pd.to_numeric (как в calculate_rankings), ключи
+    группировки передаются кодами pd.factorize; строки с пропуском в показателе
+    или ключах не ранжируются.
+
+    Args:
+        df (pd.DataFrame): входной DataFrame
+        rankings (list): Настройки rankings (см. calculate_rankings)
+
+    Returns:
+        pd.DataFrame: DataFrame с добавленными колонками мест
+    """
+    import polars as pl
+
+    logger = logging.getLogger(__name__)
+    key_codes = {}
+    for ranking in rankings:
+        metric = ranking["metric"]
+        if metric not in df.columns:
+            logger.warning(LOG_MESSAGES['ranking_metric_missing'].format(metric=metric))
+            continue
+        levels = {
+            column: keys for column, keys in ranking.get("levels", {}).items()
+            if all(key in df.columns for key in keys)
+        }
+        method = ranking.get("method", "min")
+        logger.info(LOG_MESSAGES['ranking_metric_start'].format(metric=metric, levels=", ".join(levels), method=method))
 
-    # Удаляем служебную колонку
-    result_df.drop(columns=[numeric_col], inplace=True)
+        columns = {"__value__": pl.Series(pd.to_numeric(df[metric], errors='coerce').to_numpy(dtype=float), nan_to_null=True)}
+        for key in {key for keys in levels.values() for key in keys}:
+            if key not in key_codes:
+                codes, _ = pd.factorize(df[key], sort=False)
+                key_codes[key] = pl.Series(np.where(codes < 0, np.nan, codes), nan_to_null=True).cast(pl.Int64)
+            columns[key] = key_codes[key]
+        frame = pl.DataFrame(columns)
 
-    logger.info(LOG_MESSAGES['crystal_rankings_completed'])
-    return result_df
+        rank = pl.col("__value__").rank(POLARS_RANK_METHODS.get(method, "min"), descending=not ranking.get("ascending", False))
+        # Уровень без ключей - место по всему набору данных
+        ranked = frame.select([
+            (
+                pl.when(pl.all_horizontal([pl.col(key).is_not_null() for key in keys])).then(rank.over(keys))
+                if keys else rank
+            ).cast(pl.Float64).alias(column)
+            for column, keys in levels.items()
+        ])
+        for column in levels:
+            df[column] = pd.array(ranked[column].to_numpy(), dtype="Float64").astype("Int64")
+    return df
 
 def flatten_rating_leader_data(leader_data, business_block="", time_period=""):
     """
-    Преобразование данных лидера рейтинга в плоскую структуру
+    Преобразование данных лидера рейтинга в плоскую структуру (поля - rating_processing.flatten_fields)
     
     Args:
         leader_data (dict): Данные лидера из структуры рейтинга
@@ -1144,51 +1929,19 @@ def flatten_rating_leader_data(leader_data, business_block="", time_period=""):
     Returns:
         dict: Плоская структура данных лидера рейтинга
     """
-    # Получаем логгер для этой функции
-    logger = logging.getLogger(__name__)
-    
-    flattened = {}
-    
-    # Основные поля лидера рейтинга
-    flattened['employeeNumber'] = leader_data.get('employeeNumber', '')
-    flattened['lastName'] = leader_data.get('lastName', '')
-    flattened['firstName'] = leader_data.get('firstName', '')
-    flattened['terDivisionName'] = leader_data.get('terDivisionName', '')
-    flattened['gosbCode'] = leader_data.get('gosbCode', '')
-    flattened['placeInRating'] = leader_data.get('placeInRating', '')
-    flattened['crystalsEarned'] = leader_data.get('crystalsEarned', '')
-    flattened['employeeStatus'] = leader_data.get('employeeStatus', '')
-    flattened['businessBlock'] = leader_data.get('businessBlock', '')
+    flattened = FLATTENERS["rating_leader"](leader_data, business_block, time_period)
     
     # Логируем обработку лидера рейтинга
-    full_name = f"{flattened['lastName']} {flattened['firstName']}".strip()
-    logger.debug(LOG_MESSAGES['rating_leader_processing'].format(
-        employee_number=flattened['employeeNumber'], full_name=full_name))
-    
-    # Создаем полное имя
-    flattened['fullName'] = f"{leader_data.get('lastName', '')} {leader_data.get('firstName', '')}".strip()
-    
-    # Метаданные из ключа (бизнес-блок и период времени)
-    flattened['rating_businessBlock'] = business_block
-    flattened['rating_timePeriod'] = time_period
-    
-    # Обработка placeInRating: если "-", то оставляем пустым
-    if flattened['placeInRating'] == "-":
-        flattened['placeInRating'] = ""
-    
-    # Обработка gosbCode: если пустой или "-", то оставляем пустым
-    if flattened['gosbCode'] == "-" or flattened['gosbCode'] == "":
-        flattened['gosbCode'] = ""
-    
-    # Обработка crystalsEarned: если пустой или "-", то оставляем пустым
-    if flattened['crystalsEarned'] == "-" or flattened['crystalsEarned'] == "":
-        flattened['crystalsEarned'] = ""
+    rating_logger = logging.getLogger(__name__)
+    if rating_logger.isEnabledFor(logging.DEBUG):
+        rating_logger.debug(LOG_MESSAGES['rating_leader_processing'].format(
+            employee_number=flattened.get('employeeNumber', ''), full_name=flattened.get('fullName', '')))
     
     return flattened
 
 def flatten_reward_profile_data(profile_data):
     """
-    Преобразование данных профиля награды в плоскую структуру
+    Преобразование данных профиля награды в плоскую структуру (поля - reward_processing.flatten_profile_fields)
     
     Args:
         profile_data (dict): Данные профиля из API наград
@@ -1196,142 +1949,50 @@ def flatten_reward_profile_data(profile_data):
     Returns:
         dict: Плоская структура данных профиля
     """
-    flattened = {}
-    
-    # Основные поля профиля
-    flattened['rewardCode'] = profile_data.get('rewardCode', '')
-    flattened['badgeName'] = profile_data.get('badgeName', '')
-    flattened['badgeDescription'] = profile_data.get('badgeDescription', '')
-    flattened['badgeType'] = profile_data.get('badgeType', '')
-    flattened['badgeCategory'] = profile_data.get('badgeCategory', '')
-    
-    # Поля профиля сотрудника
-    flattened['employeeNumber'] = profile_data.get('employeeNumber', '')
-    flattened['lastName'] = profile_data.get('lastName', '')
-    flattened['firstName'] = profile_data.get('firstName', '')
-    flattened['middleName'] = profile_data.get('middleName', '')
-    flattened['fullName'] = profile_data.get('fullName', '')
-    flattened['photoData'] = profile_data.get('photoData', '')  # Добавляем photoData
-    
-    # Контактная информация
-    flattened['email'] = profile_data.get('email', '')
-    flattened['phone'] = profile_data.get('phone', '')
-    flattened['mobilePhone'] = profile_data.get('mobilePhone', '')
-    
-    # Организационная информация
-    flattened['terDivisionName'] = profile_data.get('terDivisionName', '')
-    flattened['divisionName'] = profile_data.get('divisionName', '')
-    flattened['departmentName'] = profile_data.get('departmentName', '')
-    flattened['positionName'] = profile_data.get('positionName', '')
-    flattened['employeeStatus'] = profile_data.get('employeeStatus', '')
-    flattened['businessBlock'] = profile_data.get('businessBlock', '')
-    
-    # Информация о награде
-    flattened['awardDate'] = profile_data.get('awardDate', '')
-    flattened['awardReason'] = profile_data.get('awardReason', '')
-    flattened['awardLevel'] = profile_data.get('awardLevel', '')
-    flattened['awardValue'] = profile_data.get('awardValue', '')
-    
-    # Статистика и показатели
-    flattened['indicatorValue'] = profile_data.get('indicatorValue', '')
-    flattened['successValue'] = profile_data.get('successValue', '')
-    flattened['rating'] = profile_data.get('rating', '')
-    flattened['placeInRating'] = profile_data.get('placeInRating', '')
-    
-    # Дополнительные поля
-    flattened['photoUrl'] = profile_data.get('photoUrl', '')
-    flattened['isActive'] = profile_data.get('isActive', '')
-    flattened['lastActivityDate'] = profile_data.get('lastActivityDate', '')
-    
-    # Создаем полное имя, если его нет
-    if not flattened['fullName']:
-        name_parts = [flattened['lastName'], flattened['firstName'], flattened['middleName']]
-        flattened['fullName'] = ' '.join([part for part in name_parts if part]).strip()
-    
-    # Обработка вложенных структур (если есть)
-    if 'divisionRatings' in profile_data:
-        division_ratings = profile_data['divisionRatings']
-        categories = ['BANK', 'TB', 'GOSB']
-        for category in categories:
-            flattened[f'{category}_groupId'] = ''
-            flattened[f'{category}_placeInRating'] = ''
-            flattened[f'{category}_ratingCategoryName'] = ''
-        
-        for rating in division_ratings:
-            if isinstance(rating, dict):
-                group_code = rating.get('groupCode', '')
-                if group_code in categories:
-                    group_id_raw = rating.get('groupId', '')
-                    try:
-                        flattened[f'{group_code}_groupId'] = int(float(group_id_raw)) if group_id_raw else ''
-                    except (ValueError, TypeError):
-                        flattened[f'{group_code}_groupId'] = ''
-                    
-                    place_in_rating_raw = rating.get('placeInRating', '')
-                    try:
-                        flattened[f'{group_code}_placeInRating'] = int(float(place_in_rating_raw)) if place_in_rating_raw else ''
-                    except (ValueError, TypeError):
-                        flattened[f'{group_code}_placeInRating'] = ''
-                    
-                    flattened[f'{group_code}_ratingCategoryName'] = rating.get('ratingCategoryName', '')
-    
-    return flattened
+    return FLATTENERS["reward_profile"](profile_data)
 
-def flatten_reward_leader_data(leader_data, reward_code):
+def flatten_reward_leader_data(leader_data, reward_code, bridge_rows=None):
     """
     Преобразование данных лидера награды в плоскую структуру
     
     Args:
         leader_data (dict): Данные лидера из структуры наград
         reward_code (str): Код награды
+        bridge_rows (dict, optional): Списки {"tags": [...], "badges": [...]} для длинного формата.
+            Если передан, теги и earnedBadges добавляются строками в эти списки (все, без
+            ограничения в 5 тегов), а колонки tag1..tag5 и списки через запятую не создаются
         
     Returns:
         dict: Плоская структура данных лидера награды
     """
-    flattened = {}
-    
-    # Основные поля лидера
-    flattened['rewardCode'] = reward_code
-    flattened['employeeNumber'] = leader_data.get('employeeNumber', '')
-    flattened['lastName'] = leader_data.get('lastName', '')
-    flattened['firstName'] = leader_data.get('firstName', '')
-    flattened['photoData'] = leader_data.get('photoData', '')  # Добавляем photoData
-    flattened['terDivisionName'] = leader_data.get('terDivisionName', '')
-    flattened['gosbCode'] = leader_data.get('gosbCode', '')
-    flattened['employeeStatus'] = leader_data.get('employeeStatus', '')
-    flattened['receivingDate'] = leader_data.get('receivingDate', '')
-    flattened['isMarked'] = leader_data.get('isMarked', False)
-    
-    # Создаем полное имя
-    flattened['fullName'] = f"{leader_data.get('lastName', '')} {leader_data.get('firstName', '')}".strip()
-    
-    # Обработка colorCode
-    color_code = leader_data.get('colorCode', {})
-    flattened['colorPrimary'] = color_code.get('primary', '')
-    flattened['colorSecondary'] = color_code.get('secondary', '')
-    
-    # Обработка earnedBadges
-    earned_badges = leader_data.get('earnedBadges', [])
-    flattened['earnedBadgesCount'] = len(earned_badges)
-    flattened['earnedBadgesList'] = ', '.join([badge.get('name', '') for badge in earned_badges if badge.get('name')])
-    
-    # Обработка tags
-    tags = leader_data.get('tags', [])
-    flattened['tagsCount'] = len(tags)
-    flattened['tagsList'] = ', '.join([tag.get('tagName', '') for tag in tags if tag.get('tagName')])
-    
-    # Детальная информация о тегах
-    for i, tag in enumerate(tags[:5]):  # Ограничиваем до 5 тегов
-        flattened[f'tag{i+1}_id'] = tag.get('tagId', '')
-        flattened[f'tag{i+1}_name'] = tag.get('tagName', '')
-        flattened[f'tag{i+1}_color'] = tag.get('tagColor', '')
-    
-    # Заполняем пустые теги
-    for i in range(len(tags), 5):
-        flattened[f'tag{i+1}_id'] = ''
-        flattened[f'tag{i+1}_name'] = ''
-        flattened[f'tag{i+1}_color'] = ''
-    
+    # Широкий формат: tag1..tag5 и списки через запятую (поля reward_processing.flatten_leader_fields)
+    if bridge_rows is None:
+        return FLATTENERS["reward_leader"](leader_data, reward_code)
+    
+    # Длинный формат: в строке только счетчики (поля без "mode": "wide")
+    flattened = FLATTENERS["reward_leader_long"](leader_data, reward_code)
+    earned_badges = leader_data.get('earnedBadges') or []
+    tags = leader_data.get('tags') or []
+    
+    # Длинный формат: одна строка на тег / полученную награду
+    employee_number = flattened['employeeNumber']
+    for index, badge in enumerate(earned_badges, 1):
+        bridge_rows["badges"].append({
+            'employeeNumber': employee_number,
+            'rewardCode': reward_code,
+            'badgeIndex': index,
+            'badgeId': badge.get('badgeId', badge.get('id', '')),
+            'badgeName': badge.get('name', '')
+        })
+    for index, tag in enumerate(tags, 1):
+        bridge_rows["tags"].append({
+            'employeeNumber': employee_number,
+            'rewardCode': reward_code,
+            'tagIndex': index,
+            'tagId': tag.get('tagId', ''),
+            'tagName': tag.get('tagName', ''),
+            'tagColor': tag.get('tagColor', '')
+        })
     return flattened
 
 def apply_excel_styling(workbook, freeze_cell="B2"):
@@ -1381,141 +2042,233 @@ def apply_excel_styling(workbook, freeze_cell="B2"):
             adjusted_width = min(max_length + 2, 50)
             worksheet.column_dimensions[column_letter].width = adjusted_width
 
-def create_summary_sheet(workbook, data_df):
-    """Создание листа с сводной информацией"""
-    if 'DATA' not in workbook.sheetnames:
-        return
-    
-    # Создаем лист SUMMARY
-    if 'SUMMARY' in workbook.sheetnames:
-        workbook.remove(workbook['SUMMARY'])
-    summary_sheet = workbook.create_sheet('SUMMARY')
-    
-    # Основная статистика
+def get_dimension_column(data_df, extra_sheets, column):
+    """
+    Значения колонки, вынесенной в лист-справочник (split_dimension_table), по строкам DATA
+
+    Args:
+        data_df (pd.DataFrame): Данные листа DATA (с колонкой-ключом справочника)
+        extra_sheets (dict): Дополнительные листы {имя листа: DataFrame}
+        column (str): Имя колонки
+
+    Returns:
+        pd.Series: Значения колонки в порядке строк DATA или None, если колонки нет в справочниках
+    """
+    for dimension in DIMENSION_TABLES.values():
+        dimension_df = (extra_sheets or {}).get(dimension["sheet"])
+        if dimension_df is None or column not in dimension_df.columns or dimension["key"] not in data_df.columns:
+            continue
+        lookup = dimension_df.set_index(dimension["key"])[column]
+        positions = lookup.index.get_indexer(data_df[dimension["key"]])
+        return pd.Series(pd.api.extensions.take(lookup.array, positions, allow_fill=True), index=data_df.index)
+    return None
+
+def get_dataset_aggregates(data_df, extra_sheets=None):
+    """
+    Расчет всех показателей для листов SUMMARY, STATISTICS и REWARD_SUMMARY
+
+    Каждая нужная колонка факторизуется один раз: по кодам считаются и
+    распределения (аналог value_counts: по убыванию, при равенстве - в порядке
+    появления), и количество уникальных значений. Писатель книги считает
+    показатели один раз и передает их листам; колонки, вынесенные в
+    лист-справочник, восстанавливаются по ключу (get_dimension_column).
+
+    Args:
+        data_df (pd.DataFrame): Данные листа DATA
+        extra_sheets (dict, optional): Дополнительные листы (листы-справочники normalized_output)
+
+    Returns:
+        dict: {"rows", "value_counts", "nunique", "employee_numbers_filled", "indicator"}
+    """
+    aggregates = {
+        "rows": len(data_df),
+        "value_counts": {},
+        "nunique": {},
+        "employee_numbers_filled": 0,
+        "indicator": None
+    }
+    for column, with_distribution in SUMMARY_AGGREGATE_COLUMNS.items():
+        values = data_df[column] if column in data_df.columns else get_dimension_column(data_df, extra_sheets, column)
+        if values is None:
+            continue
+        codes, uniques = pd.factorize(values, sort=False)
+        aggregates["nunique"][column] = len(uniques)
+        if with_distribution:
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            order = np.argsort(-counts, kind="stable")
+            aggregates["value_counts"][column] = list(zip(uniques[order], counts[order]))
+        if column == "employeeNumber":
+            filled = codes >= 0
+            empty_code = np.flatnonzero(np.asarray(uniques, dtype=object) == '')
+            if len(empty_code):
+                filled &= codes != empty_code[0]
+            aggregates["employee_numbers_filled"] = int(filled.sum())
+
+    if 'indicatorValue_numeric' in data_df.columns:
+        indicator = data_df['indicatorValue_numeric']
+        aggregates["indicator"] = {"mean": indicator.mean(), "max": indicator.max(), "min": indicator.min()}
+
+    return aggregates
+
+def write_sheet_rows(workbook, sheet_name, rows, row_styles=None):
+    """
+    Создание листа и запись строк с оформлением отдельных строк
+
+    Работает и с обычной книгой, и с книгой в потоковом режиме (write_only),
+    где оформление задается при записи ячеек.
+
+    Args:
+        workbook: Объект рабочей книги Excel
+        sheet_name (str): Имя листа (существующий лист пересоздается)
+        rows (list): Строки листа (списки значений)
+        row_styles (dict, optional): {номер строки: {"fill", "font", "columns"}};
+            columns - номера колонок для оформления (None - вся строка)
+
+    Returns:
+        Worksheet: Созданный лист
+    """
+    row_styles = row_styles or {}
+    if not workbook.write_only and sheet_name in workbook.sheetnames:
+        workbook.remove(workbook[sheet_name])
+    sheet = workbook.create_sheet(sheet_name)
+    width = max((len(row) for row in rows), default=0)
+
+    for row_number, row in enumerate(rows, 1):
+        style = row_styles.get(row_number)
+        if workbook.write_only and style:
+            values = list(row) + [None] * (width - len(row)) if style.get("columns") is None else list(row)
+            cells = []
+            for column_number, value in enumerate(values, 1):
+                cell = WriteOnlyCell(sheet, value=value)
+                if style.get("columns") is None or column_number in style["columns"]:
+                    if style.get("fill"):
+                        cell.fill = style["fill"]
+                    if style.get("font"):
+                        cell.font = style["font"]
+                cells.append(cell)
+            sheet.append(cells)
+        else:
+            sheet.append(row)
+
+    if not workbook.write_only:
+        for row_number, style in row_styles.items():
+            for cell in sheet[row_number]:
+                if style.get("columns") is None or cell.column in style["columns"]:
+                    if style.get("fill"):
+                        cell.fill = style["fill"]
+                    if style.get("font"):
+                        cell.font = style["font"]
+    return sheet
+
+def has_data_sheets(workbook):
+    """Проверка, что книга содержит данные (лист DATA или оглавление частей INDEX)"""
+    return 'DATA' in workbook.sheetnames or 'INDEX' in workbook.sheetnames
+
+def get_summary_sheet_rows(aggregates):
+    """Строки и оформление листа SUMMARY по показателям get_dataset_aggregates: (rows, row_styles)"""
+    # Основная статистика (из общего расчета показателей)
+    status_counts = dict(aggregates["value_counts"].get('employeeStatus', []))
+    indicator = aggregates["indicator"]
     summary_data = [
         ['Параметр', 'Значение'],
-        ['Общее количество участников', len(data_df)],
-        ['Участники с номером сотрудника', len(data_df[data_df['employeeNumber'].notna() & (data_df['employeeNumber'] != '')])],
-        ['Участники со статусом CONTESTANT', len(data_df[data_df['employeeStatus'] == 'CONTESTANT'])],
-        ['Среднее значение показателя', round(data_df['indicatorValue_numeric'].mean(), 2) if 'indicatorValue_numeric' in data_df.columns else 'N/A'],
-        ['Максимальное значение показателя', data_df['indicatorValue_numeric'].max() if 'indicatorValue_numeric' in data_df.columns else 'N/A'],
-        ['Минимальное значение показателя', data_df['indicatorValue_numeric'].min() if 'indicatorValue_numeric' in data_df.columns else 'N/A'],
+        ['Общее количество участников', aggregates["rows"]],
+        ['Участники с номером сотрудника', aggregates["employee_numbers_filled"]],
+        ['Участники со статусом CONTESTANT', status_counts.get('CONTESTANT', 0)],
+        ['Среднее значение показателя', round(indicator["mean"], 2) if indicator else 'N/A'],
+        ['Максимальное значение показателя', indicator["max"] if indicator else 'N/A'],
+        ['Минимальное значение показателя', indicator["min"] if indicator else 'N/A'],
     ]
     
-    # Добавляем данные в лист
-    for row_idx, row_data in enumerate(summary_data, 1):
-        for col_idx, value in enumerate(row_data, 1):
-            summary_sheet.cell(row=row_idx, column=col_idx, value=value)
-    
-    # Применяем стили
+    # Стили заголовка
     header_fill = PatternFill(start_color=EXCEL_COLORS["header"], end_color=EXCEL_COLORS["header"], fill_type="solid")
     header_font = Font(color="FFFFFF", bold=True)
-    
-    for cell in summary_sheet[1]:
-        cell.fill = header_fill
-        cell.font = header_font
+    return summary_data, {1: {"fill": header_fill, "font": header_font}}
 
-def create_statistics_sheet(workbook, data_df):
-    """Создание листа со статистикой"""
-    if 'DATA' not in workbook.sheetnames:
+def create_summary_sheet(workbook, aggregates):
+    """Создание листа с сводной информацией"""
+    if not has_data_sheets(workbook):
         return
     
-    # Создаем лист STATISTICS
-    if 'STATISTICS' in workbook.sheetnames:
-        workbook.remove(workbook['STATISTICS'])
-    stats_sheet = workbook.create_sheet('STATISTICS')
-    
-    # Статистика по департаментам
-    if 'terDivisionName' in data_df.columns:
-        dept_stats = data_df['terDivisionName'].value_counts().reset_index()
-        dept_stats.columns = ['Территориальное подразделение', 'Количество участников']
-        
-        # Добавляем заголовок
-        stats_sheet.cell(row=1, column=1, value='Статистика по территориальным подразделениям')
-        stats_sheet.cell(row=1, column=1).font = Font(bold=True, size=14)
-        
-        # Добавляем данные
-        for row_idx, (_, row_data) in enumerate(dept_stats.iterrows(), 3):
-            stats_sheet.cell(row=row_idx, column=1, value=row_data['Территориальное подразделение'])
-            stats_sheet.cell(row=row_idx, column=2, value=row_data['Количество участников'])
+    # Создаем лист SUMMARY и применяем стили к заголовку
+    write_sheet_rows(workbook, 'SUMMARY', *get_summary_sheet_rows(aggregates))
+
+def get_statistics_sheet_rows(aggregates):
+    """Строки и оформление листа STATISTICS по показателям get_dataset_aggregates: (rows, row_styles)"""
+    # Статистика по департаментам (колонки A-B) и по бизнес-блокам (колонки D-E)
+    dept_stats = aggregates["value_counts"].get('terDivisionName')
+    block_stats = aggregates["value_counts"].get('businessBlock')
+    
+    # Заголовки и пустая вторая строка
+    title_columns = [column for column, stats in ((1, dept_stats), (4, block_stats)) if stats is not None]
+    stats_data = [
+        [
+            'Статистика по территориальным подразделениям' if dept_stats is not None else None,
+            None,
+            None,
+            'Статистика по бизнес-блокам' if block_stats is not None else None
+        ],
+        []
+    ]
     
-    # Статистика по бизнес-блокам
-    if 'businessBlock' in data_df.columns:
-        block_stats = data_df['businessBlock'].value_counts().reset_index()
-        block_stats.columns = ['Бизнес-блок', 'Количество участников']
-        
-        # Добавляем заголовок
-        stats_sheet.cell(row=1, column=4, value='Статистика по бизнес-блокам')
-        stats_sheet.cell(row=1, column=4).font = Font(bold=True, size=14)
-        
-        # Добавляем данные
-        for row_idx, (_, row_data) in enumerate(block_stats.iterrows(), 3):
-            stats_sheet.cell(row=row_idx, column=4, value=row_data['Бизнес-блок'])
-            stats_sheet.cell(row=row_idx, column=5, value=row_data['Количество участников'])
+    # Добавляем данные обеих таблиц построчно
+    dept_stats = dept_stats or []
+    block_stats = block_stats or []
+    for row_idx in range(max(len(dept_stats), len(block_stats))):
+        dept_row = list(dept_stats[row_idx]) if row_idx < len(dept_stats) else [None, None]
+        block_row = list(block_stats[row_idx]) if row_idx < len(block_stats) else [None, None]
+        stats_data.append(dept_row + [None] + block_row)
     
-    # Применяем стили
+    # Стили заголовков
     header_fill = PatternFill(start_color=EXCEL_COLORS["subheader"], end_color=EXCEL_COLORS["subheader"], fill_type="solid")
     header_font = Font(bold=True)
-    
-    for cell in stats_sheet[3]:
-        cell.fill = header_fill
-        cell.font = header_font
+    return stats_data, {
+        1: {"font": Font(bold=True, size=14), "columns": title_columns},
+        3: {"fill": header_fill, "font": header_font}
+    }
 
-def create_reward_summary_sheet(workbook, data_df):
-    """Создание сводного листа для данных наград"""
-    if 'DATA' not in workbook.sheetnames:
+def create_statistics_sheet(workbook, aggregates):
+    """Создание листа со статистикой"""
+    if not has_data_sheets(workbook):
         return
     
-    # Создаем лист REWARD_SUMMARY
-    if 'REWARD_SUMMARY' in workbook.sheetnames:
-        workbook.remove(workbook['REWARD_SUMMARY'])
-    summary_sheet = workbook.create_sheet('REWARD_SUMMARY')
-    
-    # Сводная статистика по наградам
+    # Создаем лист STATISTICS и применяем стили
+    write_sheet_rows(workbook, 'STATISTICS', *get_statistics_sheet_rows(aggregates))
+
+def get_reward_summary_sheet_rows(aggregates):
+    """Строки и оформление листа REWARD_SUMMARY по показателям get_dataset_aggregates: (rows, row_styles)"""
+    # Сводная статистика по наградам (из общего расчета показателей)
     summary_data = [
         ["Параметр", "Значение"],
-        ["Общее количество профилей с наградами", len(data_df)],
-        ["Количество уникальных кодов наград", data_df['rewardCode'].nunique() if 'rewardCode' in data_df.columns else 0],
-        ["Количество уникальных сотрудников", data_df['employeeNumber'].nunique() if 'employeeNumber' in data_df.columns else 0],
-        ["Количество уникальных подразделений", data_df['terDivisionName'].nunique() if 'terDivisionName' in data_df.columns else 0]
+        ["Общее количество профилей с наградами", aggregates["rows"]],
+        ["Количество уникальных кодов наград", aggregates["nunique"].get('rewardCode', 0)],
+        ["Количество уникальных сотрудников", aggregates["nunique"].get('employeeNumber', 0)],
+        ["Количество уникальных подразделений", aggregates["nunique"].get('terDivisionName', 0)]
     ]
     
-    # Статистика по типам наград
-    if 'badgeType' in data_df.columns:
-        badge_type_stats = data_df['badgeType'].value_counts()
-        summary_data.append(["", ""])
-        summary_data.append(["Статистика по типам наград", ""])
-        for badge_type, count in badge_type_stats.items():
-            summary_data.append([badge_type, count])
-    
-    # Статистика по категориям наград
-    if 'badgeCategory' in data_df.columns:
-        badge_category_stats = data_df['badgeCategory'].value_counts()
-        summary_data.append(["", ""])
-        summary_data.append(["Статистика по категориям наград", ""])
-        for badge_category, count in badge_category_stats.items():
-            summary_data.append([badge_category, count])
-    
-    # Статистика по структурам данных
-    if 'structure' in data_df.columns:
-        structure_stats = data_df['structure'].value_counts()
-        summary_data.append(["", ""])
-        summary_data.append(["Статистика по структурам данных", ""])
-        for structure, count in structure_stats.items():
-            summary_data.append([structure, count])
-    
-    # Записываем данные в лист
-    for row_idx, row_data in enumerate(summary_data, 1):
-        for col_idx, value in enumerate(row_data, 1):
-            summary_sheet.cell(row=row_idx, column=col_idx, value=value)
-    
-    # Применяем стили
+    # Статистика по типам наград, категориям наград и структурам данных
+    for column, title in (
+        ('badgeType', "Статистика по типам наград"),
+        ('badgeCategory', "Статистика по категориям наград"),
+        ('structure', "Статистика по структурам данных")
+    ):
+        if column in aggregates["value_counts"]:
+            summary_data.append(["", ""])
+            summary_data.append([title, ""])
+            for value, count in aggregates["value_counts"][column]:
+                summary_data.append([value, count])
+    
+    # Стили заголовка
     header_fill = PatternFill(start_color=EXCEL_COLORS["subheader"], end_color=EXCEL_COLORS["subheader"], fill_type="solid")
     header_font = Font(bold=True)
+    return summary_data, {1: {"fill": header_fill, "font": header_font}}
+
+def create_reward_summary_sheet(workbook, aggregates):
+    """Создание сводного листа для данных наград"""
+    if not has_data_sheets(workbook):
+        return
     
-    for cell in summary_sheet[1]:
-        cell.fill = header_fill
-        cell.font = header_font
+    # Создаем лист REWARD_SUMMARY и применяем стили к заголовку
+    write_sheet_rows(workbook, 'REWARD_SUMMARY', *get_reward_summary_sheet_rows(aggregates))
     
     logger.info(LOG_MESSAGES['reward_summary_sheet_created'])
 
@@ -1585,30 +2338,299 @@ def save_and_copy_script(script, config, config_key, data_list):
     logger.info(LOG_MESSAGES['script_generated'].format(script_name=config['name'], count=len(data_list)))
 
 # =============================================================================
-# ФУНКЦИИ ГЕНЕРАЦИИ JAVASCRIPT СКРИПТОВ (ЗАГЛУШКИ)
+# ШАРДИРОВАНИЕ СКРИПТОВ И СЛИЯНИЕ ШАРДОВ
 # =============================================================================
 
-@measure_time
-def generate_leaders_for_admin_script(data_list=None):
+def estimate_data_costs(config_key, data_list):
     """
-    Генерация скрипта для получения информации по участникам турнира
-    
+    Оценка стоимости обработки каждого кода по прошлой выгрузке
+
+    Стоимость кода - количество участников (contestants) из JSON прошлой выгрузки,
+    указанного в sharding.cost_json_file. Кодам без данных назначается медиана
+    известных стоимостей.
+
     Args:
-        data_list (list, optional): Список ID участников
-        
+        config_key (str): Ключ конфигурации скрипта
+        data_list (list): Список кодов
+
     Returns:
-        str: Сгенерированный JavaScript скрипт
+        dict: Словарь {код: стоимость}
     """
-    script_logger = get_script_logger("leaders_for_admin", "generation")
-    script_logger.info(LOG_MESSAGES['script_generation_start'].format(script_name="LeadersForAdmin"))
-    script_logger.debug(LOG_MESSAGES['function_start'].format(func="generate_leaders_for_admin_script", params=f"args=({data_list}), kwargs=[]"))
-    
-    # Загрузка данных и конфигурации
-    script_logger.info(LOG_MESSAGES['data_loading'])
-    config, data_list, variants_configs = load_script_data("leaders_for_admin", data_list)
-    
-    script_logger.info(LOG_MESSAGES['config_loaded_count'].format(count=len(data_list)))
-    script_logger.debug(f"Варианты: {', '.join([v.upper() for v in variants_configs.keys()])}")
+    sharding_config = FUNCTION_CONFIGS[config_key].get("sharding", {})
+    cost_json_file = sharding_config.get("cost_json_file")
+    cost_json_path = None
+    if cost_json_file:
+        cost_json_path = os.path.join(BASE_DIR, SUBDIRECTORIES["JSON"], f"{cost_json_file}{FILE_EXTENSIONS['JSON']}")
+    if not cost_json_path or not os.path.exists(cost_json_path) or config_key not in GAP_FILL_LAYOUTS:
+        logger.info(LOG_MESSAGES['shard_cost_unavailable'])
+        return {code: 1 for code in data_list}
+
+    json_data = load_json_data(cost_json_path) or {}
+    contestants_path = GAP_FILL_LAYOUTS[config_key]["contestants_path"]
+    known_costs = {}
+    for code in data_list:
+        pages = json_data.get(code)
+        if isinstance(pages, list):
+            contestants_count = get_pages_contestants_count(pages, contestants_path)
+            if contestants_count is not None:
+                known_costs[code] = max(contestants_count, 1)
+
+    sorted_costs = sorted(known_costs.values())
+    default_cost = sorted_costs[len(sorted_costs) // 2] if sorted_costs else 1
+    logger.info(LOG_MESSAGES['shard_cost_source'].format(
+        file_path=cost_json_path, known=len(known_costs), total=len(data_list), default=default_cost
+    ))
+    return {code: known_costs.get(code, default_cost) for code in data_list}
+
+def split_data_into_shards(data_list, costs, shard_count):
+    """
+    Разбиение списка кодов на шарды с балансировкой по стоимости
+
+    Жадный алгоритм LPT: коды по убыванию стоимости назначаются в наименее
+    загруженный шард. Внутри шарда сохраняется исходный порядок кодов.
+
+    Args:
+        data_list (list): Список кодов
+        costs (dict): Словарь {код: стоимость}
+        shard_count (int): Количество шардов
+
+    Returns:
+        list: Список шардов (каждый - список кодов)
+    """
+    shard_count = max(1, min(shard_count, len(data_list)))
+    heap = [(0, shard_index) for shard_index in range(shard_count)]
+    assignment = {}
+    for position in sorted(range(len(data_list)), key=lambda i: -costs.get(data_list[i], 1)):
+        load, shard_index = heapq.heappop(heap)
+        assignment[position] = shard_index
+        heapq.heappush(heap, (load + costs.get(data_list[position], 1), shard_index))
+
+    shards = [[] for _ in range(shard_count)]
+    for position, code in enumerate(data_list):
+        shards[assignment[position]].append(code)
+    return shards
+
+def get_script_shards(config_key, data_list):
+    """
+    Формирование шардов для генерации скриптов по настройкам sharding
+
+    Args:
+        config_key (str): Ключ конфигурации скрипта
+        data_list (list): Список кодов
+
+    Returns:
+        list: Список словарей {"label", "suffix", "ids"}; без шардирования - один элемент
+              с label=None и пустым suffix
+    """
+    shard_count = FUNCTION_CONFIGS[config_key].get("sharding", {}).get("shards", 1)
+    if shard_count <= 1 or len(data_list) <= 1:
+        return [{"label": None, "suffix": "", "ids": data_list}]
+
+    costs = estimate_data_costs(config_key, data_list)
+    shards = split_data_into_shards(data_list, costs, shard_count)
+    # Общая метка генерации связывает шарды одного запуска при слиянии
+    group_stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    logger.info(LOG_MESSAGES['shard_plan'].format(
+        config_key=config_key,
+        count=len(shards),
+        sizes=[len(shard) for shard in shards],
+        costs=[sum(costs[code] for code in shard) for shard in shards]
+    ))
+
+    result = []
+    for shard_index, shard_ids in enumerate(shards, start=1):
+        label = f"SHARD{shard_index}of{len(shards)}"
+        result.append({"label": label, "suffix": f"_{label}_{group_stamp}", "ids": shard_ids})
+    return result
+
+@measure_time
+def merge_shard_json_files(input_json_path):
+    """
+    Слияние JSON файлов шардов одного запуска в один файл
+
+    Файлы шардов имеют вид <prefix>_SHARD<i>of<K>_<метка генерации>_<метка выгрузки>.json
+    и лежат в одной папке. Результат сохраняется как <prefix>_SHARDS<K>_<метка генерации>.json.
+
+    Args:
+        input_json_path (str): Путь к JSON файлу любого из шардов
+
+    Returns:
+        str: Путь к объединенному JSON файлу или None, если файл не является шардом
+    """
+    file_name = os.path.splitext(os.path.basename(input_json_path))[0]
+    match = re.search(r"_SHARD(\d+)of(\d+)_(\d{8}-\d{6})_", file_name)
+    if not match:
+        return None
+
+    shard_total = int(match.group(2))
+    group_stamp = match.group(3)
+    prefix = file_name[:match.start()]
+    json_dir = os.path.dirname(input_json_path)
+    group = f"{prefix}_SHARD*of{shard_total}_{group_stamp}"
+
+    # Для каждого шарда берем самый свежий файл (при повторной выгрузке вкладки)
+    shard_files = {}
+    for path in sorted(glob.glob(os.path.join(json_dir, f"{group}_*{FILE_EXTENSIONS['JSON']}"))):
+        shard_match = re.search(r"_SHARD(\d+)of", os.path.basename(path))
+        shard_files[int(shard_match.group(1))] = path
+
+    logger.info(LOG_MESSAGES['shard_merge_start'].format(group=group, found=len(shard_files), expected=shard_total))
+    missing = [index for index in range(1, shard_total + 1) if index not in shard_files]
+    if missing:
+        logger.warning(LOG_MESSAGES['shard_merge_incomplete'].format(group=group, missing=missing))
+
+    merged = {}
+    for shard_index in sorted(shard_files):
+        shard_data = load_json_data(shard_files[shard_index])
+        if isinstance(shard_data, dict):
+            merged.update(shard_data)
+
+    output_json_path = os.path.join(json_dir, f"{prefix}_SHARDS{shard_total}_{group_stamp}{FILE_EXTENSIONS['JSON']}")
+    with open(output_json_path, 'w', encoding='utf-8') as f:
+        json.dump(merged, f, ensure_ascii=False)
+
+    logger.info(LOG_MESSAGES['shard_merge_completed'].format(count=len(merged), file_path=output_json_path))
+    return output_json_path
+
+# =============================================================================
+# ОБЩИЙ JAVASCRIPT RUNTIME ДЛЯ СГЕНЕРИРОВАННЫХ СКРИПТОВ
+# =============================================================================
+
+def build_js_runtime_prelude(config):
+    """
+    Формирование общего JavaScript runtime, который вставляется во все скрипты
+
+    Содержит removePhotoData, getTimestamp, sleep, fetchWithRetry и logRequestStats.
+    fetchWithRetry повторяет запрос при сетевых ошибках и при статусах из
+    JS_RUNTIME_SETTINGS["retry_statuses"] (экспоненциальный backoff с jitter),
+    учитывает заголовок Retry-After и собирает статистику задержек запросов.
+
+    Args:
+        config (dict): Конфигурация скрипта из FUNCTION_CONFIGS (timeout, retry_count)
+
+    Returns:
+        str: JavaScript код runtime с отступом для тела async IIFE
+    """
+    max_retries = config.get('retry_count', 3)
+    timeout = config.get('timeout', 30000)
+    retry_statuses = ', '.join(str(status) for status in JS_RUNTIME_SETTINGS["retry_statuses"])
+    backoff_base_ms = JS_RUNTIME_SETTINGS["backoff_base_ms"]
+    backoff_max_ms = JS_RUNTIME_SETTINGS["backoff_max_ms"]
+    retry_after_max_ms = JS_RUNTIME_SETTINGS["retry_after_max_ms"]
+
+    return f"""  // === Общий runtime: удаление photoData, timestamp, запросы с повторами и статистикой ===
+  const RETRY_STATUSES = new Set([{retry_statuses}]);
+  const BACKOFF_BASE_MS = {backoff_base_ms};
+  const BACKOFF_MAX_MS = {backoff_max_ms};
+  const RETRY_AFTER_MAX_MS = {retry_after_max_ms};
+  const requestStats = {{ requests: 0, retries: 0, failures: 0, latencies: [], byStatus: {{}} }};
+
+  function removePhotoData(obj) {{
+    if (Array.isArray(obj)) {{
+      obj.forEach(removePhotoData);
+    }} else if (obj && typeof obj === 'object') {{
+      Object.keys(obj).forEach(key => {{
+        if (key === 'photoData') delete obj[key];
+        else removePhotoData(obj[key]);
+      }});
+    }}
+  }}
+
+  function getTimestamp() {{
+    const d = new Date();
+    const pad = n => n.toString().padStart(2, '0');
+    return d.getFullYear().toString() + pad(d.getMonth() + 1) + pad(d.getDate()) + '-' + pad(d.getHours()) + pad(d.getMinutes()) + pad(d.getSeconds());
+  }}
+
+  const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+  // Retry-After: число секунд или HTTP-дата
+  function parseRetryAfter(value) {{
+    if (!value) return null;
+    const seconds = Number(value);
+    if (!isNaN(seconds)) return Math.max(0, seconds * 1000);
+    const date = Date.parse(value);
+    if (!isNaN(date)) return Math.max(0, date - Date.now());
+    return null;
+  }}
+
+  // Экспоненциальный backoff с jitter: случайное значение в [exp/2, exp]
+  function backoffDelay(attempt) {{
+    const exp = Math.min(BACKOFF_MAX_MS, BACKOFF_BASE_MS * 2 ** (attempt - 1));
+    return Math.round(exp / 2 + Math.random() * exp / 2);
+  }}
+
+  async function fetchWithRetry(url, options, maxRetries = {max_retries}, timeout = {timeout}) {{
+    for (let attempt = 1; attempt <= maxRetries; attempt++) {{
+      const controller = new AbortController();
+      const timer = setTimeout(() => controller.abort(), timeout);
+      const started = performance.now();
+      try {{
+        const response = await fetch(url, {{ ...options, signal: controller.signal }});
+        requestStats.requests++;
+        requestStats.latencies.push(performance.now() - started);
+        requestStats.byStatus[response.status] = (requestStats.byStatus[response.status] || 0) + 1;
+        if (!RETRY_STATUSES.has(response.status) || attempt === maxRetries) {{
+          if (!response.ok) requestStats.failures++;
+          return response;
+        }}
+        const retryAfter = parseRetryAfter(response.headers.get('Retry-After'));
+        const wait = retryAfter !== null ? Math.min(retryAfter, RETRY_AFTER_MAX_MS) : backoffDelay(attempt);
+        requestStats.retries++;
+        console.warn(`🔄 HTTP ${{response.status}}: попытка ${{attempt}}/${{maxRetries}}, повтор через ${{wait}} мс${{retryAfter !== null ? ' (Retry-After)' : ''}}`);
+        await sleep(wait);
+      }} catch (e) {{
+        requestStats.requests++;
+        requestStats.latencies.push(performance.now() - started);
+        if (attempt === maxRetries) {{
+          requestStats.failures++;
+          throw e;
+        }}
+        const wait = backoffDelay(attempt);
+        requestStats.retries++;
+        console.warn(`🔄 Ошибка запроса: попытка ${{attempt}}/${{maxRetries}}, повтор через ${{wait}} мс`, e);
+        await sleep(wait);
+      }} finally {{
+        clearTimeout(timer);
+      }}
+    }}
+  }}
+
+  function logRequestStats() {{
+    const sorted = [...requestStats.latencies].sort((a, b) => a - b);
+    const pick = q => sorted.length ? Math.round(sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))]) : 0;
+    const avg = sorted.length ? Math.round(sorted.reduce((sum, v) => sum + v, 0) / sorted.length) : 0;
+    console.log(`📈 Запросов: ${{requestStats.requests}}, повторов: ${{requestStats.retries}}, неуспешных: ${{requestStats.failures}}`);
+    console.log(`📈 Время ответа (мс): avg=${{avg}}, p50=${{pick(0.5)}}, p95=${{pick(0.95)}}, max=${{pick(1)}}`);
+    console.log('📈 Статусы ответов:', requestStats.byStatus);
+  }}
+"""
+
+# =============================================================================
+# ФУНКЦИИ ГЕНЕРАЦИИ JAVASCRIPT СКРИПТОВ (ЗАГЛУШКИ)
+# =============================================================================
+
+@measure_time
+def generate_leaders_for_admin_script(data_list=None):
+    """
+    Генерация скрипта для получения информации по участникам турнира
+    
+    Args:
+        data_list (list, optional): Список ID участников
+        
+    Returns:
+        str: Сгенерированный JavaScript скрипт
+    """
+    script_logger = get_script_logger("leaders_for_admin", "generation")
+    script_logger.info(LOG_MESSAGES['script_generation_start'].format(script_name="LeadersForAdmin"))
+    script_logger.debug(LOG_MESSAGES['function_start'].format(func="generate_leaders_for_admin_script", params=f"args=({data_list}), kwargs=[]"))
+    
+    # Загрузка данных и конфигурации
+    script_logger.info(LOG_MESSAGES['data_loading'])
+    config, data_list, variants_configs = load_script_data("leaders_for_admin", data_list)
+    
+    script_logger.info(LOG_MESSAGES['config_loaded_count'].format(count=len(data_list)))
+    script_logger.debug(f"Варианты: {', '.join([v.upper() for v in variants_configs.keys()])}")
     
     # Получаем настройки из конфигурации
     delay = config.get('delay_between_requests', 5)
@@ -1621,49 +2643,26 @@ def generate_leaders_for_admin_script(data_list=None):
     script_logger.debug(LOG_MESSAGES['photo_data_removal_enabled'] if remove_photo_data else LOG_MESSAGES['photo_data_removal_disabled'])
     script_logger.debug(f"Максимум профилей на запрос: {max_profiles_per_request}")
     
-    # Генерируем скрипты для всех вариантов
+    # Генерируем скрипты для всех шардов и вариантов
     generated_scripts = []
+    shards = get_script_shards("leaders_for_admin", data_list)
     
-    for variant_name, variant_config in variants_configs.items():
-        script_logger.info(f"Генерация скрипта для варианта: {variant_name.upper()}")
+    for shard, (variant_name, variant_config) in [(shard, variant) for shard in shards for variant in variants_configs.items()]:
+        script_logger.info(f"Генерация скрипта для варианта: {variant_name.upper()}" + (f" ({shard['label']})" if shard['label'] else ""))
         script_logger.debug(LOG_MESSAGES['domain_info'].format(domain=variant_config['domain']))
         script_logger.debug(LOG_MESSAGES['api_path_info'].format(api_path=variant_config['params']['api_path']))
         
+        js_prelude = build_js_runtime_prelude(config)
         # Генерация JavaScript скрипта для LeadersForAdmin
         script = f"""// ==UserScript==
 // Скрипт для DevTools. Выгрузка лидеров для всех Tournament ID (одна страница на турнир)
 // Вариант: {variant_name.upper()}
+// Шард: {shard['label'] or 'нет'}
 // Сгенерировано: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-// Количество турниров: {len(data_list)}
+// Количество турниров: {len(shard['ids'])}
 (async () => {{
-  // === Удаление photoData рекурсивно ===
-  function removePhotoData(obj) {{
-    if (Array.isArray(obj)) {{
-      obj.forEach(removePhotoData);
-    }} else if (obj && typeof obj === 'object') {{
-      Object.keys(obj).forEach(key => {{
-        if (key === 'photoData') {{
-          delete obj[key];
-        }} else {{
-          removePhotoData(obj[key]);
-        }}
-      }});
-    }}
-  }}
-
-  // === Генерация timestamp ===
-  function getTimestamp() {{
-    const d = new Date();
-    const pad = n => n.toString().padStart(2, '0');
-    return d.getFullYear().toString()
-      + pad(d.getMonth() + 1)
-      + pad(d.getDate())
-      + '-' + pad(d.getHours())
-      + pad(d.getMinutes())
-      + pad(d.getSeconds());
-  }}
-
-  const ids = [{', '.join([f'"{item}"' for item in data_list])}];
+{js_prelude}
+  const ids = [{', '.join([f'"{item}"' for item in shard['ids']])}];
   const service = 'leadersForAdmin';
   const BASE_URL = '{variant_config['domain']}{variant_config['params']['api_path']}';
   const results = {{}};
@@ -1677,7 +2676,7 @@ def generate_leaders_for_admin_script(data_list=None):
     console.log(`⏳ [${{i+1}}/${{ids.length}}] Обрабатываем код: ${{tid}}`);
     let resp, data;
     try {{
-      resp = await fetch(url, {{
+      resp = await fetchWithRetry(url, {{
         headers: {{ 'Accept': 'application/json', 'Cookie': document.cookie }}, credentials: 'include'
       }});
       if (!resp.ok) {{
@@ -1725,16 +2724,17 @@ def generate_leaders_for_admin_script(data_list=None):
   const blob = new Blob([JSON.stringify(results, null, 2)], {{type: 'application/json'}});
   const a = document.createElement('a');
   a.href = URL.createObjectURL(blob);
-  a.download = service + '_{variant_name.upper()}_' + ts + '.json';
+  a.download = service + '_{variant_name.upper()}{shard['suffix']}_' + ts + '.json';
   document.body.appendChild(a);
   a.click();
   a.remove();
   console.log(`🏁 Обработка завершена. Всего: ${{ids.length}}. Успешно: ${{processed}}. Пропущено: ${{skipped}}. Ошибок: ${{errors}}. Файл скачан.`);
+  logRequestStats();
 }})();"""
         
         # Сохранение скрипта для текущего варианта
         script_logger.info(f"Сохранение скрипта для варианта: {variant_name.upper()}")
-        saved_filepath = save_script_to_file(script, config['name'], "leaders_for_admin", variant_name)
+        saved_filepath = save_script_to_file(script, config['name'], "leaders_for_admin", variant_name, shard['label'])
         generated_scripts.append((variant_name, saved_filepath))
     
     # Логирование результатов
@@ -1781,11 +2781,12 @@ def generate_reward_script(data_list=None):
     script_logger.debug(LOG_MESSAGES['photo_data_removal_enabled'] if remove_photo_data else LOG_MESSAGES['photo_data_removal_disabled'])
     script_logger.debug(f"Максимум профилей на запрос: {max_profiles_per_request}")
     
-    # Генерируем скрипты для всех вариантов
+    # Генерируем скрипты для всех шардов и вариантов
     generated_scripts = []
+    shards = get_script_shards("reward", data_list)
     
-    for variant_name, variant_config in variants_configs.items():
-        script_logger.info(f"Генерация скрипта для варианта: {variant_name.upper()}")
+    for shard, (variant_name, variant_config) in [(shard, variant) for shard in shards for variant in variants_configs.items()]:
+        script_logger.info(f"Генерация скрипта для варианта: {variant_name.upper()}" + (f" ({shard['label']})" if shard['label'] else ""))
         script_logger.debug(LOG_MESSAGES['domain_info'].format(domain=variant_config['domain']))
         script_logger.debug(LOG_MESSAGES['api_path_info'].format(api_path=variant_config['params']['api_path']))
         
@@ -1796,29 +2797,15 @@ def generate_reward_script(data_list=None):
         
         script_logger.debug(LOG_MESSAGES['base_url_info'].format(base_url=base_url))
         
-        ids_string = ', '.join([f'"{item}"' for item in data_list])
-        script_logger.debug(LOG_MESSAGES['ids_generated'].format(count=len(data_list)))
+        js_prelude = build_js_runtime_prelude(config)
+        ids_string = ', '.join([f'"{item}"' for item in shard['ids']])
+        script_logger.debug(LOG_MESSAGES['ids_generated'].format(count=len(shard['ids'])))
         script = f'''// ==UserScript==
 // Скрипт для DevTools. Выгрузка профилей участников по кодам наград с пагинацией
 // Вариант: {variant_name.upper()}
+// Шард: {shard['label'] or 'нет'}
 (async () => {{
-  function removePhotoData(obj) {{
-    if (Array.isArray(obj)) {{
-      obj.forEach(removePhotoData);
-    }} else if (obj && typeof obj === 'object') {{
-      Object.keys(obj).forEach(key => {{
-        if (key === 'photoData') delete obj[key];
-        else removePhotoData(obj[key]);
-      }});
-    }}
-  }}
-
-  function getTimestamp() {{
-    const d = new Date();
-    const pad = n => n.toString().padStart(2, '0');
-    return d.getFullYear().toString() + pad(d.getMonth() + 1) + pad(d.getDate()) + '-' + pad(d.getHours()) + pad(d.getMinutes()) + pad(d.getSeconds());
-  }}
-
+{js_prelude}
   function extractProfiles(data) {{
     try {{
       if (data?.body?.badge?.profiles && Array.isArray(data.body.badge.profiles)) {{
@@ -1845,21 +2832,6 @@ def generate_reward_script(data_list=None):
     return result;
   }}
 
-  async function fetchWithRetry(url, options, maxRetries = {max_retries}, timeout = {timeout}) {{
-    for (let attempt = 1; attempt <= maxRetries; attempt++) {{
-      try {{
-        const controller = new AbortController();
-        const id = setTimeout(() => controller.abort(), timeout);
-        const response = await fetch(url, {{ ...options, signal: controller.signal }});
-        clearTimeout(id);
-        return response;
-      }} catch (e) {{
-        if (attempt === maxRetries) throw e;
-        await new Promise(r => setTimeout(r, 1000 * attempt));
-      }}
-    }}
-  }}
-
   const ids = [{ids_string}];
   const BASE_URL = '{base_url}';
   const results = {{}};
@@ -1901,7 +2873,8 @@ def generate_reward_script(data_list=None):
       const pagesCount = Math.ceil(count / maxProfilesPerRequest);
       console.log(`📊 [${{i + 1}}/${{ids.length}}] Код: ${{code}} - Страниц для запроса: ${{pagesCount}} (участников: ${{count}}, по ${{maxProfilesPerRequest}} на страницу)`);
       
-      // Сохраняем первый запрос
+      // Сохраняем первый запрос (pageNum нужен для проверки полноты и догрузки пропусков)
+      firstData.pageNum = 1;
       results[code] = [firstData];
       const firstProfilesCount = firstData?.body?.badge?.profiles?.length || 0;
       totalProfiles += firstProfilesCount;
@@ -1932,6 +2905,7 @@ def generate_reward_script(data_list=None):
             }}
             
             const pageData = await pageResp.json();
+            pageData.pageNum = page;
             results[code].push(pageData);
             const pageProfilesCount = pageData?.body?.badge?.profiles?.length || 0;
             totalProfiles += pageProfilesCount;
@@ -1973,16 +2947,17 @@ def generate_reward_script(data_list=None):
   const blob = new Blob([JSON.stringify(results, null, 2)], {{ type: 'application/json' }});
   const a = document.createElement('a');
   a.href = URL.createObjectURL(blob);
-  a.download = `REWARD_{variant_name.upper()}_${{ts}}.json`;
+  a.download = `REWARD_{variant_name.upper()}{shard['suffix']}_${{ts}}.json`;
   a.click();
   
   console.log(`\\n🏁 Обработка завершена. Всего: ${{ids.length}}. Успешно: ${{processed}}. Пропущено: ${{skipped}}. Ошибок: ${{errors}}. Профилей: ${{totalProfiles}}. Файл скачан.`);
+  logRequestStats();
 }})();
 '''
         
         # Сохранение скрипта для текущего варианта
         script_logger.info(f"Сохранение скрипта для варианта: {variant_name.upper()}")
-        saved_filepath = save_script_to_file(script, config['name'], "reward", variant_name)
+        saved_filepath = save_script_to_file(script, config['name'], "reward", variant_name, shard['label'])
         generated_scripts.append((variant_name, saved_filepath))
     
     # Логирование результатов
@@ -2147,6 +3122,7 @@ def generate_rating_list_script(data_list=None):
         script_logger.debug(f"Бизнес-блоки для JavaScript: {business_blocks_string}")
         script_logger.debug(f"Периоды времени для JavaScript: {time_periods_string}")
         
+        js_prelude = build_js_runtime_prelude(config)
         script = f'''// ==UserScript==
 // Скрипт для DevTools. Выгрузка рейтинга участников по бизнес-блокам и периодам времени с пагинацией
 // Вариант: {variant_name.upper()}
@@ -2155,22 +3131,7 @@ def generate_rating_list_script(data_list=None):
 // Бизнес-блоки: {', '.join(business_blocks)}
 // Периоды времени: {', '.join(time_periods)}
 (async () => {{
-  function removePhotoData(obj) {{
-    if (Array.isArray(obj)) {{ obj.forEach(removePhotoData); }}
-    else if (obj && typeof obj === 'object') {{
-      Object.keys(obj).forEach(key => {{
-        if (key === 'photoData') delete obj[key];
-        else removePhotoData(obj[key]);
-      }});
-    }}
-  }}
-
-  function getTimestamp() {{
-    const d = new Date();
-    const pad = n => n.toString().padStart(2, '0');
-    return d.getFullYear().toString() + pad(d.getMonth() + 1) + pad(d.getDate()) + '-' + pad(d.getHours()) + pad(d.getMinutes()) + pad(d.getSeconds());
-  }}
-
+{js_prelude}
   function extractParticipantsCount(data) {{
     try {{
       // Пытаемся извлечь количество участников из поля contestants (например: "1 557 участников по стране")
@@ -2239,22 +3200,6 @@ def generate_rating_list_script(data_list=None):
     }}
   }}
 
-  async function fetchWithRetry(url, options, maxRetries = {max_retries}, timeout = {timeout}) {{
-    for (let attempt = 1; attempt <= maxRetries; attempt++) {{
-      try {{
-        const controller = new AbortController();
-        const id = setTimeout(() => controller.abort(), timeout);
-        const response = await fetch(url, {{ ...options, signal: controller.signal }});
-        clearTimeout(id);
-        return response;
-      }} catch (e) {{
-        if (attempt === maxRetries) throw e;
-        console.log(`🔄 Попытка ${{attempt}}/${{maxRetries}} не удалась, повторяем через ${{attempt}} сек...`);
-        await new Promise(r => setTimeout(r, 1000 * attempt));
-      }}
-    }}
-  }}
-
   const businessBlocks = [{business_blocks_string}];
   const timePeriods = [{time_periods_string}];
   const BASE_URL = '{base_url}';
@@ -2324,6 +3269,7 @@ def generate_rating_list_script(data_list=None):
       
       // Сохраняем первый запрос с ключом, включающим период времени
       const resultKey = `${{businessBlock}}_${{timePeriod}}`;
+      firstData.pageNum = 1;
       results[resultKey] = [firstData];
       const firstParticipantsCount = extractParticipants(firstData).length;
       totalParticipants += firstParticipantsCount;
@@ -2375,6 +3321,7 @@ def generate_rating_list_script(data_list=None):
               continue;
             }}
             
+            pageData.pageNum = page;
             results[resultKey].push(pageData);
             totalParticipants += pageParticipantsCount;
             console.log(`✅ LOAD ${{combinationIndex}}/${{totalCombinations}} - ${{page}}/${{pagesCount}} — Успешно, участников: ${{pageParticipantsCount}}`);
@@ -2439,6 +3386,7 @@ def generate_rating_list_script(data_list=None):
     }}, 0);
     console.log(`  ${{index + 1}}. ${{businessBlock}}: ${{pagesCount}} страниц, ${{totalBlockParticipants}} участников`);
   }});
+  logRequestStats();
 }})();
 '''
         
@@ -2459,512 +3407,3270 @@ def generate_rating_list_script(data_list=None):
     return generated_scripts
 
 # =============================================================================
-# ФУНКЦИИ ОБРАБОТКИ JSON В EXCEL
+# ПРОВЕРКА ПОЛНОТЫ JSON И ДОГРУЗКА ПРОПУСКОВ
 # =============================================================================
 
-def load_json_data(input_json_path):
+def get_pages_contestants_count(pages, contestants_path):
     """
-    Общая функция для загрузки JSON данных
-    
+    Количество участников по ключу выгрузки (с первой страницы, где оно указано)
+
     Args:
-        input_json_path (str): Путь к входному JSON файлу
-        
+        pages (list): Страницы ответа API по одному ключу
+        contestants_path (tuple): Путь к полю contestants (из GAP_FILL_LAYOUTS)
+
     Returns:
-        dict: Загруженные JSON данные
+        int: Количество участников или None
     """
-    try:
-        logger.info(LOG_MESSAGES['json_data_loading'])
-        logger.debug(f"Загружаем JSON файл: {input_json_path}")
-        with open(input_json_path, 'r', encoding='utf-8') as f:
-            json_data = json.load(f)
-        logger.debug(f"JSON загружен. Тип: {type(json_data)}, количество ключей: {len(json_data) if isinstance(json_data, dict) else 'не dict'}")
-        return json_data
-    except Exception as e:
-        logger.error(LOG_MESSAGES['json_load_error'].format(file_path=input_json_path, error=e))
-        return None
+    for page in pages:
+        value = page
+        for part in contestants_path:
+            value = value.get(part) if isinstance(value, dict) else None
+        contestants_count = parse_contestants_count(value)
+        if contestants_count is not None:
+            return contestants_count
+    return None
 
-@measure_time
-def convert_to_integer(value, column_name=None):
+def get_expected_json_keys(config_key, data_list=None):
     """
-    Преобразование значения в целое число с очисткой от лишних символов
-    
+    Формирование списка ключей, которые должны присутствовать в выгрузке
+
     Args:
-        value: Значение для преобразования
-        column_name (str, optional): Имя колонки для логирования
-        
+        config_key (str): Ключ конфигурации (leaders_for_admin, reward, rating_list)
+        data_list (list, optional): Список кодов, по которым выполнялась выгрузка
+
     Returns:
-        int: Преобразованное целое число или 0 при ошибке
+        list: Список словарей {"key": ..., параметры запроса}
     """
-    import re
-    
-    try:
-        if pd.isna(value) or value == '':
-            return 0
-        
-        # Преобразуем в строку и очищаем от лишних символов
-        value_str = str(value).strip()
-        
-        # Удаляем все символы кроме цифр, точки, запятой и минуса
-        cleaned_value = re.sub(r'[^\d.,\-]', '', value_str)
-        
-        # Заменяем запятую на точку для корректного парсинга
-        cleaned_value = cleaned_value.replace(',', '.')
-        
-        # Удаляем лишние точки (оставляем только первую)
-        if cleaned_value.count('.') > 1:
-            parts = cleaned_value.split('.')
-            cleaned_value = parts[0] + '.' + ''.join(parts[1:])
-        
-        # Преобразуем в число и округляем до целого
-        numeric_value = float(cleaned_value)
-        return int(numeric_value)
-        
-    except Exception as e:
-        context = f" для колонки {column_name}" if column_name else ""
-        logger.warning(LOG_MESSAGES['numeric_conversion_error'].format(
-            column=column_name or 'unknown', 
-            value=str(value), 
-            error=str(e)
-        ))
-        return 0
+    if config_key == "rating_list":
+        config = FUNCTION_CONFIGS["rating_list"]
+        business_blocks = config.get('business_blocks', ["KMKKSB"])
+        time_periods = config.get('time_periods', ["ACTIVESEASON"])
+        return [
+            {"key": f"{business_block}_{time_period}", "businessBlock": business_block, "timePeriod": time_period}
+            for business_block in business_blocks
+            for time_period in time_periods
+        ]
 
-@measure_time
-def convert_to_float(value, decimal_places=2, column_name=None):
+    if data_list is None:
+        _, data_list, _ = load_script_data(config_key)
+    return [{"key": code, "code": code} for code in data_list]
+
+def check_json_completeness(config_key, json_data, data_list=None):
     """
-    Преобразование значения в дробное число с очисткой от лишних символов
-    
+    Проверка полноты выгрузки: сравнение ключей и страниц JSON с запрошенными
+
+    Ключ считается отсутствующим, если его нет в выгрузке. Для постраничных выгрузок
+    ожидаемое количество страниц вычисляется по полю contestants первой страницы.
+    Если страницы содержат pageNum, догружаются только отсутствующие страницы,
+    иначе ключ догружается целиком.
+
     Args:
-        value: Значение для преобразования
-        decimal_places (int): Количество знаков после запятой
-        column_name (str, optional): Имя колонки для логирования
-        
+        config_key (str): Ключ конфигурации (leaders_for_admin, reward, reward_processing, rating_list)
+        json_data (dict): Загруженная выгрузка {key: [page1, page2, ...]}
+        data_list (list, optional): Список запрошенных кодов
+
     Returns:
-        float: Преобразованное дробное число или 0.0 при ошибке
+        dict: {"tasks": [...], "expected": int, "present": int, "missing_keys": [...], "incomplete_keys": [...]}
+              или None, если проверка не поддерживается
     """
-    import re
-    
-    try:
-        if pd.isna(value) or value == '':
-            return 0.0
-        
-        # Преобразуем в строку и очищаем от лишних символов
-        value_str = str(value).strip()
-        
-        # Удаляем все символы кроме цифр, точки, запятой и минуса
-        cleaned_value = re.sub(r'[^\d.,\-]', '', value_str)
-        
-        # Заменяем запятую на точку для корректного парсинга
-        cleaned_value = cleaned_value.replace(',', '.')
-        
-        # Удаляем лишние точки (оставляем только первую)
-        if cleaned_value.count('.') > 1:
-            parts = cleaned_value.split('.')
-            cleaned_value = parts[0] + '.' + ''.join(parts[1:])
-        
-        # Преобразуем в число и округляем
-        numeric_value = float(cleaned_value)
-        return round(numeric_value, decimal_places)
-        
-    except Exception as e:
-        context = f" для колонки {column_name}" if column_name else ""
-        logger.warning(LOG_MESSAGES['numeric_conversion_error'].format(
-            column=column_name or 'unknown', 
-            value=str(value), 
-            error=str(e)
-        ))
-        return 0.0
+    base_key, _ = get_processing_config(config_key)
+    if base_key not in GAP_FILL_LAYOUTS or not isinstance(json_data, dict):
+        logger.warning(LOG_MESSAGES['gap_fill_unsupported'].format(config_key=config_key))
+        return None
+
+    layout = GAP_FILL_LAYOUTS[base_key]
+    page_size = None
+    if layout["page_size_option"]:
+        page_size = FUNCTION_CONFIGS[base_key].get('processing_options', {}).get(layout["page_size_option"], 100)
+
+    expected_keys = get_expected_json_keys(base_key, data_list)
+    tasks = []
+    missing_keys = []
+    incomplete_keys = []
+
+    for expected in expected_keys:
+        key = expected["key"]
+        pages = json_data.get(key)
+        if not pages:
+            tasks.append({**expected, "pages": None})
+            missing_keys.append(key)
+            continue
+        if not isinstance(pages, list):
+            pages = [pages]
+        if page_size is None:
+            continue
+
+        contestants_count = get_pages_contestants_count(pages, layout["contestants_path"])
+        if not contestants_count:
+            continue
+
+        expected_pages = -(-contestants_count // page_size)
+        page_numbers = [page.get('pageNum') for page in pages if isinstance(page, dict)]
+        if len(page_numbers) == len(pages) and all(isinstance(number, int) for number in page_numbers):
+            missing_pages = sorted(set(range(1, expected_pages + 1)) - set(page_numbers))
+            if missing_pages:
+                tasks.append({**expected, "pages": missing_pages})
+                incomplete_keys.append(key)
+                logger.debug(LOG_MESSAGES['gap_fill_incomplete_key'].format(
+                    key=key, present=len(pages), expected=expected_pages, pages=missing_pages))
+        elif len(pages) < expected_pages:
+            # Страницы без pageNum: нельзя определить, какие пропущены - догружаем ключ целиком
+            tasks.append({**expected, "pages": None})
+            incomplete_keys.append(key)
+            logger.debug(LOG_MESSAGES['gap_fill_incomplete_key'].format(
+                key=key, present=len(pages), expected=expected_pages, pages="все"))
+
+    report = {
+        "tasks": tasks,
+        "expected": len(expected_keys),
+        "present": len(expected_keys) - len(missing_keys),
+        "missing_keys": missing_keys,
+        "incomplete_keys": incomplete_keys
+    }
+    logger.info(LOG_MESSAGES['gap_fill_check_result'].format(
+        expected=report["expected"], present=report["present"],
+        missing=len(missing_keys), incomplete=len(incomplete_keys)))
+    return report
 
 @measure_time
-def convert_to_date(value, input_format='DD.MM.YY', column_name=None):
+def generate_gap_fill_script(config_key, json_file_name, report):
     """
-    Преобразование значения в дату с очисткой от лишних символов
-    
+    Генерация JavaScript скрипта, который догружает только отсутствующие ключи и страницы
+
+    Скрипт скачивает файл GAPFILL_<json_file_name>.json той же структуры {key: [pages]},
+    который затем объединяется с исходной выгрузкой функцией merge_gap_fill_json.
+
     Args:
-        value: Значение для преобразования
-        input_format (str): Входной формат даты
-        column_name (str, optional): Имя колонки для логирования
-        
+        config_key (str): Ключ конфигурации (leaders_for_admin, reward, reward_processing, rating_list)
+        json_file_name (str): Имя исходного JSON файла без расширения
+        report (dict): Результат check_json_completeness
+
     Returns:
-        datetime: Преобразованная дата или исходное значение при ошибке
+        list: Список кортежей (variant_name, filepath) сгенерированных скриптов
+    """
+    base_key, _ = get_processing_config(config_key)
+    config = FUNCTION_CONFIGS[base_key]
+    script_logger = get_script_logger(base_key, "gap_fill")
+    tasks = report["tasks"]
+
+    # Вариант определяем по имени выгрузки (..._SIGMA_... / ..._ALPHA_...), иначе генерируем для всех
+    variants_configs = config["variants"]
+    variant_match = re.search(r"_(SIGMA|ALPHA)_", json_file_name, re.IGNORECASE)
+    if variant_match and variant_match.group(1).lower() in variants_configs:
+        variant_key = variant_match.group(1).lower()
+        variants_configs = {variant_key: variants_configs[variant_key]}
+
+    page_size = 1
+    page_size_option = GAP_FILL_LAYOUTS[base_key]["page_size_option"]
+    if page_size_option:
+        page_size = config.get('processing_options', {}).get(page_size_option, 100)
+    delay = config.get('delay_between_requests', 5)
+    remove_photo_data = config.get('processing_options', {}).get('remove_photo_data', True)
+    tasks_json = json.dumps(tasks, ensure_ascii=False)
+    known_requests = sum(len(task["pages"]) if task["pages"] else 1 for task in tasks)
+
+    generated_scripts = []
+    for variant_name, variant_config in variants_configs.items():
+        params = variant_config['params']
+        base_url = f"{variant_config['domain']}{params['api_path']}"
+        js_prelude = build_js_runtime_prelude(config)
+
+        # Формирование URL, заголовков и расчета количества страниц для каждого типа выгрузки
+        if base_key == "leaders_for_admin":
+            layout_js = f"""  const HEADERS = {{ 'Accept': 'application/json', 'Cookie': document.cookie }};
+  const buildUrl = (task, page) => `${{BASE_URL}}${{task.code}}/{params.get('service', 'leadersForAdmin')}?pageNum=${{page}}`;
+  const totalPages = data => ((data?.body?.tournament?.leaders || data?.body?.badge?.leaders || []).length > 0 ? 1 : 0);"""
+        elif base_key == "reward":
+            layout_js = f"""  const HEADERS = {{ 'Accept': 'application/json', 'Cookie': document.cookie, 'User-Agent': navigator.userAgent }};
+  const buildUrl = (task, page) => `${{BASE_URL}}${{task.code}}/{params.get('service', 'profiles')}?pageNum=${{page}}&divisionLevel=BANK`;
+  const totalPages = data => Math.ceil(parseCount(data?.body?.badge?.contestants) / PAGE_SIZE);"""
+        else:
+            layout_js = f"""  const HEADERS = {{ 'Accept': '*/*', 'Accept-Language': 'ru', 'Cookie': document.cookie, 'User-Agent': navigator.userAgent, 'Referer': 'https://salesheroes.sberbank.ru/rating' }};
+  const buildUrl = (task, page) => `${{BASE_URL}}?divisionLevel={params.get('division_level', 'BANK')}&timePeriod=${{task.timePeriod}}&pageNum=${{page}}&businessBlock=${{task.businessBlock}}`;
+  const totalPages = data => Math.ceil(parseCount(data?.body?.rating?.contestants) / PAGE_SIZE);"""
+
+        script = f'''// ==UserScript==
+// Скрипт для DevTools. Догрузка пропущенных ключей и страниц выгрузки {json_file_name}
+// Вариант: {variant_name.upper()}
+// Сгенерировано: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+// Задач: {len(tasks)} (отсутствующих ключей: {len(report["missing_keys"])}, неполных: {len(report["incomplete_keys"])})
+(async () => {{
+{js_prelude}
+  function parseCount(text) {{
+    if (typeof text === 'number') return text;
+    const match = String(text || '').match(/(\\d+(?:\\s*\\d+)*)/);
+    return match ? parseInt(match[1].replace(/\\s/g, ''), 10) : 0;
+  }}
+
+  const tasks = {tasks_json};
+  const BASE_URL = '{base_url}';
+  const PAGE_SIZE = {page_size};
+  const results = {{}};
+  let processed = 0, skipped = 0, errors = 0;
+{layout_js}
+
+  async function loadPage(task, page) {{
+    const resp = await fetchWithRetry(buildUrl(task, page), {{ headers: HEADERS, credentials: 'include' }});
+    if (!resp.ok) {{
+      console.error(`❌ ${{task.key}} - страница ${{page}}: HTTP ошибка ${{resp.status}}`);
+      return null;
+    }}
+    const data = await resp.json();
+    data.pageNum = page;
+    return data;
+  }}
+
+  console.log(`▶️ Догрузка: ${{tasks.length}} задач`);
+  for (let i = 0; i < tasks.length; i++) {{
+    const task = tasks[i];
+    try {{
+      let pages = task.pages;
+      results[task.key] = [];
+      if (pages === null) {{
+        // Ключ отсутствует или неполный без pageNum - загружаем целиком
+        const firstData = await loadPage(task, 1);
+        if (!firstData) {{ errors++; continue; }}
+        const pagesCount = totalPages(firstData);
+        if (pagesCount === 0) {{
+          console.log(`⏭️ [${{i + 1}}/${{tasks.length}}] ${{task.key}}: участников нет`);
+          delete results[task.key];
+          skipped++;
+          continue;
+        }}
+        results[task.key].push(firstData);
+        pages = Array.from({{ length: pagesCount - 1 }}, (_, index) => index + 2);
+      }}
+      for (const page of pages) {{
+        await sleep({delay});
+        const pageData = await loadPage(task, page);
+        if (pageData) results[task.key].push(pageData);
+        else errors++;
+      }}
+      console.log(`✅ [${{i + 1}}/${{tasks.length}}] ${{task.key}}: загружено страниц ${{results[task.key].length}}`);
+      processed++;
+    }} catch (e) {{
+      console.error(`❌ [${{i + 1}}/${{tasks.length}}] ${{task.key}}: критическая ошибка`, e);
+      errors++;
+    }}
+    if (i < tasks.length - 1) await sleep({delay});
+  }}
+
+  if ({str(remove_photo_data).lower()}) {{
+    removePhotoData(results);
+  }}
+
+  const blob = new Blob([JSON.stringify(results, null, 2)], {{ type: 'application/json' }});
+  const a = document.createElement('a');
+  a.href = URL.createObjectURL(blob);
+  a.download = 'GAPFILL_{json_file_name}.json';
+  a.click();
+  console.log(`🏁 Догрузка завершена. Задач: ${{tasks.length}}. Успешно: ${{processed}}. Пропущено: ${{skipped}}. Ошибок: ${{errors}}. Файл: GAPFILL_{json_file_name}.json`);
+  logRequestStats();
+}})();
+'''
+        saved_filepath = save_script_to_file(script, f"{config['name']}_GAPFILL", base_key, variant_name)
+        generated_scripts.append((variant_name, saved_filepath))
+
+    script_logger.info(LOG_MESSAGES['gap_fill_script_generated'].format(count=len(tasks), requests=known_requests))
+    return generated_scripts
+
+@measure_time
+def merge_gap_fill_json(original_json_path, gap_json_path, output_json_path=None):
+    """
+    Объединение файла догрузки GAPFILL_*.json с исходной выгрузкой
+
+    Если все страницы ключа в исходной выгрузке содержат pageNum, страницы объединяются
+    по номеру (догруженные заменяют одноименные). Иначе ключ заменяется целиком,
+    так как скрипт догрузки загружал его полностью.
+
+    Args:
+        original_json_path (str): Путь к исходной выгрузке
+        gap_json_path (str): Путь к файлу догрузки
+        output_json_path (str, optional): Путь к результату (по умолчанию <исходный>_MERGED.json)
+
+    Returns:
+        str: Путь к объединенному файлу или None в случае ошибки
+    """
+    logger.info(LOG_MESSAGES['gap_fill_merge_start'].format(
+        gap_file=os.path.basename(gap_json_path), original_file=os.path.basename(original_json_path)))
+    original_data = load_json_data(original_json_path)
+    gap_data = load_json_data(gap_json_path)
+    if not isinstance(original_data, dict) or not isinstance(gap_data, dict):
+        logger.error(LOG_MESSAGES['json_invalid_format'])
+        return None
+
+    added = 0
+    updated = 0
+    for key, gap_pages in gap_data.items():
+        if not isinstance(gap_pages, list) or not gap_pages:
+            continue
+        original_pages = original_data.get(key)
+        if not original_pages:
+            original_data[key] = gap_pages
+            added += 1
+            continue
+        if not isinstance(original_pages, list):
+            original_pages = [original_pages]
+        if all(isinstance(page, dict) and isinstance(page.get('pageNum'), int) for page in original_pages):
+            pages_by_number = {page['pageNum']: page for page in original_pages}
+            for page in gap_pages:
+                if isinstance(page, dict) and isinstance(page.get('pageNum'), int):
+                    pages_by_number[page['pageNum']] = page
+            original_data[key] = [pages_by_number[number] for number in sorted(pages_by_number)]
+        else:
+            original_data[key] = gap_pages
+        updated += 1
+
+    if output_json_path is None:
+        output_json_path = f"{os.path.splitext(original_json_path)[0]}_MERGED{FILE_EXTENSIONS['JSON']}"
+    with open(output_json_path, 'w', encoding='utf-8') as f:
+        json.dump(original_data, f, ensure_ascii=False)
+
+    logger.info(LOG_MESSAGES['gap_fill_merge_completed'].format(added=added, updated=updated, file_path=output_json_path))
+    return output_json_path
+
+def check_and_generate_gap_fill_script(input_json_path, config_key):
+    """
+    Проверка полноты выгрузки и генерация скрипта догрузки при наличии пропусков
+
+    Args:
+        input_json_path (str): Путь к JSON выгрузке
+        config_key (str): Ключ конфигурации
+
+    Returns:
+        list: Сгенерированные скрипты (variant_name, filepath) или пустой список
+    """
+    json_file_name = os.path.splitext(os.path.basename(input_json_path))[0]
+    logger.info(LOG_MESSAGES['gap_fill_check_start'].format(file_name=json_file_name, config_key=config_key))
+    json_data = load_json_data(input_json_path)
+    report = check_json_completeness(config_key, json_data)
+    if report is None:
+        return []
+    if not report["tasks"]:
+        logger.info(LOG_MESSAGES['gap_fill_complete'].format(file_name=json_file_name))
+        return []
+    return generate_gap_fill_script(config_key, json_file_name, report)
+
+# =============================================================================
+# ФУНКЦИИ ОБРАБОТКИ JSON В EXCEL
+# =============================================================================
+
+def parse_json_stdlib(raw_bytes):
+    """Разбор JSON стандартной библиотекой json"""
+    return json.loads(raw_bytes)
+
+def parse_json_orjson(raw_bytes):
+    """Разбор JSON библиотекой orjson"""
+    import orjson
+    return orjson.loads(raw_bytes)
+
+def parse_json_simdjson(raw_bytes):
+    """Разбор JSON библиотекой pysimdjson"""
+    import simdjson
+    return simdjson.loads(raw_bytes)
+
+# Парсеры JSON в порядке приоритета для режима "auto": функция разбора байтов и библиотека
+JSON_PARSE_BACKENDS = {
+    "orjson": {"function": parse_json_orjson, "library": "orjson"},
+    "simdjson": {"function": parse_json_simdjson, "library": "simdjson"},
+    "json": {"function": parse_json_stdlib, "library": None}
+}
+
+def get_available_json_backends():
+    """Имена парсеров JSON, библиотеки которых установлены (в порядке приоритета)"""
+    return [
+        name for name, backend in JSON_PARSE_BACKENDS.items()
+        if backend["library"] is None or importlib.util.find_spec(backend["library"]) is not None
+    ]
+
+def get_json_parse_backend():
+    """
+    Выбор парсера JSON по настройке JSON_PARSE_BACKEND
+
+    Returns:
+        str: Имя парсера из JSON_PARSE_BACKENDS
+    """
+    available = get_available_json_backends()
+    if JSON_PARSE_BACKEND == "auto":
+        return available[0]
+    if JSON_PARSE_BACKEND in available:
+        return JSON_PARSE_BACKEND
+    logger.warning(LOG_MESSAGES['json_parse_backend_unavailable'].format(backend=JSON_PARSE_BACKEND, fallback=available[0]))
+    return available[0]
+
+def parse_json_bytes(raw_bytes, backend, file_name):
+    """
+    Разбор байтов выбранным парсером с откатом на стандартный json
+
+    orjson и simdjson строже json.loads (например, не принимают NaN / Infinity),
+    поэтому при ошибке разбора файл повторно разбирается стандартным json.
+
+    Args:
+        raw_bytes (bytes): Содержимое JSON
+        backend (str): Имя парсера из JSON_PARSE_BACKENDS
+        file_name (str): Имя файла (для лога)
+
+    Returns:
+        tuple: (разобранные данные, имя парсера, которым разобран файл)
     """
-    from datetime import datetime
-    import re
-    
     try:
-        if pd.isna(value) or value == '':
-            return ''
-        
-        # Преобразуем в строку и очищаем от лишних символов
-        value_str = str(value).strip()
-        
-        # Удаляем лишние пробелы, табы и другие символы
-        cleaned_value = re.sub(r'\s+', '', value_str)
-        
-        # Конвертируем формат в Python datetime format
-        python_input_format = input_format.replace('DD', '%d').replace('MM', '%m').replace('YY', '%y').replace('YYYY', '%Y')
-        
-        # Парсим дату
-        parsed_date = datetime.strptime(cleaned_value, python_input_format)
-        return parsed_date
-        
-    except Exception as e:
-        logger.warning(LOG_MESSAGES['date_conversion_error'].format(
-            column=column_name or 'unknown', 
-            value=str(value), 
-            error=str(e)
+        return JSON_PARSE_BACKENDS[backend]["function"](raw_bytes), backend
+    except ValueError as e:
+        if backend == "json":
+            raise
+        logger.warning(LOG_MESSAGES['json_parse_fallback'].format(backend=backend, file_name=file_name, error=e))
+        return parse_json_stdlib(raw_bytes), "json"
+
+def describe_json_shape(json_data):
+    """Краткое описание структуры выгрузки для бенчмарка: тип верхнего уровня и количество элементов"""
+    if isinstance(json_data, dict):
+        first_value = next(iter(json_data.values()), None)
+        return f"dict: {len(json_data)} ключей, значения {type(first_value).__name__}"
+    if isinstance(json_data, list):
+        return f"list: {len(json_data)} элементов"
+    return type(json_data).__name__
+
+def benchmark_json_backends(input_json_path, raw_bytes):
+    """
+    Разбор выгрузки всеми доступными парсерами с записью времени и скорости в лог
+
+    Args:
+        input_json_path (str): Путь к JSON файлу (для лога)
+        raw_bytes (bytes): Содержимое файла
+
+    Returns:
+        dict: {имя парсера: время разбора в секундах}
+    """
+    size_mb = len(raw_bytes) / (1024 * 1024)
+    file_name = os.path.basename(input_json_path)
+    timings = {}
+    shape = None
+    for name in reversed(get_available_json_backends()):
+        start_time = time.perf_counter()
+        json_data, used_backend = parse_json_bytes(raw_bytes, name, file_name)
+        if used_backend != name:
+            # Парсер не разобрал файл: его время не сравнимо с остальными
+            continue
+        timings[name] = time.perf_counter() - start_time
+        shape = shape or describe_json_shape(json_data)
+        del json_data
+
+    for name, seconds in timings.items():
+        logger.info(LOG_MESSAGES['json_parse_benchmark'].format(
+            file_name=file_name,
+            shape=shape,
+            backend=name,
+            seconds=seconds,
+            speed=size_mb / max(seconds, 1e-9),
+            speedup=timings["json"] / max(seconds, 1e-9)
         ))
-        return str(value)  # Возвращаем исходное значение если не удалось преобразовать
+    return timings
 
-def apply_column_settings(df, column_settings):
+# Значение поля photoData (base64 без кавычек и экранирования) для пропуска до разбора JSON
+PHOTO_DATA_VALUE_RE = re.compile(rb'("photoData"\s*:\s*)("[^"]*")')
+
+def read_json_without_photo_data(input_json_path, start=0, end=None):
     """
-    Применение настроек колонок к DataFrame
-    
+    Чтение выгрузки (или диапазона байтов) с пустыми значениями photoData
+
+    Файл отображается в память (mmap), значения photoData находятся по
+    PHOTO_DATA_VALUE_RE, и в буфер итогового размера копируются только участки
+    между ними: ни исходные байты, ни base64 не попадают в память процесса.
+
     Args:
-        df (pd.DataFrame): DataFrame для обработки
-        column_settings (dict): Настройки колонок
-        
+        input_json_path (str): Путь к JSON файлу
+        start (int): Начало диапазона (BOM в начале файла пропускается)
+        end (int, optional): Конец диапазона; None - до конца файла
+
     Returns:
-        pd.DataFrame: Обработанный DataFrame
+        tuple: (байты JSON, количество пропущенных байт base64)
     """
-    import pandas as pd
-    
-    df_result = df.copy()
+    with open(input_json_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        end = len(mapped) if end is None else end
+        if start == 0 and mapped[:3] == b'\xef\xbb\xbf':
+            start = 3
+        spans = [match.span(2) for match in PHOTO_DATA_VALUE_RE.finditer(mapped, start, end)]
+        stripped = sum(value_end - value_start - 2 for value_start, value_end in spans)
+        # BytesIO над единственной ссылкой на bytes пишет на месте, getvalue() возвращает буфер без копии
+        buffer = io.BytesIO(bytes(end - start - stripped))
+        position = start
+        with memoryview(mapped) as view:
+            for value_start, value_end in spans:
+                buffer.write(view[position:value_start])
+                buffer.write(b'""')
+                position = value_end
+            buffer.write(view[position:end])
+    return buffer.getvalue(), stripped
+
+def load_json_data(input_json_path, skip_photo_data=False):
+    """
+    Общая функция для загрузки JSON данных
     
-    # 1. Применяем преобразования типов данных перед фильтрацией колонок
+    Файл читается в байтах и разбирается парсером из JSON_PARSE_BACKENDS
+    (orjson / simdjson при наличии, иначе стандартный json).
     
-    # Преобразования в числовой формат
-    numeric_conversions = column_settings.get('numeric_conversions', {})
-    for group_name, group_settings in numeric_conversions.items():
-        fields = group_settings.get('fields', [])
-        conversion_type = group_settings.get('type', 'integer')
-        replace_original = group_settings.get('replace_original', True)
-        decimal_places = group_settings.get('decimal_places', 2)
+    Args:
+        input_json_path (str): Путь к входному JSON файлу
+        skip_photo_data (bool): Пропустить значения photoData (base64 не попадает в память после разбора)
         
-        logger.info(LOG_MESSAGES['group_conversion_start'].format(
-            group=group_name, 
-            type=conversion_type,
-            fields=fields
+    Returns:
+        dict: Загруженные JSON данные
+    """
+    try:
+        logger.info(LOG_MESSAGES['json_data_loading'])
+        logger.debug(f"Загружаем JSON файл: {input_json_path}")
+        if skip_photo_data:
+            raw_bytes, stripped = read_json_without_photo_data(input_json_path)
+            logger.info(LOG_MESSAGES['photo_data_skipped'].format(size=f"{stripped / (1024 * 1024):.2f}"))
+        else:
+            with open(input_json_path, 'rb') as f:
+                raw_bytes = f.read()
+            if raw_bytes.startswith(b'\xef\xbb\xbf'):
+                raw_bytes = raw_bytes[3:]
+        if JSON_PARSE_BENCHMARK:
+            benchmark_json_backends(input_json_path, raw_bytes)
+        
+        start_time = time.perf_counter()
+        json_data, backend = parse_json_bytes(raw_bytes, get_json_parse_backend(), os.path.basename(input_json_path))
+        seconds = time.perf_counter() - start_time
+        size_mb = len(raw_bytes) / (1024 * 1024)
+        logger.info(LOG_MESSAGES['json_parse_done'].format(
+            backend=backend, size=f"{size_mb:.2f}", seconds=seconds, speed=size_mb / max(seconds, 1e-9)
         ))
+        logger.debug(f"JSON загружен. Тип: {type(json_data)}, количество ключей: {len(json_data) if isinstance(json_data, dict) else 'не dict'}")
+        return json_data
+    except Exception as e:
+        logger.error(LOG_MESSAGES['json_load_error'].format(file_path=input_json_path, error=e))
+        return None
+
+# Объем начала файла для определения структуры выгрузки (sniff_json_structure)
+JSON_SNIFF_BYTES = 64 * 1024
+
+# Токены для отслеживания пути ключей в начале файла: строки, скобки, двоеточие
+JSON_SNIFF_TOKEN_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}:]')
+
+# Структуры выгрузок: путь от значения кода (турнира, награды, группы рейтинга) до первого массива
+# leaders/profiles ("[]" - элемент массива страниц) → (ключ конвертера, вариант структуры)
+JSON_STRUCTURE_SIGNATURES = {
+    ("[]", "body", "tournament", "leaders"): ("leaders_for_admin", "pages"),
+    ("[]", "body", "badge", "leaders"): ("reward_processing", "pages"),
+    ("badgeInfo", "leaders"): ("reward_processing", "badgeInfo"),
+    ("[]", "body", "badge", "profiles"): ("reward", "pages"),
+    ("profiles",): ("reward", "profiles"),
+    ("data", "body", "badge", "profiles"): ("reward", "data"),
+    ("data", "body", "profiles"): ("reward", "data"),
+    ("badge", "profiles"): ("reward", "dict"),
+    ("body", "badge", "profiles"): ("reward", "dict"),
+    ("[]", "body", "rating", "leaders"): ("rating_list", "pages"),
+    ("body", "rating", "leaders"): ("rating_list", "pages")
+}
+
+def sniff_json_structure(input_json_path, sniff_bytes=JSON_SNIFF_BYTES):
+    """
+    Определение структуры выгрузки по первым килобайтам файла без полного разбора
+
+    Отслеживается путь ключей до первого массива leaders или profiles;
+    путь от значения кода сравнивается с JSON_STRUCTURE_SIGNATURES.
+
+    Args:
+        input_json_path (str): Путь к JSON файлу
+        sniff_bytes (int): Сколько байт читать с начала файла
+
+    Returns:
+        tuple: (ключ конвертера, вариант структуры) или None, если структура не определена
+    """
+    with open(input_json_path, 'rb') as f:
+        head = f.read(sniff_bytes)
+
+    # Стек контейнеров: [скобка, метка пути, текущий ключ объекта]
+    stack = []
+    last_string = None
+    pending_key = None
+    for match in JSON_SNIFF_TOKEN_RE.finditer(head):
+        token = match.group()
+        if token.startswith(b'"'):
+            last_string = token
+            continue
+        if token == b':':
+            pending_key = stack[-1][2] = last_string[1:-1].decode('utf-8', 'replace') if stack else None
+            continue
+        if token in (b'{', b'['):
+            if pending_key in ("leaders", "profiles") and token == b'[':
+                path = [frame[1] for frame in stack[1:]] + [pending_key]
+                # В объекте верхнего уровня первый элемент пути - код (турнир, награда, группа рейтинга)
+                relative_path = tuple(path[1:] if stack[0][0] == b'{' else path)
+                return JSON_STRUCTURE_SIGNATURES.get(relative_path) or JSON_STRUCTURE_SIGNATURES.get(tuple(path))
+            label = stack[-1][2] if stack and stack[-1][0] == b'{' else "[]"
+            stack.append([token, label, None])
+        else:
+            if stack:
+                stack.pop()
+        pending_key = None
+    return None
+
+# Размер блока векторного сканирования JSON (байт): ограничивает память под маски и позиции
+JSON_SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+
+def find_unescaped_quotes(data, block, offset):
+    """
+    Позиции кавычек блока, не экранированных обратной косой чертой
+
+    Args:
+        data (numpy.ndarray): Содержимое JSON файла (uint8)
+        block (numpy.ndarray): Байты блока (срез data)
+        offset (int): Смещение блока в файле
+
+    Returns:
+        numpy.ndarray: Позиции кавычек внутри блока
+    """
+    quotes = np.flatnonzero(block == 34)
+    previous = quotes + offset - 1
+    candidates = quotes[(previous >= 0) & (data[np.maximum(previous, 0)] == 92)]
+    if not len(candidates):
+        return quotes
+    escaped = []
+    for position in candidates.tolist():
+        # Кавычка экранирована при нечетном числе обратных косых черт перед ней
+        index = position + offset - 1
+        slashes = 0
+        while index >= 0 and data[index] == 92:
+            slashes += 1
+            index -= 1
+        if slashes % 2:
+            escaped.append(position)
+    return np.setdiff1d(quotes, escaped, assume_unique=True) if escaped else quotes
+
+def scan_json_top_level_members(raw_bytes):
+    """
+    Поиск границ членов объекта верхнего уровня по глубине скобок с учетом строк
+
+    Кавычки и скобки ищутся векторно (numpy) блоками по JSON_SCAN_BLOCK_SIZE;
+    скобка внутри строки определяется по четности числа кавычек перед ней,
+    глубина - накопленной суммой. Цикл Python проходит только по редким
+    кавычкам после обратной косой черты.
+
+    Args:
+        raw_bytes (bytes | mmap.mmap): Содержимое JSON файла
+
+    Returns:
+        tuple: (начало тела объекта, позиция закрывающей скобки, список концов членов
+            со значением-контейнером) или None, если верхний уровень не объект
+    """
+    total_size = len(raw_bytes)
+    body_start = len(raw_bytes[:1024]) - len(raw_bytes[:1024].lstrip())
+    if body_start >= total_size or raw_bytes[body_start] != 123:
+        return None
+    body_start += 1
+    data = np.frombuffer(raw_bytes, dtype=np.uint8)
+    depth = 1
+    in_string = False
+    member_ends = []
+    for offset in range(body_start, total_size, JSON_SCAN_BLOCK_SIZE):
+        block = data[offset:offset + JSON_SCAN_BLOCK_SIZE]
+        quotes = find_unescaped_quotes(data, block, offset)
+        brackets = np.flatnonzero((block == 123) | (block == 125) | (block == 91) | (block == 93))
+        outside = (np.searchsorted(quotes, brackets) + in_string) % 2 == 0
+        brackets = brackets[outside]
+        if len(quotes) % 2:
+            in_string = not in_string
+        if not len(brackets):
+            continue
+        kinds = block[brackets]
+        depths = depth + np.cumsum(np.where((kinds == 123) | (kinds == 91), 1, -1))
+        closed = np.flatnonzero(depths <= 0)
+        last = closed[0] if len(closed) else len(depths)
+        # Глубина 1 после скобки возможна только после закрытия значения члена объекта
+        member_ends.extend((brackets[:last][depths[:last] == 1] + offset + 1).tolist())
+        if len(closed):
+            return body_start, int(brackets[last]) + offset, member_ends
+        depth = int(depths[-1])
+    return None
+
+def split_json_member_ranges(body_start, body_end, member_ends, chunks):
+    """
+    Группировка членов объекта в диапазоны байтов примерно равного размера
+
+    Args:
+        body_start (int): Начало тела объекта (после открывающей скобки)
+        body_end (int): Позиция закрывающей скобки объекта
+        member_ends (list): Концы членов объекта (см. scan_json_top_level_members)
+        chunks (int): Желаемое количество диапазонов
+
+    Returns:
+        list: Диапазоны [(start, end)], покрывающие тело объекта без пропусков
+    """
+    target_size = max(1, (body_end - body_start) // max(1, chunks))
+    ranges = []
+    start = body_start
+    for member_end in member_ends:
+        if member_end - start >= target_size:
+            ranges.append((start, member_end))
+            start = member_end
+    if ranges and body_end - start < target_size // 2:
+        ranges[-1] = (ranges[-1][0], body_end)
+    else:
+        ranges.append((start, body_end))
+    return ranges
+
+def extract_json_chunk(task):
+    """
+    Разбор диапазона членов объекта и извлечение строк (выполняется в процессах пула)
+
+    Args:
+        task (dict): {"path", "start", "end", "backend", "skip_photo_data", "extractor", "options"}
+
+    Returns:
+        dict: Результат extractor, строки "rows" преобразованы в DataFrame
+    """
+    global logger
+    if logger is None:
+        logger = logging.getLogger('GameScriptGenerator')
+    if task["skip_photo_data"]:
+        raw_bytes, _ = read_json_without_photo_data(task["path"], task["start"], task["end"])
+    else:
+        with open(task["path"], 'rb') as f:
+            f.seek(task["start"])
+            raw_bytes = f.read(task["end"] - task["start"])
+    json_data, _ = parse_json_bytes(b'{' + raw_bytes.strip(b' \t\r\n,') + b'}', task["backend"], os.path.basename(task["path"]))
+    result = task["extractor"](json_data, **task["options"])
+    result["rows"] = pd.DataFrame(result["rows"])
+    return result
+
+def extract_json_in_parallel(input_json_path, config_key, extractor, **options):
+    """
+    Параллельный разбор и преобразование выгрузки {ключ: [страницы]} по диапазонам ключей
+
+    Файл сканируется один раз (глубина скобок и состояние строк), члены объекта
+    верхнего уровня группируются в диапазоны байтов, каждый диапазон разбирается
+    и преобразуется extractor в отдельном процессе. Результаты объединяются в
+    исходном порядке ключей: DataFrame - конкатенацией, списки - слиянием,
+    счетчики - суммированием.
+
+    Args:
+        input_json_path (str): Путь к JSON файлу
+        config_key (str): Ключ конфигурации (настройки parallel_json)
+        extractor (callable): Функция extractor(json_data, **options) → {"rows": [...], ...}
+        **options: Параметры extractor
+
+    Returns:
+        dict: Объединенный результат extractor или None, если параллельный разбор
+            выключен или неприменим (маленький файл, верхний уровень не объект)
+    """
+    _, processing_config = get_processing_config(config_key)
+    parallel_config = processing_config.get("parallel_json", {})
+    workers = parallel_config.get("workers", 4)
+    file_size = os.path.getsize(input_json_path)
+    if not parallel_config.get("enabled") or workers < 2 or file_size < parallel_config.get("min_size_mb", 100) * 1024 * 1024:
+        return None
+
+    start_time = time.perf_counter()
+    with open(input_json_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as raw_bytes:
+        scan = scan_json_top_level_members(raw_bytes)
+    if scan is None:
+        return None
+    body_start, body_end, member_ends = scan
+    ranges = split_json_member_ranges(body_start, body_end, member_ends, workers * 4)
+    if len(ranges) < 2:
+        return None
+
+    file_name = os.path.basename(input_json_path)
+    logger.info(LOG_MESSAGES['json_parallel_start'].format(
+        file_name=file_name, size=f"{file_size / (1024 * 1024):.2f}", members=len(member_ends),
+        chunks=len(ranges), workers=workers, seconds=time.perf_counter() - start_time
+    ))
+    backend = get_json_parse_backend()
+    skip_photo_data = get_photo_data_mode(config_key) == "skip"
+    tasks = [
+        {
+            "path": input_json_path, "start": start, "end": end, "backend": backend,
+            "skip_photo_data": skip_photo_data, "extractor": extractor, "options": options
+        }
+        for start, end in ranges
+    ]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(extract_json_chunk, tasks))
+
+    merged = {}
+    for key, value in results[0].items():
+        parts = [result[key] for result in results]
+        if isinstance(value, pd.DataFrame):
+            merged[key] = pd.concat(parts, ignore_index=True, sort=False)
+        elif isinstance(value, list):
+            merged[key] = [item for part in parts for item in part]
+        else:
+            merged[key] = sum(parts)
+    logger.info(LOG_MESSAGES['json_parallel_done'].format(
+        file_name=file_name, rows=len(merged["rows"]), seconds=time.perf_counter() - start_time
+    ))
+    return merged
+
+# Сигнатуры форматов изображений для расширения файлов photoData
+PHOTO_FILE_SIGNATURES = [
+    (b'\x89PNG', ".png"),
+    (b'\xff\xd8\xff', ".jpg"),
+    (b'GIF8', ".gif"),
+    (b'RIFF', ".webp"),
+    (b'BM', ".bmp")
+]
+
+def get_photo_data_mode(config_key):
+    """
+    Режим обработки photoData из настроек photo_data (*_processing)
+
+    Returns:
+        str: "keep" - оставить base64 в строках, "skip" - пропустить при разборе,
+            "files" - сохранить изображения в файлы и оставить ссылку photoHash
+    """
+    _, processing_config = get_processing_config(config_key)
+    return processing_config.get("photo_data", {}).get("mode", "keep")
+
+def save_photo_file(photo_value, photos_dir):
+    """
+    Декодирование одного значения photoData и запись в файл с именем по хешу содержимого
+
+    Одинаковые изображения записываются один раз (файл с тем же хешем уже существует).
+
+    Args:
+        photo_value: Значение photoData (base64, возможно с префиксом data:image/...;base64,)
+        photos_dir (str): Папка для файлов изображений
+
+    Returns:
+        str: Хеш содержимого (имя файла без расширения) или пустая строка
+    """
+    if not isinstance(photo_value, str) or not photo_value:
+        return ""
+    try:
+        content = base64.b64decode(photo_value.rpartition(',')[2])
+    except (binascii.Error, ValueError):
+        return ""
+    if not content:
+        return ""
+    photo_hash = hashlib.sha256(content).hexdigest()[:20]
+    extension = next((ext for signature, ext in PHOTO_FILE_SIGNATURES if content.startswith(signature)), ".bin")
+    photo_path = os.path.join(photos_dir, photo_hash + extension)
+    if not os.path.exists(photo_path):
+        temp_path = f"{photo_path}.{os.getpid()}.{id(content)}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, photo_path)
+    return photo_hash
+
+def export_photo_data(df, config_key):
+    """
+    Вынос photoData из DataFrame в файлы изображений (режим photo_data.mode = "files")
+
+    Уникальные значения декодируются в пуле потоков и сохраняются в OUTPUT/<directory>
+    под именами по хешу содержимого; колонка photoData заменяется колонкой photoHash
+    на той же позиции.
+
+    Args:
+        df (pd.DataFrame): Данные с колонкой photoData
+        config_key (str): Ключ конфигурации (настройки photo_data)
+
+    Returns:
+        pd.DataFrame: Данные с колонкой photoHash вместо photoData
+    """
+    if "photoData" not in df.columns or get_photo_data_mode(config_key) != "files":
+        return df
+
+    _, processing_config = get_processing_config(config_key)
+    photo_config = processing_config.get("photo_data", {})
+    photos_dir = os.path.join(BASE_DIR, SUBDIRECTORIES["OUTPUT"], photo_config.get("directory", "photos"))
+    os.makedirs(photos_dir, exist_ok=True)
+
+    start_time = time.perf_counter()
+    photo_values = [value for value in pd.unique(df["photoData"]) if isinstance(value, str) and value]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=photo_config.get("workers", 4)) as executor:
+        photo_hashes = dict(zip(photo_values, executor.map(lambda value: save_photo_file(value, photos_dir), photo_values)))
+
+    position = df.columns.get_loc("photoData")
+    photo_column = df.pop("photoData").map(photo_hashes).fillna("")
+    df.insert(position, "photoHash", photo_column)
+    logger.info(LOG_MESSAGES['photo_data_exported'].format(
+        values=len(photo_values), files=len(set(photo_hashes.values()) - {""}),
+        directory=photos_dir, seconds=time.perf_counter() - start_time
+    ))
+    return df
+
+@measure_time
+def convert_to_integer(value, column_name=None):
+    """
+    Преобразование значения в целое число с очисткой от лишних символов
+    
+    Args:
+        value: Значение для преобразования
+        column_name (str, optional): Имя колонки для логирования
         
-        for column in fields:
-            if column in df_result.columns:
-                try:
-                    logger.info(LOG_MESSAGES['column_conversion_start'].format(
-                        column=column, 
-                        type=conversion_type
-                    ))
-                    
-                    if conversion_type == 'integer':
-                        # Преобразуем в целое число
-                        new_values = df_result[column].apply(lambda x: convert_to_integer(x, column))
-                    elif conversion_type == 'float':
-                        # Преобразуем в дробное число
-                        new_values = df_result[column].apply(lambda x: convert_to_float(x, decimal_places, column))
-                    
-                    if replace_original:
-                        df_result[column] = new_values
-                        logger.info(LOG_MESSAGES['column_conversion_success'].format(
-                            column=column, 
-                            type=conversion_type, 
-                            action="заменено"
-                        ))
-                    else:
-                        new_column_name = f"{column}_numeric"
-                        df_result[new_column_name] = new_values
-                        logger.info(LOG_MESSAGES['column_conversion_success'].format(
-                            column=column, 
-                            type=conversion_type, 
-                            action=f"создано новое поле {new_column_name}"
-                        ))
-                        
-                except Exception as e:
-                    logger.error(LOG_MESSAGES['column_conversion_failed'].format(
-                        column=column, 
-                        type=conversion_type, 
-                        error=str(e)
-                    ))
-            else:
-                logger.warning(LOG_MESSAGES['column_not_found'].format(
-                    column=column,
-                    group=group_name
-                ))
-        
-        logger.info(LOG_MESSAGES['group_conversion_completed'].format(
-            group=group_name,
-            processed=len([col for col in fields if col in df_result.columns])
-        ))
+    Returns:
+        int: Преобразованное целое число или 0 при ошибке
+    """
+    import re
     
-    # Преобразования дат
-    date_conversions = column_settings.get('date_conversions', {})
-    for column, settings in date_conversions.items():
-        if column in df_result.columns:
-            input_format = settings.get('input_format', 'DD.MM.YY')
-            replace_original = settings.get('replace_original', True)
-            
-            try:
-                logger.info(LOG_MESSAGES['column_conversion_start'].format(
-                    column=column, 
-                    type="date"
-                ))
-                
-                new_values = df_result[column].apply(lambda x: convert_to_date(x, input_format, column))
-                
-                if replace_original:
-                    df_result[column] = new_values
-                    logger.info(LOG_MESSAGES['column_conversion_success'].format(
-                        column=column, 
-                        type="date", 
-                        action="заменено"
-                    ))
-                else:
-                    new_column_name = f"{column}_formatted"
-                    df_result[new_column_name] = new_values
-                    logger.info(LOG_MESSAGES['column_conversion_success'].format(
-                        column=column, 
-                        type="date", 
-                        action=f"создано новое поле {new_column_name}"
-                    ))
-                    
-            except Exception as e:
-                logger.error(LOG_MESSAGES['column_conversion_failed'].format(
-                    column=column, 
-                    type="date", 
-                    error=str(e)
-                ))
+    try:
+        if pd.isna(value) or value == '':
+            return 0
+        
+        # Преобразуем в строку и очищаем от лишних символов
+        value_str = str(value).strip()
+        
+        # Удаляем все символы кроме цифр, точки, запятой и минуса
+        cleaned_value = re.sub(r'[^\d.,\-]', '', value_str)
+        
+        # Заменяем запятую на точку для корректного парсинга
+        cleaned_value = cleaned_value.replace(',', '.')
+        
+        # Удаляем лишние точки (оставляем только первую)
+        if cleaned_value.count('.') > 1:
+            parts = cleaned_value.split('.')
+            cleaned_value = parts[0] + '.' + ''.join(parts[1:])
+        
+        # Преобразуем в число и округляем до целого
+        numeric_value = float(cleaned_value)
+        return int(numeric_value)
+        
+    except Exception as e:
+        context = f" для колонки {column_name}" if column_name else ""
+        logger.warning(LOG_MESSAGES['numeric_conversion_error'].format(
+            column=column_name or 'unknown', 
+            value=str(value), 
+            error=str(e)
+        ))
+        return 0
+
+@measure_time
+def convert_to_float(value, decimal_places=2, column_name=None):
+    """
+    Преобразование значения в дробное число с очисткой от лишних символов
     
-    # 2. Фильтрация колонок
-    columns_to_keep = column_settings.get('columns_to_keep', [])
-    columns_to_remove = column_settings.get('columns_to_remove', [])
+    Args:
+        value: Значение для преобразования
+        decimal_places (int): Количество знаков после запятой
+        column_name (str, optional): Имя колонки для логирования
+        
+    Returns:
+        float: Преобразованное дробное число или 0.0 при ошибке
+    """
+    import re
     
-    # Если указаны колонки для сохранения, оставляем только их
-    if columns_to_keep:
-        # Оставляем только указанные колонки (если они существуют)
-        existing_columns_to_keep = [col for col in columns_to_keep if col in df_result.columns]
-        df_result = df_result[existing_columns_to_keep]
-        logger.info(LOG_MESSAGES['columns_filtered'].format(
-            action="оставлены", 
-            count=len(existing_columns_to_keep), 
-            columns=existing_columns_to_keep
+    try:
+        if pd.isna(value) or value == '':
+            return 0.0
+        
+        # Преобразуем в строку и очищаем от лишних символов
+        value_str = str(value).strip()
+        
+        # Удаляем все символы кроме цифр, точки, запятой и минуса
+        cleaned_value = re.sub(r'[^\d.,\-]', '', value_str)
+        
+        # Заменяем запятую на точку для корректного парсинга
+        cleaned_value = cleaned_value.replace(',', '.')
+        
+        # Удаляем лишние точки (оставляем только первую)
+        if cleaned_value.count('.') > 1:
+            parts = cleaned_value.split('.')
+            cleaned_value = parts[0] + '.' + ''.join(parts[1:])
+        
+        # Преобразуем в число и округляем
+        numeric_value = float(cleaned_value)
+        return round(numeric_value, decimal_places)
+        
+    except Exception as e:
+        context = f" для колонки {column_name}" if column_name else ""
+        logger.warning(LOG_MESSAGES['numeric_conversion_error'].format(
+            column=column_name or 'unknown', 
+            value=str(value), 
+            error=str(e)
         ))
+        return 0.0
+
+@measure_time
+def convert_to_date(value, input_format='DD.MM.YY', column_name=None):
+    """
+    Преобразование значения в дату с очисткой от лишних символов
     
-    # Удаляем ненужные колонки
-    if columns_to_remove:
-        columns_to_drop = [col for col in columns_to_remove if col in df_result.columns]
-        df_result = df_result.drop(columns=columns_to_drop)
-        logger.info(LOG_MESSAGES['columns_filtered'].format(
+    Args:
+        value: Значение для преобразования
+        input_format (str): Входной формат даты
+        column_name (str, optional): Имя колонки для логирования
+        
+    Returns:
+        datetime: Преобразованная дата или исходное значение при ошибке
+    """
+    from datetime import datetime
+    import re
+    
+    try:
+        if pd.isna(value) or value == '':
+            return ''
+        
+        # Преобразуем в строку и очищаем от лишних символов
+        value_str = str(value).strip()
+        
+        # Удаляем лишние пробелы, табы и другие символы
+        cleaned_value = re.sub(r'\s+', '', value_str)
+        
+        # Конвертируем формат в Python datetime format
+        python_input_format = input_format.replace('DD', '%d').replace('MM', '%m').replace('YY', '%y').replace('YYYY', '%Y')
+        
+        # Парсим дату
+        parsed_date = datetime.strptime(cleaned_value, python_input_format)
+        return parsed_date
+        
+    except Exception as e:
+        logger.warning(LOG_MESSAGES['date_conversion_error'].format(
+            column=column_name or 'unknown', 
+            value=str(value), 
+            error=str(e)
+        ))
+        return str(value)  # Возвращаем исходное значение если не удалось преобразовать
+
+def clean_number_text_polars(text):
+    """Очистка текста числа выражениями Polars (как в convert_to_integer / convert_to_float)"""
+    import polars as pl
+
+    cleaned = text.str.strip_chars().str.replace_all(r"[^\d.,\-]", "").str.replace_all(",", ".", literal=True)
+    parts = cleaned.str.splitn(".", 2)
+    collapsed = parts.struct.field("field_0") + "." + parts.struct.field("field_1").str.replace_all(".", "", literal=True)
+    return pl.select(
+        pl.when(cleaned.str.count_matches(".", literal=True) > 1).then(collapsed).otherwise(cleaned)
+    ).to_series()
+
+def convert_numeric_series_polars(series, conversion_type='integer', decimal_places=2):
+    """
+    Преобразование колонки в число выражениями Polars (DATAFRAME_BACKEND = "polars")
+
+    Колонка факторизуется, очищается и разбирается только список уникальных
+    значений; результат совпадает с convert_to_integer / convert_to_float.
+
+    Args:
+        series (pd.Series): Исходная колонка
+        conversion_type (str): 'integer' или 'float'
+        decimal_places (int): Знаков после запятой для 'float'
+
+    Returns:
+        pd.Series: int64 или float64 колонка с тем же индексом
+    """
+    import polars as pl
+
+    codes, uniques = pd.factorize(series, sort=False)
+    text = pl.Series([str(value).strip() for value in uniques], dtype=pl.Utf8)
+    numbers = clean_number_text_polars(text).cast(pl.Float64, strict=False)
+    if conversion_type == 'integer':
+        converted = numbers.cast(pl.Int64, strict=False).fill_null(0).to_numpy()
+        missing = 0
+    else:
+        converted = np.array([round(value, decimal_places) for value in numbers.fill_null(0.0).to_list()], dtype=np.float64)
+        missing = 0.0
+    # Пустая строка и пропуски → 0 (как pd.isna(value) or value == '')
+    values = np.where(codes >= 0, converted[np.maximum(codes, 0)] if len(converted) else missing, missing)
+    return pd.Series(values, index=series.index, dtype=np.int64 if conversion_type == 'integer' else np.float64)
+
+def convert_date_series_polars(series, input_format='DD.MM.YY', column_name=None):
+    """
+    Преобразование колонки в даты выражениями Polars (DATAFRAME_BACKEND = "polars")
+
+    Уникальные значения разбираются str.strptime; нераспознанные значения
+    передаются в convert_to_date (исходный текст и предупреждение в логе).
+
+    Returns:
+        pd.Series: Колонка дат с тем же индексом
+    """
+    import polars as pl
+
+    python_input_format = input_format.replace('DD', '%d').replace('MM', '%m').replace('YY', '%y').replace('YYYY', '%Y')
+    codes, uniques = pd.factorize(series, sort=False)
+    text = pl.Series([str(value).strip() for value in uniques], dtype=pl.Utf8)
+    parsed = text.str.replace_all(r"\s+", "").str.strptime(pl.Datetime, python_input_format, strict=False).to_list()
+    converted = [
+        value if value is not None else ('' if unique == '' else convert_to_date(unique, input_format, column_name))
+        for unique, value in zip(uniques, parsed)
+    ]
+    converted.append('')
+    return pd.Series([converted[code] for code in codes], index=series.index)
+
+def get_smallest_numeric_dtype(values):
+    """
+    Минимальный nullable тип pandas для числовых значений без потери точности
+
+    Args:
+        values (pd.Series): Числовые значения (float64, пропуски = NaN)
+
+    Returns:
+        str: Имя типа (Int8/Int16/Int32/Int64, Float32 или Float64)
+    """
+    present = values.dropna()
+    if present.empty:
+        return "Int8"
+    if (present == np.floor(present)).all():
+        min_value, max_value = present.min(), present.max()
+        for dtype in ("Int8", "Int16", "Int32", "Int64"):
+            info = np.iinfo(dtype.lower())
+            if info.min <= min_value and max_value <= info.max:
+                return dtype
+    if (present.astype(np.float32).astype(np.float64) == present).all():
+        return "Float32"
+    return "Float64"
+
+def plan_dataframe_dtypes(df, settings=None):
+    """
+    Планирование типов данных колонок DataFrame для экономии памяти
+
+    Колонки object с числами Python (int/float, например *_groupId) переводятся
+    в минимальный nullable Int/Float, пустые строки становятся пропусками.
+    Строковые колонки с малым количеством уникальных значений (terDivisionName,
+    businessBlock, rating_timePeriod и т.п.) переводятся в category. Строки вида
+    чисел остаются строками, чтобы тип ячеек в Excel не менялся.
+
+    Args:
+        df (pd.DataFrame): DataFrame после разворачивания JSON
+        settings (dict, optional): Настройки (по умолчанию DTYPE_PLANNER_SETTINGS)
+
+    Returns:
+        pd.DataFrame: DataFrame с новыми типами колонок
+    """
+    settings = settings or DTYPE_PLANNER_SETTINGS
+    if not settings.get("enabled", True) or df.empty:
+        return df
+
+    memory_before = df.memory_usage(deep=True).sum()
+    max_unique_ratio = settings.get("category_max_unique_ratio", 0.5)
+    min_rows = settings.get("category_min_rows", 100)
+    changed = 0
+
+    for column in df.columns:
+        series = df[column]
+        if series.dtype != object and not isinstance(series.dtype, pd.StringDtype):
+            continue
+
+        new_dtype = None
+        if settings.get("numeric_downcast", True) and series.dtype == object:
+            blank = series.isna() | series.eq('')
+            present = series[~blank]
+            kind = pd.api.types.infer_dtype(present, skipna=True)
+            if kind in ("integer", "floating", "mixed-integer-float") and not present.empty:
+                values = pd.to_numeric(series.where(~blank), errors='coerce').astype(np.float64)
+                new_dtype = get_smallest_numeric_dtype(values)
+                df[column] = values.astype(new_dtype)
+
+        if new_dtype is None and len(series) >= min_rows:
+            unique_count = series.nunique(dropna=False)
+            if unique_count <= len(series) * max_unique_ratio:
+                new_dtype = "category"
+                # Категории в порядке появления: value_counts и сводки сохраняют прежний порядок
+                df[column] = series.astype(pd.CategoricalDtype(series.dropna().unique()))
+
+        if new_dtype:
+            changed += 1
+            logger.debug(LOG_MESSAGES['dtype_planning_column'].format(column=column, dtype=new_dtype))
+
+    memory_after = df.memory_usage(deep=True).sum()
+    logger.info(LOG_MESSAGES['dtype_planning_completed'].format(
+        count=changed,
+        before=memory_before / (1024 * 1024),
+        after=memory_after / (1024 * 1024),
+        saved=(memory_before - memory_after) / (1024 * 1024)
+    ))
+    return df
+
+def apply_column_settings(df, column_settings):
+    """
+    Применение настроек колонок к DataFrame
+    
+    Args:
+        df (pd.DataFrame): DataFrame для обработки
+        column_settings (dict): Настройки колонок
+        
+    Returns:
+        pd.DataFrame: Обработанный DataFrame
+    """
+    import pandas as pd
+    
+    df_result = df.copy()
+    
+    # 1. Применяем преобразования типов данных перед фильтрацией колонок
+    
+    # Преобразования в числовой формат
+    numeric_conversions = column_settings.get('numeric_conversions', {})
+    for group_name, group_settings in numeric_conversions.items():
+        fields = group_settings.get('fields', [])
+        conversion_type = group_settings.get('type', 'integer')
+        replace_original = group_settings.get('replace_original', True)
+        decimal_places = group_settings.get('decimal_places', 2)
+        
+        logger.info(LOG_MESSAGES['group_conversion_start'].format(
+            group=group_name, 
+            type=conversion_type,
+            fields=fields
+        ))
+        
+        for column in fields:
+            if column in df_result.columns:
+                try:
+                    logger.info(LOG_MESSAGES['column_conversion_start'].format(
+                        column=column, 
+                        type=conversion_type
+                    ))
+                    
+                    if get_dataframe_backend() == "polars":
+                        # Векторное преобразование уникальных значений выражениями Polars
+                        new_values = convert_numeric_series_polars(df_result[column], conversion_type, decimal_places)
+                    elif conversion_type == 'integer':
+                        # Преобразуем в целое число
+                        new_values = df_result[column].apply(lambda x: convert_to_integer(x, column))
+                    elif conversion_type == 'float':
+                        # Преобразуем в дробное число
+                        new_values = df_result[column].apply(lambda x: convert_to_float(x, decimal_places, column))
+                    
+                    # Для category преобразование выполняется по категориям, результат - обычная колонка
+                    if isinstance(new_values.dtype, pd.CategoricalDtype):
+                        new_values = new_values.astype(new_values.cat.categories.dtype)
+                    
+                    if replace_original:
+                        df_result[column] = new_values
+                        logger.info(LOG_MESSAGES['column_conversion_success'].format(
+                            column=column, 
+                            type=conversion_type, 
+                            action="заменено"
+                        ))
+                    else:
+                        new_column_name = f"{column}_numeric"
+                        df_result[new_column_name] = new_values
+                        logger.info(LOG_MESSAGES['column_conversion_success'].format(
+                            column=column, 
+                            type=conversion_type, 
+                            action=f"создано новое поле {new_column_name}"
+                        ))
+                        
+                except Exception as e:
+                    logger.error(LOG_MESSAGES['column_conversion_failed'].format(
+                        column=column, 
+                        type=conversion_type, 
+                        error=str(e)
+                    ))
+            else:
+                logger.warning(LOG_MESSAGES['column_not_found'].format(
+                    column=column,
+                    group=group_name
+                ))
+        
+        logger.info(LOG_MESSAGES['group_conversion_completed'].format(
+            group=group_name,
+            processed=len([col for col in fields if col in df_result.columns])
+        ))
+    
+    # Преобразования дат
+    date_conversions = column_settings.get('date_conversions', {})
+    for column, settings in date_conversions.items():
+        if column in df_result.columns:
+            input_format = settings.get('input_format', 'DD.MM.YY')
+            replace_original = settings.get('replace_original', True)
+            
+            try:
+                logger.info(LOG_MESSAGES['column_conversion_start'].format(
+                    column=column, 
+                    type="date"
+                ))
+                
+                if get_dataframe_backend() == "polars":
+                    new_values = convert_date_series_polars(df_result[column], input_format, column)
+                else:
+                    new_values = df_result[column].apply(lambda x: convert_to_date(x, input_format, column))
+                if isinstance(new_values.dtype, pd.CategoricalDtype):
+                    new_values = new_values.astype(object)
+                
+                if replace_original:
+                    df_result[column] = new_values
+                    logger.info(LOG_MESSAGES['column_conversion_success'].format(
+                        column=column, 
+                        type="date", 
+                        action="заменено"
+                    ))
+                else:
+                    new_column_name = f"{column}_formatted"
+                    df_result[new_column_name] = new_values
+                    logger.info(LOG_MESSAGES['column_conversion_success'].format(
+                        column=column, 
+                        type="date", 
+                        action=f"создано новое поле {new_column_name}"
+                    ))
+                    
+            except Exception as e:
+                logger.error(LOG_MESSAGES['column_conversion_failed'].format(
+                    column=column, 
+                    type="date", 
+                    error=str(e)
+                ))
+    
+    # 2. Фильтрация колонок
+    columns_to_keep = column_settings.get('columns_to_keep', [])
+    columns_to_remove = column_settings.get('columns_to_remove', [])
+    
+    # Если указаны колонки для сохранения, оставляем только их
+    if columns_to_keep:
+        # Оставляем только указанные колонки (если они существуют)
+        existing_columns_to_keep = [col for col in columns_to_keep if col in df_result.columns]
+        df_result = df_result[existing_columns_to_keep]
+        logger.info(LOG_MESSAGES['columns_filtered'].format(
+            action="оставлены", 
+            count=len(existing_columns_to_keep), 
+            columns=existing_columns_to_keep
+        ))
+    
+    # Удаляем ненужные колонки
+    if columns_to_remove:
+        columns_to_drop = [col for col in columns_to_remove if col in df_result.columns]
+        df_result = df_result.drop(columns=columns_to_drop)
+        logger.info(LOG_MESSAGES['columns_filtered'].format(
             action="удалены", 
             count=len(columns_to_drop), 
             columns=columns_to_drop
         ))
-    
-    return df_result
+    
+    return df_result
+
+def get_conditional_formatting_rules(df):
+    """
+    Правила условного форматирования листа данных (EXCEL_CONDITIONAL_FORMATTING)
+
+    Выделение мест 1..top_n и цветовые шкалы задаются на диапазон колонки,
+    чередование строк - одним правилом-формулой на весь лист. Правила
+    добавляются по убыванию приоритета: выделение, шкалы, чередование.
+
+    Args:
+        df (pd.DataFrame): Данные листа (заголовок в строке 1)
+
+    Returns:
+        list: [(диапазон, правило openpyxl)]
+    """
+    settings = EXCEL_CONDITIONAL_FORMATTING
+    if not settings.get("enabled") or len(df) == 0:
+        return []
+    last_row = len(df) + 1
+
+    def column_range(column):
+        letter = get_column_letter(df.columns.get_loc(column) + 1)
+        return f"{letter}2:{letter}{last_row}"
+
+    rules = []
+    top_n = settings.get("top_n", 0)
+    suffixes = tuple(settings.get("top_n_suffixes", []))
+    if top_n and suffixes:
+        highlight_fill = PatternFill(start_color=EXCEL_COLORS["highlight"], end_color=EXCEL_COLORS["highlight"], fill_type="solid")
+        for column in df.columns:
+            if str(column).endswith(suffixes):
+                rules.append((column_range(column), CellIsRule(
+                    operator="between", formula=["1", str(top_n)], fill=highlight_fill, font=Font(bold=True)
+                )))
+    for column in settings.get("color_scale_columns", []):
+        if column in df.columns and pd.api.types.is_numeric_dtype(df[column]):
+            rules.append((column_range(column), ColorScaleRule(
+                start_type="min", start_color=EXCEL_COLORS["scale_low"],
+                mid_type="percentile", mid_value=50, mid_color=EXCEL_COLORS["scale_mid"],
+                end_type="max", end_color=EXCEL_COLORS["scale_high"]
+            )))
+    if settings.get("row_banding"):
+        alternate_fill = PatternFill(start_color=EXCEL_COLORS["alternate"], end_color=EXCEL_COLORS["alternate"], fill_type="solid")
+        rules.append((f"A2:{get_column_letter(len(df.columns))}{last_row}", FormulaRule(formula=["MOD(ROW(),2)=0"], fill=alternate_fill)))
+    return rules
+
+def apply_conditional_formatting(worksheet, df):
+    """
+    Добавление правил условного форматирования на лист openpyxl (обычный или write_only)
+
+    Returns:
+        int: Количество добавленных правил
+    """
+    rules = get_conditional_formatting_rules(df)
+    for cell_range, rule in rules:
+        worksheet.conditional_formatting.add(cell_range, rule)
+    return len(rules)
+
+def build_conditional_formatting_xml(rules, styles):
+    """
+    XML условного форматирования для листа, собираемого из частей (save_excel_parallel)
+
+    Оформление правил регистрируется в styles["dxfs"] (раздел dxfs в xl/styles.xml).
+
+    Args:
+        rules (list): [(диапазон, правило)] из get_conditional_formatting_rules
+        styles (dict): Таблица стилей книги
+
+    Returns:
+        str: Элементы conditionalFormatting
+    """
+    formatting = ConditionalFormattingList()
+    for cell_range, rule in rules:
+        formatting.add(cell_range, rule)
+    xml = ""
+    for cell_formatting in formatting:
+        for rule in cell_formatting.rules:
+            if rule.dxf:
+                dxf = tostring(rule.dxf.to_tree()).decode("utf-8")
+                if dxf not in styles["dxfs"]:
+                    styles["dxfs"].append(dxf)
+                rule.dxfId = styles["dxfs"].index(dxf)
+        xml += tostring(cell_formatting.to_tree()).decode("utf-8")
+    return xml
+
+def apply_cell_formatting(workbook, df, config_key=None):
+    """
+    Применение форматирования ячеек в Excel
+    
+    Args:
+        workbook: Объект рабочей книги Excel
+        df (DataFrame): DataFrame с данными
+        config_key (str, optional): Ключ конфигурации для получения настроек
+    """
+    from openpyxl.styles import NamedStyle
+    from openpyxl.utils import get_column_letter
+    
+    try:
+        # Получаем настройки форматирования из конфигурации
+        column_settings = {}
+        if config_key and config_key in FUNCTION_CONFIGS:
+            config = FUNCTION_CONFIGS[config_key]
+            if config_key == "reward" and "reward_processing" in config:
+                column_settings = config["reward_processing"].get("column_settings", {})
+            elif config_key == "leaders_for_admin" and "leaders_processing" in config:
+                column_settings = config["leaders_processing"].get("column_settings", {})
+        
+        if not column_settings:
+            return
+        
+        # Получаем лист DATA
+        worksheet = workbook['DATA']
+        
+        # Создаем стили для форматирования
+        number_style = NamedStyle(name="number_style")
+        number_style.number_format = '#,##0'
+        
+        float_style = NamedStyle(name="float_style")
+        float_style.number_format = '#,##0.00'
+        
+        date_style = NamedStyle(name="date_style")
+        date_style.number_format = 'YYYY-MM-DD'
+        
+        # Применяем форматирование к числовым колонкам
+        numeric_conversions = column_settings.get('numeric_conversions', {})
+        for group_name, group_settings in numeric_conversions.items():
+            fields = group_settings.get('fields', [])
+            conversion_type = group_settings.get('type', 'integer')
+            decimal_places = group_settings.get('decimal_places', 2)
+            
+            for column in fields:
+                if column in df.columns:
+                    col_idx = df.columns.get_loc(column) + 1  # +1 потому что Excel начинается с 1
+                    col_letter = get_column_letter(col_idx)
+                    
+                    if conversion_type == 'integer':
+                        # Применяем целочисленный формат
+                        for row in range(2, len(df) + 2):  # +2 потому что Excel начинается с 1 и есть заголовок
+                            cell = worksheet[f'{col_letter}{row}']
+                            cell.style = number_style
+                    elif conversion_type == 'float':
+                        # Применяем дробный формат
+                        float_style.number_format = f'#,##0.{"0" * decimal_places}'
+                        for row in range(2, len(df) + 2):
+                            cell = worksheet[f'{col_letter}{row}']
+                            cell.style = float_style
+        
+        # Применяем форматирование к датам
+        date_conversions = column_settings.get('date_conversions', {})
+        for column, settings in date_conversions.items():
+            if column in df.columns:
+                col_idx = df.columns.get_loc(column) + 1
+                col_letter = get_column_letter(col_idx)
+                
+                # Применяем формат даты
+                for row in range(2, len(df) + 2):
+                    cell = worksheet[f'{col_letter}{row}']
+                    cell.style = date_style
+        
+        # Применяем форматирование к новым колонкам (с суффиксами)
+        for column in df.columns:
+            if column.endswith('_numeric'):
+                col_idx = df.columns.get_loc(column) + 1
+                col_letter = get_column_letter(col_idx)
+                
+                # Определяем тип по исходной колонке
+                original_column = column.replace('_numeric', '')
+                
+                # Ищем исходную колонку в группах
+                found_conversion_type = None
+                found_decimal_places = 2
+                
+                for group_name, group_settings in numeric_conversions.items():
+                    fields = group_settings.get('fields', [])
+                    if original_column in fields:
+                        found_conversion_type = group_settings.get('type', 'integer')
+                        found_decimal_places = group_settings.get('decimal_places', 2)
+                        break
+                
+                if found_conversion_type:
+                    if found_conversion_type == 'integer':
+                        for row in range(2, len(df) + 2):
+                            cell = worksheet[f'{col_letter}{row}']
+                            cell.style = number_style
+                    elif found_conversion_type == 'float':
+                        float_style.number_format = f'#,##0.{"0" * found_decimal_places}'
+                        for row in range(2, len(df) + 2):
+                            cell = worksheet[f'{col_letter}{row}']
+                            cell.style = float_style
+            
+            elif column.endswith('_formatted'):
+                col_idx = df.columns.get_loc(column) + 1
+                col_letter = get_column_letter(col_idx)
+                
+                # Применяем формат даты к отформатированным колонкам
+                for row in range(2, len(df) + 2):
+                    cell = worksheet[f'{col_letter}{row}']
+                    cell.style = date_style
+                    
+    except Exception as e:
+        logger.warning(f"Ошибка при применении форматирования ячеек: {e}")
+
+def split_dimension_table(df, config_key):
+    """
+    Вынос атрибутов награды/турнира из DATA в лист-справочник (нормализованный вывод)
+
+    Выполняется, если в *_processing включен normalized_output. Показатели листов
+    SUMMARY/STATISTICS/REWARD_SUMMARY по вынесенным колонкам восстанавливаются
+    по ключу из листа-справочника (get_dimension_column).
+    Колонка выносится, только если ее значение однозначно определяется ключом.
+
+    Args:
+        df (pd.DataFrame): DataFrame после apply_column_settings
+        config_key (str): Ключ конфигурации (leaders_for_admin или reward)
+
+    Returns:
+        tuple: (DataFrame для DATA, словарь {имя листа: DataFrame справочника})
+    """
+    _, processing_config = get_processing_config(config_key)
+    dimension = DIMENSION_TABLES.get(config_key)
+    if not processing_config.get("normalized_output") or not dimension or dimension["key"] not in df.columns:
+        return df, {}
+
+    key = dimension["key"]
+    columns = []
+    for column in dimension["columns"]:
+        if column not in df.columns:
+            continue
+        if (df.groupby(key, observed=True, sort=False)[column].nunique(dropna=False) <= 1).all():
+            columns.append(column)
+        else:
+            logger.warning(LOG_MESSAGES['dimension_column_kept'].format(column=column, key=key))
+    if not columns:
+        return df, {}
+
+    dimension_df = df[[key] + columns].drop_duplicates(subset=[key]).reset_index(drop=True)
+    fact_df = df.drop(columns=columns)
+    logger.info(LOG_MESSAGES['dimension_table_created'].format(
+        sheet=dimension["sheet"], rows=len(dimension_df), key=key, columns=columns
+    ))
+    return fact_df, {dimension["sheet"]: dimension_df}
+
+def save_excel_file(df, output_excel_path, config_key=None, extra_sheets=None):
+    """
+    Общая функция для сохранения DataFrame в Excel с применением стилей
+    
+    Args:
+        df (DataFrame): DataFrame для сохранения
+        output_excel_path (str): Путь к выходному Excel файлу
+        config_key (str, optional): Ключ конфигурации для получения настроек
+        extra_sheets (dict, optional): Дополнительные листы данных {имя листа: DataFrame}
+        
+    Returns:
+        bool: True если сохранение успешно, False в противном случае
+    """
+    try:
+        # Создание директории для выходного файла если не существует
+        output_dir = os.path.dirname(output_excel_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+            logger.info(LOG_MESSAGES['json_directory_created'].format(directory=output_dir))
+        
+        # Разбиение на части при превышении лимита строк Excel или по ключу
+        _, processing_config = get_processing_config(config_key)
+        split_config = processing_config.get("excel_split", {})
+        if split_config.get("key") or len(df) > min(split_config.get("max_rows", EXCEL_MAX_DATA_ROWS), EXCEL_MAX_DATA_ROWS):
+            return save_excel_partitions(df, output_excel_path, config_key, extra_sheets, split_config)
+        
+        # Параллельная сборка книги из XML частей листов
+        parallel_config = processing_config.get("parallel_xlsx", {})
+        if parallel_config.get("enabled"):
+            return save_excel_parallel(df, output_excel_path, config_key, extra_sheets, parallel_config)
+        
+        # Создание Excel файла
+        filename = os.path.basename(output_excel_path)
+        rows, cols = df.shape
+        
+        # Оценка времени обработки (примерно 0.1 секунды на 1000 строк)
+        estimated_seconds = max(1, (rows * cols) / 10000)  # Минимум 1 секунда
+        if estimated_seconds < 60:
+            estimated_time = f"{estimated_seconds:.1f} сек"
+        else:
+            estimated_minutes = estimated_seconds / 60
+            estimated_time = f"{estimated_minutes:.1f} мин"
+        
+        logger.info(LOG_MESSAGES['json_excel_creation'].format(
+            filename=filename, 
+            rows=rows, 
+            cols=cols
+        ))
+        logger.info(LOG_MESSAGES['json_excel_processing_info'].format(
+            rows=rows,
+            cols=cols,
+            estimated_time=estimated_time
+        ))
+        with pd.ExcelWriter(output_excel_path, engine='openpyxl') as writer:
+            df.to_excel(writer, sheet_name='DATA', index=False)
+            for sheet_name, sheet_df in (extra_sheets or {}).items():
+                sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+                logger.info(LOG_MESSAGES['extra_sheet_written'].format(sheet=sheet_name, rows=len(sheet_df)))
+            workbook = writer.book
+            
+            # Получаем настройки закрепления из конфигурации
+            freeze_cell = "B2"  # По умолчанию закрепляем первую строку и первую колонку
+            if config_key and config_key in FUNCTION_CONFIGS:
+                config = FUNCTION_CONFIGS[config_key]
+                # Проверяем, есть ли вложенные конфигурации
+                if config_key == "reward" and "reward_processing" in config:
+                    reward_profiles_config = config["reward_processing"]
+                    freeze_cell = reward_profiles_config.get('excel_freeze_cell', "B2")
+                elif config_key == "leaders_for_admin" and "leaders_processing" in config:
+                    leaders_processing_config = config["leaders_processing"]
+                    freeze_cell = leaders_processing_config.get('excel_freeze_cell', "B2")
+                elif config_key == "rating_list" and "rating_processing" in config:
+                    rating_processing_config = config["rating_processing"]
+                    freeze_cell = rating_processing_config.get('excel_freeze_cell', "B2")
+                else:
+                    freeze_cell = config.get('excel_freeze_cell', "B2")
+            
+            # Применяем стили с настройками закрепления
+            apply_excel_styling(workbook, freeze_cell)
+            
+            # Применяем форматирование ячеек
+            apply_cell_formatting(workbook, df, config_key)
+            
+            # Условное форматирование листа DATA (правила на диапазоны)
+            rules_count = apply_conditional_formatting(workbook['DATA'], df)
+            if rules_count:
+                logger.info(LOG_MESSAGES['conditional_formatting_applied'].format(sheet='DATA', rules=rules_count))
+            
+            # Создание дополнительных листов (показатели считаются один раз для всех листов)
+            aggregates = get_dataset_aggregates(df, extra_sheets)
+            create_summary_sheet(workbook, aggregates)
+            create_statistics_sheet(workbook, aggregates)
+            
+            # Создание специального листа для reward данных
+            if config_key == "reward" or (config_key and "reward" in config_key):
+                create_reward_summary_sheet(workbook, aggregates)
+        
+        # Получаем размер файла
+        file_size = os.path.getsize(output_excel_path)
+        file_size_mb = file_size / (1024 * 1024)  # Конвертируем в МБ
+        
+        logger.info(LOG_MESSAGES['json_excel_success'].format(
+            file_path=output_excel_path,
+            size=f"{file_size_mb:.2f} МБ"
+        ))
+        return True
+        
+    except Exception as e:
+        logger.error(LOG_MESSAGES['excel_creation_error'].format(error=e))
+        return False
+
+def get_excel_partitions(df, split_config):
+    """
+    Разбиение строк DataFrame на части по ключу и/или количеству строк
+
+    Args:
+        df (pd.DataFrame): DataFrame листа DATA
+        split_config (dict): Настройки excel_split (max_rows, key)
+
+    Returns:
+        list: Список частей {"key_value", "chunk", "chunks", "positions"}; positions - номера строк
+    """
+    max_rows = min(split_config.get("max_rows", EXCEL_MAX_DATA_ROWS), EXCEL_MAX_DATA_ROWS)
+    key = split_config.get("key")
+    if key and key in df.columns:
+        # Коды по порядку появления; пустой ключ (NaN) - отдельная часть, в т.ч. для category
+        codes, uniques = pd.factorize(df[key], sort=False, use_na_sentinel=False)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+        groups = zip(uniques, np.split(order, bounds))
+    else:
+        groups = [(None, np.arange(len(df)))]
+
+    partitions = []
+    for key_value, positions in groups:
+        starts = range(0, len(positions), max_rows)
+        for chunk, start in enumerate(starts, 1):
+            partitions.append({
+                "key_value": key_value,
+                "chunk": chunk,
+                "chunks": len(starts),
+                "positions": positions[start:start + max_rows]
+            })
+    return partitions
+
+def get_column_number_formats(df, config_key):
+    """
+    Числовые форматы колонок по column_settings (как в apply_cell_formatting)
+
+    Args:
+        df (pd.DataFrame): DataFrame листа DATA
+        config_key (str): Ключ конфигурации
+
+    Returns:
+        dict: {номер колонки (с 1): формат Excel}
+    """
+    if config_key not in ("reward", "leaders_for_admin"):
+        return {}
+    column_settings = get_processing_config(config_key)[1].get("column_settings", {})
+    numeric_conversions = column_settings.get('numeric_conversions', {})
+    formats = {}
+
+    def numeric_format(group_settings):
+        if group_settings.get('type', 'integer') == 'integer':
+            return '#,##0'
+        return f'#,##0.{"0" * group_settings.get("decimal_places", 2)}'
+
+    for group_settings in numeric_conversions.values():
+        for column in group_settings.get('fields', []):
+            if column in df.columns:
+                formats[df.columns.get_loc(column) + 1] = numeric_format(group_settings)
+            if f"{column}_numeric" in df.columns:
+                formats[df.columns.get_loc(f"{column}_numeric") + 1] = numeric_format(group_settings)
+    for column in df.columns:
+        if column in column_settings.get('date_conversions', {}) or column.endswith('_formatted'):
+            formats[df.columns.get_loc(column) + 1] = 'YYYY-MM-DD'
+    return formats
+
+def write_streaming_data_sheet(workbook, sheet_name, df, freeze_cell="B2", number_formats=None, conditional_formatting=True):
+    """
+    Потоковая запись DataFrame на лист книги write_only (без хранения ячеек в памяти)
+
+    Заголовок оформляется как в apply_excel_styling, задаются закрепление,
+    автофильтр, ширина колонок (по заголовку и первым строкам), числовые форматы
+    и условное форматирование листа данных.
+
+    Args:
+        workbook: Книга openpyxl в режиме write_only
+        sheet_name (str): Имя листа
+        df (pd.DataFrame): Данные листа
+        freeze_cell (str): Ячейка закрепления
+        number_formats (dict, optional): {номер колонки: формат Excel}
+        conditional_formatting (bool): Добавить правила EXCEL_CONDITIONAL_FORMATTING
+    """
+    number_formats = number_formats or {}
+    sheet = workbook.create_sheet(sheet_name)
+    column_count = len(df.columns)
+
+    # Ширина колонок по заголовку и первым строкам
+    sample = df.head(1000).astype(object)
+    for column_number, column in enumerate(df.columns, 1):
+        max_length = max([len(str(column))] + [len(str(value)) for value in sample[column] if not pd.isna(value)])
+        sheet.column_dimensions[get_column_letter(column_number)].width = min(max_length + 2, 50)
+    if len(df) > 0:
+        sheet.freeze_panes = freeze_cell
+        sheet.auto_filter.ref = f"A1:{get_column_letter(column_count)}{len(df) + 1}"
+    if conditional_formatting:
+        apply_conditional_formatting(sheet, df)
+
+    header_fill = PatternFill(start_color=EXCEL_COLORS["header"], end_color=EXCEL_COLORS["header"], fill_type="solid")
+    header_font = Font(color="FFFFFF", bold=True)
+    header_alignment = Alignment(horizontal="center", vertical="center")
+    header = []
+    for column in df.columns:
+        cell = WriteOnlyCell(sheet, value=str(column))
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = header_alignment
+        header.append(cell)
+    sheet.append(header)
+
+    # Строки записываются блоками, пропуски (NaN/NA) - пустые ячейки
+    for start in range(0, len(df), 50000):
+        chunk = df.iloc[start:start + 50000].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            if number_formats:
+                row = list(row)
+                for column_number, number_format in number_formats.items():
+                    cell = WriteOnlyCell(sheet, value=row[column_number - 1])
+                    cell.number_format = number_format
+                    row[column_number - 1] = cell
+            sheet.append(row)
+
+def write_partition_workbook(task):
+    """
+    Запись одной части данных в отдельную книгу (может выполняться в отдельном процессе)
+
+    Args:
+        task (tuple): (DataFrame части, путь к файлу, ячейка закрепления, числовые форматы)
+
+    Returns:
+        str: Путь к сохраненному файлу
+    """
+    part_df, path, freeze_cell, number_formats = task
+    workbook = Workbook(write_only=True)
+    write_streaming_data_sheet(workbook, 'DATA', part_df, freeze_cell, number_formats)
+    workbook.save(path)
+    return path
+
+def save_excel_partitions(df, output_excel_path, config_key=None, extra_sheets=None, split_config=None):
+    """
+    Сохранение DataFrame частями: листы DATA_1..N одной книги или отдельные книги
+
+    Все листы пишутся потоково (write_only). Книга output_excel_path содержит
+    оглавление INDEX (часть, лист/файл, значение ключа, количество строк),
+    дополнительные листы и листы SUMMARY/STATISTICS/REWARD_SUMMARY по всем данным.
+
+    Args:
+        df (pd.DataFrame): DataFrame листа DATA
+        output_excel_path (str): Путь к основной книге
+        config_key (str, optional): Ключ конфигурации
+        extra_sheets (dict, optional): Дополнительные листы данных {имя листа: DataFrame}
+        split_config (dict, optional): Настройки excel_split
+
+    Returns:
+        bool: True если сохранение успешно
+    """
+    split_config = split_config or {}
+    _, processing_config = get_processing_config(config_key)
+    freeze_cell = processing_config.get('excel_freeze_cell', "B2")
+    target = split_config.get("target", "sheets")
+    key = split_config.get("key") if split_config.get("key") in df.columns else None
+    partitions = get_excel_partitions(df, split_config)
+    number_formats = get_column_number_formats(df, config_key)
+    base_path = os.path.splitext(output_excel_path)[0]
+
+    logger.info(LOG_MESSAGES['excel_split_start'].format(
+        rows=len(df), parts=len(partitions), key=key or "-", target=target
+    ))
+
+    # Оглавление частей
+    index_rows = [["Часть", "Файл" if target == "workbooks" else "Лист", key or "Ключ", "Номер блока", "Строк"]]
+    for number, partition in enumerate(partitions, 1):
+        name = f"{os.path.basename(base_path)}_{number:03d}{FILE_EXTENSIONS['EXCEL']}" if target == "workbooks" else f"DATA_{number}"
+        key_value = None if pd.isna(partition["key_value"]) else partition["key_value"]
+        partition["name"] = name
+        index_rows.append([number, name, key_value, f"{partition['chunk']}/{partition['chunks']}", len(partition["positions"])])
+
+    workbook = Workbook(write_only=True)
+    header_fill = PatternFill(start_color=EXCEL_COLORS["header"], end_color=EXCEL_COLORS["header"], fill_type="solid")
+    write_sheet_rows(workbook, 'INDEX', index_rows, {1: {"fill": header_fill, "font": Font(color="FFFFFF", bold=True)}})
+
+    if target == "workbooks":
+        output_dir = os.path.dirname(output_excel_path)
+        tasks = (
+            (df.iloc[partition["positions"]], os.path.join(output_dir, partition["name"]), freeze_cell, number_formats)
+            for partition in partitions
+        )
+        workers = split_config.get("workers", 1)
+        if workers > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                saved_paths = list(executor.map(write_partition_workbook, tasks))
+        else:
+            saved_paths = [write_partition_workbook(task) for task in tasks]
+        for number, (partition, path) in enumerate(zip(partitions, saved_paths), 1):
+            logger.info(LOG_MESSAGES['excel_split_part'].format(
+                part=number, parts=len(partitions), name=path, rows=len(partition["positions"])
+            ))
+    else:
+        for number, partition in enumerate(partitions, 1):
+            write_streaming_data_sheet(workbook, partition["name"], df.iloc[partition["positions"]], freeze_cell, number_formats)
+            logger.info(LOG_MESSAGES['excel_split_part'].format(
+                part=number, parts=len(partitions), name=partition["name"], rows=len(partition["positions"])
+            ))
+
+    for sheet_name, sheet_df in (extra_sheets or {}).items():
+        write_streaming_data_sheet(workbook, sheet_name, sheet_df, freeze_cell, conditional_formatting=False)
+        logger.info(LOG_MESSAGES['extra_sheet_written'].format(sheet=sheet_name, rows=len(sheet_df)))
+
+    aggregates = get_dataset_aggregates(df, extra_sheets)
+    create_summary_sheet(workbook, aggregates)
+    create_statistics_sheet(workbook, aggregates)
+    if config_key == "reward" or (config_key and "reward" in config_key):
+        create_reward_summary_sheet(workbook, aggregates)
+    workbook.save(output_excel_path)
+
+    logger.info(LOG_MESSAGES['json_excel_success'].format(
+        file_path=output_excel_path,
+        size=f"{os.path.getsize(output_excel_path) / (1024 * 1024):.2f} МБ"
+    ))
+    return True
+
+# =============================================================================
+# ПАРАЛЛЕЛЬНАЯ СБОРКА XLSX
+# =============================================================================
+
+def register_xlsx_style(styles, number_format=None, fill=None, font=None, alignment=None):
+    """
+    Регистрация оформления ячейки в таблице стилей собираемой книги
+
+    Args:
+        styles (dict): Таблица стилей {"xfs", "fonts", "fills", "number_formats"}
+        number_format (str, optional): Числовой формат Excel
+        fill (PatternFill, optional): Заливка
+        font (Font, optional): Шрифт
+        alignment (Alignment, optional): Выравнивание
+
+    Returns:
+        int: Номер стиля (атрибут s ячейки)
+    """
+    def register_part(parts, style_object):
+        xml = tostring(style_object.to_tree()).decode("utf-8")
+        if xml not in parts:
+            parts.append(xml)
+        return parts.index(xml)
+
+    if number_format is None:
+        number_format_id = 0
+    elif number_format in BUILTIN_FORMATS_REVERSE:
+        number_format_id = BUILTIN_FORMATS_REVERSE[number_format]
+    else:
+        number_format_id = styles["number_formats"].setdefault(number_format, 164 + len(styles["number_formats"]))
+    key = (
+        number_format_id,
+        register_part(styles["fonts"], font) if font else 0,
+        register_part(styles["fills"], fill) if fill else 0,
+        tostring(alignment.to_tree()).decode("utf-8") if alignment else ""
+    )
+    return styles["xfs"].setdefault(key, len(styles["xfs"]))
+
+def build_xlsx_styles_xml(styles):
+    """
+    Формирование части xl/styles.xml по таблице стилей
+
+    Args:
+        styles (dict): Таблица стилей (см. register_xlsx_style)
+
+    Returns:
+        str: XML таблицы стилей
+    """
+    number_formats = "".join(
+        f'<numFmt numFmtId="{format_id}" formatCode={quoteattr(number_format)}/>'
+        for number_format, format_id in styles["number_formats"].items()
+    )
+    cell_xfs = ""
+    for (number_format_id, font_id, fill_id, alignment), _ in sorted(styles["xfs"].items(), key=lambda item: item[1]):
+        cell_xfs += f'<xf numFmtId="{number_format_id}" fontId="{font_id}" fillId="{fill_id}" borderId="0" xfId="0"'
+        cell_xfs += ' applyNumberFormat="1"' if number_format_id else ''
+        cell_xfs += ' applyFont="1"' if font_id else ''
+        cell_xfs += ' applyFill="1"' if fill_id else ''
+        cell_xfs += f' applyAlignment="1">{alignment}</xf>' if alignment else '/>'
+    return (
+        XLSX_XML_DECLARATION
+        + f'<styleSheet xmlns="{XLSX_NAMESPACES["main"]}">'
+        + (f'<numFmts count="{len(styles["number_formats"])}">{number_formats}</numFmts>' if number_formats else '')
+        + f'<fonts count="{len(styles["fonts"])}">{"".join(styles["fonts"])}</fonts>'
+        + f'<fills count="{len(styles["fills"])}">{"".join(styles["fills"])}</fills>'
+        + '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        + '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        + f'<cellXfs count="{len(styles["xfs"])}">{cell_xfs}</cellXfs>'
+        + '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        + (f'<dxfs count="{len(styles["dxfs"])}">{"".join(styles["dxfs"])}</dxfs>' if styles.get("dxfs") else '')
+        + '</styleSheet>'
+    )
+
+def render_xlsx_rows(task):
+    """
+    Запись XML строк листа (<row>) во временный файл; выполняется в процессах пула
+
+    Строки записываются inline-строками (без общей таблицы sharedStrings),
+    поэтому блоки одного листа формируются независимо друг от друга.
+
+    Args:
+        task (dict): {"rows" (DataFrame или список строк), "first_row", "width",
+            "column_styles" {номер колонки: стиль}, "row_styles" {номер строки: (стиль, колонки)},
+            "date_styles" (стиль datetime, стиль date), "path"}
+
+    Returns:
+        tuple: (путь к файлу, максимальные длины значений по колонкам для ширины)
+    """
+    rows = task["rows"]
+    if isinstance(rows, pd.DataFrame):
+        rows = rows.astype(object)
+        rows = rows.where(rows.notna(), None).itertuples(index=False, name=None)
+    width = task["width"]
+    letters = [get_column_letter(column_number) for column_number in range(1, width + 1)]
+    column_styles = [task["column_styles"].get(column_number, 0) for column_number in range(1, width + 1)]
+    datetime_style, date_style = task["date_styles"]
+    lengths = [0] * width
+
+    with open(task["path"], "w", encoding="utf-8") as xml_file:
+        for row_number, row in enumerate(rows, task["first_row"]):
+            styles = column_styles
+            row_style = task["row_styles"].get(row_number)
+            if row_style:
+                style, columns = row_style
+                if columns is None:
+                    row = list(row) + [None] * (width - len(row))
+                styles = [style if columns is None or column_number in columns else column_styles[column_number - 1]
+                          for column_number in range(1, width + 1)]
+            cells = []
+            for column_index, value in enumerate(row):
+                if len(str(value)) > lengths[column_index]:
+                    lengths[column_index] = len(str(value))
+                style = styles[column_index]
+                reference = f'{letters[column_index]}{row_number}'
+                if (isinstance(value, float) and not np.isfinite(value)) or (isinstance(value, str) and not value):
+                    value = None
+                if value is None:
+                    if style:
+                        cells.append(f'<c r="{reference}" s="{style}"/>')
+                    continue
+                if isinstance(value, (bool, np.bool_)):
+                    cells.append(f'<c r="{reference}" s="{style}" t="b"><v>{int(value)}</v></c>')
+                elif isinstance(value, (int, float, np.integer, np.floating)):
+                    cells.append(f'<c r="{reference}" s="{style}"><v>{value}</v></c>')
+                elif isinstance(value, (datetime.datetime, datetime.date)):
+                    if isinstance(value, datetime.datetime):
+                        style = style or datetime_style
+                        value = value.replace(tzinfo=None)
+                    else:
+                        style = style or date_style
+                    cells.append(f'<c r="{reference}" s="{style}"><v>{to_excel(value)}</v></c>')
+                else:
+                    text = escape(ILLEGAL_CHARACTERS_RE.sub("", str(value)))
+                    space = ' xml:space="preserve"' if text != text.strip() else ''
+                    cells.append(f'<c r="{reference}" s="{style}" t="inlineStr"><is><t{space}>{text}</t></is></c>')
+            xml_file.write(f'<row r="{row_number}">{"".join(cells)}</row>')
+    return task["path"], lengths
+
+def build_xlsx_sheet_head(sheet, widths, rows_count):
+    """
+    Начало XML листа: закрепление областей, ширина колонок и открытие sheetData
+
+    Args:
+        sheet (dict): Описание листа {"freeze_cell", "widths"}
+        widths (list): Максимальные длины значений по колонкам
+        rows_count (int): Количество строк листа
+
+    Returns:
+        str: XML до содержимого sheetData
+    """
+    pane = ""
+    if sheet["freeze_cell"] and rows_count > 1:
+        row, column = coordinate_to_tuple(sheet["freeze_cell"])
+        active_pane = {(True, True): "bottomRight", (False, True): "bottomLeft", (True, False): "topRight"}.get((column > 1, row > 1))
+        if active_pane:
+            pane = (
+                '<pane' + (f' xSplit="{column - 1}"' if column > 1 else '') + (f' ySplit="{row - 1}"' if row > 1 else '')
+                + f' topLeftCell="{sheet["freeze_cell"]}" activePane="{active_pane}" state="frozen"/>'
+            )
+    cols = "".join(
+        f'<col min="{column_number}" max="{column_number}" width="{min(length + 2, 50)}" customWidth="1"/>'
+        for column_number, length in enumerate(widths, 1)
+    ) if sheet["widths"] else ""
+    return (
+        XLSX_XML_DECLARATION
+        + f'<worksheet xmlns="{XLSX_NAMESPACES["main"]}" xmlns:r="{XLSX_NAMESPACES["relationships"]}">'
+        + f'<sheetViews><sheetView workbookViewId="0">{pane}</sheetView></sheetViews>'
+        + '<sheetFormatPr defaultRowHeight="15"/>'
+        + (f'<cols>{cols}</cols>' if cols else '')
+        + '<sheetData>'
+    )
+
+def get_frame_xlsx_tasks(df, path_prefix, header_style, column_styles, date_styles, block_rows):
+    """
+    Задачи формирования листа данных: заголовок и блоки строк по block_rows
+
+    Args:
+        df (pd.DataFrame): Данные листа
+        path_prefix (str): Префикс путей временных файлов блоков
+        header_style (int): Стиль заголовка
+        column_styles (dict): {номер колонки: стиль}
+        date_styles (tuple): Стили datetime и date по умолчанию
+        block_rows (int): Количество строк в одном блоке
+
+    Returns:
+        list: Задачи для render_xlsx_rows
+    """
+    width = len(df.columns)
+    tasks = [{
+        "rows": [[str(column) for column in df.columns]], "first_row": 1, "width": width,
+        "column_styles": {}, "row_styles": {1: (header_style, None)}, "date_styles": date_styles,
+        "path": f"{path_prefix}_0.xml"
+    }]
+    for start in range(0, len(df), block_rows):
+        tasks.append({
+            "rows": df.iloc[start:start + block_rows], "first_row": start + 2, "width": width,
+            "column_styles": column_styles, "row_styles": {}, "date_styles": date_styles,
+            "path": f"{path_prefix}_{start + 1}.xml"
+        })
+    return tasks
+
+def save_excel_parallel(df, output_excel_path, config_key=None, extra_sheets=None, parallel_config=None):
+    """
+    Сборка XLSX из XML частей листов, сформированных параллельно в процессах
+
+    Оформление совпадает с save_excel_file (apply_excel_styling, apply_cell_formatting
+    и листы SUMMARY/STATISTICS/REWARD_SUMMARY): стиль заголовков, закрепление,
+    автофильтр DATA, ширина колонок и числовые форматы. Большие листы делятся
+    на блоки строк, блоки пишутся во временные файлы и последовательно
+    упаковываются в zip-архив книги.
+
+    Args:
+        df (pd.DataFrame): DataFrame листа DATA
+        output_excel_path (str): Путь к выходному файлу
+        config_key (str, optional): Ключ конфигурации
+        extra_sheets (dict, optional): Дополнительные листы данных {имя листа: DataFrame}
+        parallel_config (dict, optional): Настройки parallel_xlsx (workers, block_rows)
+
+    Returns:
+        bool: True если сохранение успешно
+    """
+    parallel_config = parallel_config or {}
+    _, processing_config = get_processing_config(config_key)
+    freeze_cell = processing_config.get('excel_freeze_cell', "B2")
+    workers = parallel_config.get("workers", 4)
+    block_rows = parallel_config.get("block_rows", 100000)
+
+    styles = {
+        "xfs": {(0, 0, 0, ""): 0},
+        "fonts": [tostring(DEFAULT_FONT.to_tree()).decode("utf-8")],
+        "fills": [tostring(PatternFill().to_tree()).decode("utf-8"), tostring(PatternFill(patternType="gray125").to_tree()).decode("utf-8")],
+        "number_formats": {},
+        "dxfs": []
+    }
+    header_style = register_xlsx_style(
+        styles,
+        fill=PatternFill(start_color=EXCEL_COLORS["header"], end_color=EXCEL_COLORS["header"], fill_type="solid"),
+        font=Font(color="FFFFFF", bold=True),
+        alignment=Alignment(horizontal="center", vertical="center")
+    )
+    date_styles = (register_xlsx_style(styles, 'yyyy-mm-dd h:mm:ss'), register_xlsx_style(styles, 'yyyy-mm-dd'))
+    column_styles = {
+        column_number: register_xlsx_style(styles, number_format)
+        for column_number, number_format in get_column_number_formats(df, config_key).items()
+    }
+
+    # Описание листов в порядке save_excel_file
+    aggregates = get_dataset_aggregates(df, extra_sheets)
+    summary_sheets = [('SUMMARY', get_summary_sheet_rows), ('STATISTICS', get_statistics_sheet_rows)]
+    if config_key == "reward" or (config_key and "reward" in config_key):
+        summary_sheets.append(('REWARD_SUMMARY', get_reward_summary_sheet_rows))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sheets = []
+        for sheet_name, sheet_df in [('DATA', df)] + list((extra_sheets or {}).items()):
+            sheets.append({
+                "name": sheet_name, "freeze_cell": freeze_cell, "widths": True, "rows": len(sheet_df) + 1,
+                "auto_filter": f"A1:{get_column_letter(len(sheet_df.columns))}{len(sheet_df) + 1}" if sheet_name == 'DATA' and len(sheet_df) > 0 else None,
+                "conditional_formatting": get_conditional_formatting_rules(sheet_df) if sheet_name == 'DATA' else [],
+                "tasks": get_frame_xlsx_tasks(
+                    sheet_df, os.path.join(temp_dir, f"sheet{len(sheets) + 1}"), header_style,
+                    column_styles if sheet_name == 'DATA' else {}, date_styles, block_rows
+                )
+            })
+        for sheet_name, get_rows in summary_sheets:
+            rows, row_styles = get_rows(aggregates)
+            sheets.append({
+                "name": sheet_name, "freeze_cell": None, "widths": False, "rows": len(rows), "auto_filter": None, "conditional_formatting": [],
+                "tasks": [{
+                    "rows": rows, "first_row": 1, "width": max((len(row) for row in rows), default=0),
+                    "column_styles": {}, "date_styles": date_styles,
+                    "row_styles": {
+                        row_number: (register_xlsx_style(styles, fill=style.get("fill"), font=style.get("font")), style.get("columns"))
+                        for row_number, style in row_styles.items()
+                    },
+                    "path": os.path.join(temp_dir, f"sheet{len(sheets) + 1}_0.xml")
+                }]
+            })
+        if config_key == "reward" or (config_key and "reward" in config_key):
+            logger.info(LOG_MESSAGES['reward_summary_sheet_created'])
+
+        # Формирование XML строк в пуле процессов
+        tasks = [task for sheet in sheets for task in sheet["tasks"]]
+        logger.info(LOG_MESSAGES['xlsx_assembly_start'].format(
+            filename=os.path.basename(output_excel_path), sheets=len(sheets), blocks=len(tasks), workers=workers
+        ))
+        if workers > 1 and len(tasks) > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(render_xlsx_rows, tasks))
+        else:
+            results = [render_xlsx_rows(task) for task in tasks]
+
+        # Упаковка частей в книгу
+        sheet_entries = ""
+        relationships = ""
+        content_types = ""
+        defined_names = ""
+        with zipfile.ZipFile(output_excel_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            result_index = 0
+            for sheet_number, sheet in enumerate(sheets, 1):
+                sheet_results = results[result_index:result_index + len(sheet["tasks"])]
+                result_index += len(sheet["tasks"])
+                widths = [max(lengths) for lengths in zip(*(lengths for _, lengths in sheet_results))]
+                with archive.open(f"xl/worksheets/sheet{sheet_number}.xml", "w", force_zip64=True) as part:
+                    part.write(build_xlsx_sheet_head(sheet, widths, sheet["rows"]).encode("utf-8"))
+                    for path, _ in sheet_results:
+                        with open(path, "rb") as rows_file:
+                            shutil.copyfileobj(rows_file, part)
+                    part.write(b'</sheetData>')
+                    if sheet["auto_filter"]:
+                        part.write(f'<autoFilter ref="{sheet["auto_filter"]}"/>'.encode("utf-8"))
+                    if sheet["conditional_formatting"]:
+                        part.write(build_conditional_formatting_xml(sheet["conditional_formatting"], styles).encode("utf-8"))
+                        logger.info(LOG_MESSAGES['conditional_formatting_applied'].format(
+                            sheet=sheet["name"], rules=len(sheet["conditional_formatting"])
+                        ))
+                    part.write(b'</worksheet>')
+                sheet_entries += f'<sheet name={quoteattr(sheet["name"])} sheetId="{sheet_number}" r:id="rId{sheet_number}"/>'
+                relationships += (
+                    f'<Relationship Id="rId{sheet_number}" Type="{XLSX_NAMESPACES["relationships"]}/worksheet" '
+                    f'Target="worksheets/sheet{sheet_number}.xml"/>'
+                )
+                content_types += (
+                    f'<Override PartName="/xl/worksheets/sheet{sheet_number}.xml" '
+                    f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                )
+                if sheet["auto_filter"]:
+                    start, end = sheet["auto_filter"].split(":")
+                    filter_range = f"'{sheet['name']}'!{absolute_coordinate(start)}:{absolute_coordinate(end)}"
+                    defined_names += f'<definedName name="_xlnm._FilterDatabase" localSheetId="{sheet_number - 1}" hidden="1">{escape(filter_range)}</definedName>'
+
+            archive.writestr("xl/styles.xml", build_xlsx_styles_xml(styles))
+            archive.writestr("xl/workbook.xml", (
+                XLSX_XML_DECLARATION
+                + f'<workbook xmlns="{XLSX_NAMESPACES["main"]}" xmlns:r="{XLSX_NAMESPACES["relationships"]}">'
+                + f'<bookViews><workbookView/></bookViews><sheets>{sheet_entries}</sheets>'
+                + (f'<definedNames>{defined_names}</definedNames>' if defined_names else '')
+                + '</workbook>'
+            ))
+            archive.writestr("xl/_rels/workbook.xml.rels", (
+                XLSX_XML_DECLARATION
+                + f'<Relationships xmlns="{XLSX_NAMESPACES["package_relationships"]}">{relationships}'
+                + f'<Relationship Id="rId{len(sheets) + 1}" Type="{XLSX_NAMESPACES["relationships"]}/styles" Target="styles.xml"/>'
+                + '</Relationships>'
+            ))
+            archive.writestr("_rels/.rels", (
+                XLSX_XML_DECLARATION
+                + f'<Relationships xmlns="{XLSX_NAMESPACES["package_relationships"]}">'
+                + f'<Relationship Id="rId1" Type="{XLSX_NAMESPACES["relationships"]}/officeDocument" Target="xl/workbook.xml"/>'
+                + '</Relationships>'
+            ))
+            archive.writestr("[Content_Types].xml", (
+                XLSX_XML_DECLARATION
+                + f'<Types xmlns="{XLSX_NAMESPACES["content_types"]}">'
+                + '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                + '<Default Extension="xml" ContentType="application/xml"/>'
+                + '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                + '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                + content_types
+                + '</Types>'
+            ))
+
+    logger.info(LOG_MESSAGES['json_excel_success'].format(
+        file_path=output_excel_path,
+        size=f"{os.path.getsize(output_excel_path) / (1024 * 1024):.2f} МБ"
+    ))
+    return True
+
+def get_output_sink_paths(output_path, extension, extra_sheets=None, compression=None):
+    """
+    Пути файлов для табличных форматов: DATA и дополнительные листы в отдельных файлах
+
+    Args:
+        output_path (str): Путь к выходному файлу Excel (расширение заменяется)
+        extension (str): Расширение формата (например .csv)
+        extra_sheets (dict, optional): Дополнительные листы данных {имя листа: DataFrame}
+        compression (str, optional): Сжатие (для csv добавляется к расширению, например .csv.gz)
+
+    Returns:
+        list: Список пар (путь, имя дополнительного листа или None для DATA)
+    """
+    base_path = os.path.splitext(output_path)[0]
+    if extension == FILE_EXTENSIONS["CSV"] and compression:
+        extension = f"{extension}.{CSV_COMPRESSION_EXTENSIONS.get(compression, compression)}"
+    paths = [(f"{base_path}{extension}", None)]
+    for sheet_name in (extra_sheets or {}):
+        paths.append((f"{base_path}_{sheet_name}{extension}", sheet_name))
+    return paths
+
+def is_mixed_type(values):
+    """Проверка, что значения смешанных типов (например числа и строки) - pyarrow не определит тип"""
+    return pd.api.types.infer_dtype(values, skipna=True).startswith("mixed")
+
+def prepare_columnar_frame(df):
+    """
+    Подготовка DataFrame к записи в колоночные форматы (parquet/feather)
+
+    Колонки object со смешанными типами (например числа и пустые строки)
+    приводятся к строкам, иначе pyarrow не сможет определить тип колонки.
+    У колонок category (планировщик типов) к строкам приводятся категории.
+
+    Args:
+        df (pd.DataFrame): DataFrame для записи
+
+    Returns:
+        pd.DataFrame: DataFrame с однородными типами колонок
+    """
+    mixed_columns = [
+        column for column in df.columns
+        if (df[column].dtype == object and is_mixed_type(df[column]))
+        or (isinstance(df[column].dtype, pd.CategoricalDtype) and is_mixed_type(df[column].cat.categories))
+    ]
+    if not mixed_columns:
+        return df
+    df = df.copy()
+    for column in mixed_columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            categories = df[column].cat.categories.map(str)
+            # Разные значения с одинаковой строкой (1 и "1") объединяются в одну категорию
+            if categories.is_unique:
+                df[column] = df[column].cat.rename_categories(categories)
+                continue
+            df[column] = df[column].astype(object)
+        df[column] = df[column].map(lambda value: value if pd.isna(value) else str(value))
+    return df
+
+def write_columnar_file(sheet_df, path, write):
+    """
+    Запись колоночного файла через временный файл: при ошибке частичный файл не остается
+
+    Args:
+        sheet_df (pd.DataFrame): DataFrame для записи
+        path (str): Итоговый путь файла
+        write (callable): write(DataFrame, путь) - запись в формат
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(prepare_columnar_frame(sheet_df), temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def save_csv_file(df, output_path, config_key=None, extra_sheets=None, compression=None, dataset=None):
+    """
+    Сохранение DataFrame и дополнительных листов в CSV (по файлу на лист)
+
+    Args:
+        df (pd.DataFrame): DataFrame листа DATA
+        output_path (str): Путь к выходному файлу Excel (расширение заменяется на .csv)
+        config_key (str, optional): Ключ конфигурации (разделитель и кодировка из настроек скрипта)
+        extra_sheets (dict, optional): Дополнительные листы данных {имя листа: DataFrame}
+        compression (str, optional): Сжатие ("gzip", "zstd" и т.п.)
+        dataset (str, optional): Вид данных конвертера (не используется, для единой сигнатуры)
+
+    Returns:
+        list: Пути сохраненных файлов
+    """
+    config = FUNCTION_CONFIGS.get(get_processing_config(config_key)[0], {}) if config_key else {}
+    delimiter = config.get("csv_delimiter", ";")
+    encoding = config.get("csv_encoding", "utf-8")
+    saved_paths = []
+    for path, sheet_name in get_output_sink_paths(output_path, FILE_EXTENSIONS["CSV"], extra_sheets, compression):
+        sheet_df = df if sheet_name is None else extra_sheets[sheet_name]
+        sheet_df.to_csv(path, sep=delimiter, encoding=encoding, index=False, compression=compression)
+        saved_paths.append(path)
+    return saved_paths
+
+def save_parquet_file(df, output_path, config_key=None, extra_sheets=None, compression=None, dataset=None):
+    """
+    Сохранение DataFrame и дополнительных листов в Parquet (по файлу на лист)
+
+    Args:
+        df (pd.DataFrame): DataFrame листа DATA
+        output_path (str): Путь к выходному файлу Excel (расширение заменяется на .parquet)
+        config_key (str, optional): Ключ конфигурации (не используется, для единой сигнатуры)
+        extra_sheets (dict, optional): Дополнительные листы данных {имя листа: DataFrame}
+        compression (str, optional): Сжатие ("snappy", "gzip", "zstd"; по умолчанию snappy)
+        dataset (str, optional): Вид данных конвертера (не используется, для единой сигнатуры)
+
+    Returns:
+        list: Пути сохраненных файлов
+    """
+    saved_paths = []
+    for path, sheet_name in get_output_sink_paths(output_path, FILE_EXTENSIONS["PARQUET"], extra_sheets):
+        sheet_df = df if sheet_name is None else extra_sheets[sheet_name]
+        write_columnar_file(sheet_df, path, lambda frame, target: frame.to_parquet(target, index=False, compression=compression or "snappy"))
+        saved_paths.append(path)
+    return saved_paths
+
+def save_feather_file(df, output_path, config_key=None, extra_sheets=None, compression=None, dataset=None):
+    """
+    Сохранение DataFrame и дополнительных листов в Feather (по файлу на лист)
+
+    Args:
+        df (pd.DataFrame): DataFrame листа DATA
+        output_path (str): Путь к выходному файлу Excel (расширение заменяется на .feather)
+        config_key (str, optional): Ключ конфигурации (не используется, для единой сигнатуры)
+        extra_sheets (dict, optional): Дополнительные листы данных {имя листа: DataFrame}
+        compression (str, optional): Сжатие ("zstd", "lz4" или None)
+        dataset (str, optional): Вид данных конвертера (не используется, для единой сигнатуры)
+
+    Returns:
+        list: Пути сохраненных файлов
+    """
+    saved_paths = []
+    for path, sheet_name in get_output_sink_paths(output_path, FILE_EXTENSIONS["FEATHER"], extra_sheets):
+        sheet_df = df if sheet_name is None else extra_sheets[sheet_name]
+        write_columnar_file(sheet_df, path, lambda frame, target: frame.reset_index(drop=True).to_feather(target, compression=compression))
+        saved_paths.append(path)
+    return saved_paths
+
+def quote_sql_identifier(name):
+    """Имя таблицы или колонки SQLite в двойных кавычках"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+def get_sqlite_column_type(series):
+    """Тип колонки SQLite по типу колонки DataFrame"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(series):
+        return "REAL"
+    return "TEXT"
+
+def prepare_load_db_table(connection, table_name, df):
+    """
+    Создание таблицы LoadDB или добавление недостающих колонок, создание индексов
+
+    Args:
+        connection (sqlite3.Connection): Соединение с базой
+        table_name (str): Имя таблицы
+        df (pd.DataFrame): Данные (колонки run_id и source_file добавляются первыми)
+    """
+    table = quote_sql_identifier(table_name)
+    existing_columns = [row[1] for row in connection.execute(f"PRAGMA table_info({table})")]
+    if not existing_columns:
+        columns_sql = ", ".join(
+            ["run_id TEXT NOT NULL", "source_file TEXT"]
+            + [f"{quote_sql_identifier(column)} {get_sqlite_column_type(df[column])}" for column in df.columns]
+        )
+        connection.execute(f"CREATE TABLE {table} ({columns_sql})")
+        existing_columns = ["run_id", "source_file", *df.columns]
+    if "source_file" not in existing_columns:
+        connection.execute(f"ALTER TABLE {table} ADD COLUMN source_file TEXT")
+        existing_columns.append("source_file")
+    for column in df.columns:
+        if column not in existing_columns:
+            connection.execute(f"ALTER TABLE {table} ADD COLUMN {quote_sql_identifier(column)} {get_sqlite_column_type(df[column])}")
+            existing_columns.append(column)
+
+    for index_columns in LOAD_DB_INDEXES:
+        if all(column in existing_columns for column in index_columns):
+            index_name = quote_sql_identifier(f"ix_{table_name}_{'_'.join(index_columns)}")
+            columns_sql = ", ".join(quote_sql_identifier(column) for column in index_columns)
+            connection.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns_sql})")
+
+def format_load_db_value(value):
+    """Дата и время (Timestamp, datetime, date) в текст для SQLite, остальные значения без изменений"""
+    if isinstance(value, datetime.datetime):
+        return None if pd.isna(value) else value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+def insert_load_db_rows(connection, table_name, df, source_file):
+    """
+    Пакетная вставка строк DataFrame в таблицу LoadDB подготовленным executemany
+
+    Строки текущего запуска (run_id) из того же файла результата (source_file)
+    удаляются перед вставкой: повторная запись файла не дублирует данные,
+    строки других файлов запуска в этой таблице не затрагиваются.
+
+    Returns:
+        int: Количество вставленных строк
+    """
+    table = quote_sql_identifier(table_name)
+    columns = list(df.columns)
+    insert_sql = (
+        f"INSERT INTO {table} (run_id, source_file, {', '.join(quote_sql_identifier(column) for column in columns)}) "
+        f"VALUES (?, ?{', ?' * len(columns)})"
+    )
+    connection.execute(f"DELETE FROM {table} WHERE run_id = ? AND source_file = ?", (RUN_ID, source_file))
+    for start in range(0, len(df), LOAD_DB_BATCH_ROWS):
+        batch = df.iloc[start:start + LOAD_DB_BATCH_ROWS]
+        for column in batch.columns:
+            if pd.api.types.is_datetime64_any_dtype(batch[column]):
+                batch = batch.assign(**{column: batch[column].dt.strftime('%Y-%m-%d %H:%M:%S')})
+            elif batch[column].dtype == object or isinstance(batch[column].dtype, pd.CategoricalDtype):
+                # date_conversions по колонкам object/category дают значения Timestamp вперемешку с пустыми
+                values = batch[column].astype(object)
+                if pd.api.types.infer_dtype(values, skipna=True) in ("datetime", "date", "mixed"):
+                    batch = batch.assign(**{column: values.map(format_load_db_value)})
+        batch = batch.astype(object).where(batch.notna(), None)
+        connection.executemany(insert_sql, ((RUN_ID, source_file, *row) for row in batch.itertuples(index=False, name=None)))
+    return len(df)
+
+def save_sqlite_file(df, output_path, config_key=None, extra_sheets=None, compression=None, dataset=None):
+    """
+    Запись DataFrame и дополнительных листов в базу LoadDB (SQLite)
+
+    База одна на все запуски (LOAD_DB_FILE в папке выходного файла), таблица
+    задается load_db_table в настройках обработки, дополнительные листы пишутся
+    в таблицы <таблица>_<лист>. Каждая строка получает run_id запуска и имя
+    файла результата (source_file): повторная запись заменяет только строки того же
+    файла, остальные файлы запуска в той же таблице сохраняются. Запись выполняется
+    в одной транзакции; прошлые запуски остаются для исторических запросов.
+
+    Args:
+        df (pd.DataFrame): DataFrame листа DATA
+        output_path (str): Путь к выходному файлу Excel (используется папка)
+        config_key (str, optional): Ключ конфигурации (имя таблицы)
+        extra_sheets (dict, optional): Дополнительные листы данных {имя листа: DataFrame}
+        compression (str, optional): Не используется, для единой сигнатуры
+        dataset (str, optional): Вид данных конвертера - таблица <таблица>_<dataset>
+            (например reward_leaders для лидеров наград рядом с профилями в reward)
+
+    Returns:
+        list: Путь к базе
+    """
+    _, processing_config = get_processing_config(config_key)
+    table_name = processing_config.get("load_db_table") or config_key or "data"
+    if dataset:
+        table_name = f"{table_name}_{dataset}"
+    source_file = os.path.basename(output_path)
+    db_path = os.path.join(os.path.dirname(output_path), LOAD_DB_FILE + FILE_EXTENSIONS["SQLITE"])
+    tables = {table_name: df}
+    for sheet_name, sheet_df in (extra_sheets or {}).items():
+        tables[f"{table_name}_{sheet_name.lower()}"] = sheet_df
+
+    start_time = time.perf_counter()
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS load_runs (run_id TEXT NOT NULL, table_name TEXT NOT NULL, "
+                "source_file TEXT NOT NULL, rows INTEGER, loaded_at TEXT, PRIMARY KEY (run_id, table_name, source_file))"
+            )
+            for name, table_df in tables.items():
+                prepare_load_db_table(connection, name, table_df)
+                rows = insert_load_db_rows(connection, name, table_df, source_file)
+                connection.execute(
+                    "INSERT OR REPLACE INTO load_runs VALUES (?, ?, ?, ?, ?)",
+                    (RUN_ID, name, source_file, rows,
+                     datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                )
+                logger.info(LOG_MESSAGES['load_db_table_saved'].format(
+                    table=name, rows=rows, run_id=RUN_ID, seconds=time.perf_counter() - start_time
+                ))
+    finally:
+        connection.close()
+    return [db_path]
+
+def save_output_files(df, output_excel_path, config_key=None, extra_sheets=None, source_path=None, dataset=None):
+    """
+    Сохранение результата конвертации или постановка в очередь обогащения
+
+    При EMPLOYEE_ENRICHMENT_SETTINGS["enabled"] внутри этапа 2 main() (открыт пакет
+    begin_enrichment_batch()) запись откладывается до save_enriched_outputs();
+    вне пакета результат обогащается измерением по нему самому и записывается сразу.
+
+    Args:
+        df (pd.DataFrame): DataFrame листа DATA
+        output_excel_path (str): Путь к выходному файлу Excel
+        config_key (str, optional): Ключ конфигурации
+        extra_sheets (dict, optional): Дополнительные листы данных {имя листа: DataFrame}
+        source_path (str, optional): Входной JSON (время выгрузки для разрешения конфликтов)
+        dataset (str, optional): Вид данных конвертера (отдельная таблица LoadDB, например "leaders")
+
+    Returns:
+        bool: True если результат сохранен или поставлен в очередь
+    """
+    if EMPLOYEE_ENRICHMENT_SETTINGS.get("enabled"):
+        PENDING_ENRICHMENT_OUTPUTS.append({
+            "df": df,
+            "output_excel_path": output_excel_path,
+            "config_key": config_key,
+            "extra_sheets": extra_sheets,
+            "snapshot_time": get_snapshot_time(source_path),
+            "dataset": dataset
+        })
+        if not enrichment_batch_open:
+            return save_enriched_outputs()
+        logger.info(LOG_MESSAGES['employee_enrichment_queued'].format(file_path=output_excel_path))
+        return True
+    return write_output_files(df, output_excel_path, config_key, extra_sheets, dataset)
+
+def write_output_files(df, output_excel_path, config_key=None, extra_sheets=None, dataset=None):
+    """
+    Сохранение результата конвертации во все форматы из output_formats
+
+    XLSX - один из форматов: если в настройках указаны только csv/parquet/feather,
+    дорогая запись Excel не выполняется.
+
+    Args:
+        df (pd.DataFrame): DataFrame листа DATA
+        output_excel_path (str): Путь к выходному файлу Excel (для остальных форматов меняется расширение)
+        config_key (str, optional): Ключ конфигурации
+        extra_sheets (dict, optional): Дополнительные листы данных {имя листа: DataFrame}
+        dataset (str, optional): Вид данных конвертера (отдельная таблица LoadDB)
+
+    Returns:
+        bool: True если все форматы сохранены успешно, False в противном случае
+    """
+    _, processing_config = get_processing_config(config_key)
+    output_formats = processing_config.get("output_formats") or ["xlsx"]
+    compression = processing_config.get("output_compression")
+    success = True
+
+    for output_format in output_formats:
+        if output_format == "xlsx":
+            success = save_excel_file(df, output_excel_path, config_key, extra_sheets) and success
+            continue
+
+        sink = OUTPUT_SINKS.get(output_format)
+        if sink is None:
+            logger.error(LOG_MESSAGES['output_sink_unknown'].format(format=output_format))
+            success = False
+            continue
+        if sink["library"] and importlib.util.find_spec(sink["library"]) is None:
+            logger.error(LOG_MESSAGES['output_sink_unavailable'].format(format=output_format, library=sink["library"]))
+            success = False
+            continue
+
+        try:
+            for path in sink["function"](df, output_excel_path, config_key, extra_sheets, compression, dataset):
+                logger.info(LOG_MESSAGES['output_sink_saved'].format(
+                    format=output_format,
+                    file_path=path,
+                    size=f"{os.path.getsize(path) / (1024 * 1024):.2f} МБ"
+                ))
+        except Exception as e:
+            logger.error(LOG_MESSAGES['output_sink_error'].format(format=output_format, error=e))
+            success = False
+
+    return success
+
+# Форматы вывода помимо XLSX: функция записи и библиотека, без которой формат недоступен
+OUTPUT_SINKS = {
+    "csv": {"function": save_csv_file, "library": None},
+    "parquet": {"function": save_parquet_file, "library": "pyarrow"},
+    "feather": {"function": save_feather_file, "library": "pyarrow"},
+    "sqlite": {"function": save_sqlite_file, "library": None}
+}
+
+# Результаты, ожидающие обогащения атрибутами сотрудников (EMPLOYEE_ENRICHMENT_SETTINGS)
+PENDING_ENRICHMENT_OUTPUTS = []
+enrichment_batch_open = False  # Открыт пакет этапа 2 main(): запись откладывается до save_enriched_outputs()
+
+def begin_enrichment_batch():
+    """Начало пакета этапа 2: результаты копятся в очереди до save_enriched_outputs()"""
+    global enrichment_batch_open
+    enrichment_batch_open = True
+
+def is_output_pending(output_excel_path):
+    """Результат поставлен в очередь обогащения и еще не записан"""
+    return any(entry["output_excel_path"] == output_excel_path for entry in PENDING_ENRICHMENT_OUTPUTS)
+
+# Время выгрузки в имени JSON файла (например leadersForAdmin_SIGMA_20250728-013758)
+SNAPSHOT_TIME_RE = re.compile(r'(\d{8}-\d{6})')
+
+def get_snapshot_time(source_path):
+    """Время выгрузки: из имени файла, иначе время изменения файла; 0 если неизвестно"""
+    if not source_path:
+        return 0.0
+    match = SNAPSHOT_TIME_RE.search(os.path.basename(source_path))
+    if match:
+        return datetime.datetime.strptime(match.group(1), '%Y%m%d-%H%M%S').timestamp()
+    try:
+        return os.path.getmtime(source_path)
+    except OSError:
+        return 0.0
+
+def build_employee_dimension(entries, key, attributes):
+    """
+    Измерение сотрудников по всем результатам запуска
+
+    Строки всех наборов сортируются от самой свежей выгрузки к старой, после чего
+    groupby().first() берет для каждого атрибута первое непустое значение -
+    конфликты разрешаются в пользу последней выгрузки, пропуски добираются из старых.
+
+    Returns:
+        pd.DataFrame: атрибуты с уникальным индексом key (пустой, если данных нет)
+    """
+    parts = []
+    for order, entry in enumerate(entries):
+        df = entry["df"]
+        columns = [column for column in attributes if column in df.columns]
+        if key not in df.columns or not columns:
+            continue
+        values = df[columns].astype(object)
+        part = values.where(values.notna() & (values != ''))
+        part.insert(0, key, normalize_snapshot_keys(df, [key])[key])
+        part["_snapshot_time"] = entry["snapshot_time"]
+        part["_source_order"] = order
+        parts.append(part[part[key] != ''])
+
+    if not parts:
+        return pd.DataFrame(columns=attributes, index=pd.Index([], name=key))
+
+    combined = pd.concat(parts, ignore_index=True)
+    combined = combined.sort_values(["_snapshot_time", "_source_order"], ascending=False, kind="stable")
+    columns = [column for column in attributes if column in combined.columns]
+    return combined.groupby(key, sort=True)[columns].first()
+
+def enrich_with_employee_dimension(df, dimension, key, prefix):
+    """
+    Присоединение атрибутов измерения к таблице фактов одной векторной операцией
+
+    Поиск по уникальному индексу измерения (reindex) сохраняет порядок строк df.
+    С пустым prefix значения измерения заменяют собственные колонки (непустые
+    собственные значения остаются там, где сотрудника нет в измерении).
+
+    Returns:
+        tuple: (DataFrame, количество строк с найденным сотрудником, добавленные колонки)
+    """
+    keys = normalize_snapshot_keys(df, [key])[key]
+    attached = dimension.reindex(keys.to_numpy())
+    attached.index = df.index
+    matched = int(keys.isin(dimension.index).sum())
+
+    df = df.copy()
+    columns = []
+    for attribute in dimension.columns:
+        target = f"{prefix}{attribute}"
+        values = attached[attribute]
+        if target in df.columns:
+            values = values.where(values.notna(), df[target].astype(object))
+        df[target] = values
+        columns.append(target)
+    return df, matched, columns
+
+@measure_time
+def save_enriched_outputs():
+    """
+    Построение измерения сотрудников и сохранение отложенных результатов, закрытие пакета
+
+    Returns:
+        bool: True если все отложенные результаты сохранены
+    """
+    global enrichment_batch_open
+    enrichment_batch_open = False
+    if not PENDING_ENRICHMENT_OUTPUTS:
+        return True
+    key = EMPLOYEE_ENRICHMENT_SETTINGS.get("key", "employeeNumber")
+    attributes = EMPLOYEE_ENRICHMENT_SETTINGS.get("attributes") or []
+    prefix = EMPLOYEE_ENRICHMENT_SETTINGS.get("prefix", "")
+
+    dimension = build_employee_dimension(PENDING_ENRICHMENT_OUTPUTS, key, attributes)
+    logger.info(LOG_MESSAGES['employee_dimension_built'].format(
+        employees=len(dimension),
+        attributes=", ".join(dimension.columns),
+        sources=len(PENDING_ENRICHMENT_OUTPUTS)
+    ))
+
+    success = True
+    while PENDING_ENRICHMENT_OUTPUTS:
+        entry = PENDING_ENRICHMENT_OUTPUTS.pop(0)
+        df = entry["df"]
+        if key in df.columns:
+            df, matched, columns = enrich_with_employee_dimension(df, dimension, key, prefix)
+            logger.info(LOG_MESSAGES['employee_enrichment_done'].format(
+                file_path=entry["output_excel_path"], matched=matched, rows=len(df), columns=", ".join(columns)))
+        else:
+            logger.warning(LOG_MESSAGES['employee_enrichment_no_key'].format(file_path=entry["output_excel_path"], key=key))
+        saved = write_output_files(df, entry["output_excel_path"], entry["config_key"], entry["extra_sheets"], entry["dataset"])
+        if not saved:
+            logger.error(LOG_MESSAGES['employee_enrichment_write_failed'].format(file_path=entry["output_excel_path"]))
+        success = saved and success
+    return success
+
+# Порядок статусов строк листа DIFF
+SNAPSHOT_DIFF_STATUSES = ["changed", "new", "dropped", "unchanged"]
+
+def normalize_snapshot_keys(df, keys):
+    """
+    Ключи снимка в текстовом виде для соединения снимков из разных источников
+
+    Числовые ключи (например employeeNumber, прочитанный из LoadDB как INTEGER)
+    и текстовые ('123') приводятся к одному виду, пропуски - к пустой строке.
+    """
+    normalized = pd.DataFrame(index=df.index)
+    for key in keys:
+        series = df[key]
+        if pd.api.types.is_numeric_dtype(series):
+            numbers = pd.to_numeric(series, errors='coerce')
+            if (numbers.dropna() == np.floor(numbers.dropna())).all():
+                series = numbers.astype("Int64")
+        normalized[key] = series.astype(object).where(series.notna(), '').astype(str)
+    return normalized
+
+def load_previous_snapshot(config_key, diff_config):
+    """
+    Загрузка предыдущего снимка: из JSON выгрузки (previous_json_file) или
+    последнего прошлого запуска в LoadDB (таблица load_db_table)
+
+    Returns:
+        tuple: (DataFrame, описание источника) или (None, None)
+    """
+    previous_json_file = diff_config.get("previous_json_file")
+    if previous_json_file:
+        json_path = os.path.join(BASE_DIR, SUBDIRECTORIES["JSON"], f"{previous_json_file}{FILE_EXTENSIONS['JSON']}")
+        if not os.path.exists(json_path):
+            logger.warning(LOG_MESSAGES['json_file_not_found'].format(file_path=json_path))
+            return None, None
+        builder = SNAPSHOT_FRAME_BUILDERS.get(config_key)
+        frame = builder(json_path, config_key) if builder else None
+        if isinstance(frame, tuple):
+            frame = frame[0]
+        return frame, os.path.basename(json_path)
+
+    _, processing_config = get_processing_config(config_key)
+    table_name = processing_config.get("load_db_table") or config_key
+    db_path = os.path.join(BASE_DIR, SUBDIRECTORIES["OUTPUT"], LOAD_DB_FILE + FILE_EXTENSIONS["SQLITE"])
+    if not os.path.exists(db_path):
+        return None, None
+    connection = sqlite3.connect(db_path)
+    try:
+        previous_run = connection.execute(
+            "SELECT max(run_id) FROM load_runs WHERE table_name = ? AND run_id < ?", (table_name, RUN_ID)
+        ).fetchone()[0]
+        if previous_run is None:
+            return None, None
+        frame = pd.read_sql_query(
+            f"SELECT * FROM {quote_sql_identifier(table_name)} WHERE run_id = ?", connection, params=(previous_run,)
+        )
+    finally:
+        connection.close()
+    return frame.drop(columns=["run_id", "source_file"], errors="ignore"), f"LoadDB {table_name} run_id {previous_run}"
+
+def compute_snapshot_diff(current, previous, keys, metrics, columns=None, top_movers=20):
+    """
+    Сравнение двух снимков: хеш-соединение по ключам, изменения показателей,
+    новые и выбывшие участники, лидеры роста и падения
+
+    Args:
+        current (pd.DataFrame): Текущий снимок
+        previous (pd.DataFrame): Предыдущий снимок
+        keys (list): Колонки ключа (например employeeNumber, tournamentId)
+        metrics (list): [{"column", "lower_is_better"}] - первый показатель задает лидеров изменения
+        columns (list, optional): Описательные колонки (fullName, terDivisionName)
+        top_movers (int): Количество строк в каждом направлении листа DIFF_TOP
+
+    Returns:
+        tuple: (DataFrame DIFF без неизменившихся строк, DataFrame DIFF_TOP, {статус: количество})
+    """
+    metrics = [metric for metric in metrics if metric["column"] in current.columns or metric["column"] in previous.columns]
+    columns = [column for column in (columns or []) if column in current.columns or column in previous.columns]
+
+    def prepare(df, snapshot):
+        frame = normalize_snapshot_keys(df, keys)
+        for column in columns:
+            frame[column] = df[column].astype(object) if column in df.columns else None
+        for metric in metrics:
+            column = metric["column"]
+            frame[column] = pd.to_numeric(df[column], errors='coerce') if column in df.columns else np.nan
+        # Строки с пустым ключом не сопоставимы между снимками, при повторе ключа берется первая строка
+        empty = (frame[keys].apply(lambda values: values.str.strip()) == '').any(axis=1)
+        frame = frame[~empty]
+        duplicated = frame.duplicated(subset=keys, keep="first")
+        if empty.any() or duplicated.any():
+            logger.warning(LOG_MESSAGES['snapshot_diff_keys_skipped'].format(
+                snapshot=snapshot, empty=int(empty.sum()), duplicates=int(duplicated.sum())
+            ))
+        return frame[~duplicated]
+
+    merged = prepare(current, "текущий").merge(
+        prepare(previous, "предыдущий"), on=keys, how="outer", suffixes=("", "_prev"), indicator=True, sort=False
+    )
+    for column in columns:
+        merged[column] = merged[column].where(merged[column].notna(), merged.pop(f"{column}_prev"))
+
+    both = merged["_merge"] == "both"
+    changed = np.zeros(len(merged), dtype=bool)
+    result = merged[keys + columns].copy()
+    for metric in metrics:
+        column = metric["column"]
+        current_values, previous_values = merged[column], merged[f"{column}_prev"]
+        result[f"{column}_prev"] = previous_values
+        result[column] = current_values
+        result[f"{column}_delta"] = current_values - previous_values
+        # Сравнение по float: nullable Int64 с NA дает NA вместо bool
+        current_array = current_values.to_numpy(dtype=float, na_value=np.nan)
+        previous_array = previous_values.to_numpy(dtype=float, na_value=np.nan)
+        same = (current_array == previous_array) | (np.isnan(current_array) & np.isnan(previous_array))
+        changed |= both.to_numpy() & ~same
+
+    status = np.select(
+        [merged["_merge"] == "left_only", merged["_merge"] == "right_only", changed],
+        ["new", "dropped", "changed"], default="unchanged"
+    )
+    result.insert(len(keys) + len(columns), "status", status)
+    counts = {name: int((status == name).sum()) for name in SNAPSHOT_DIFF_STATUSES}
+
+    top = result.iloc[0:0]
+    if metrics:
+        primary = metrics[0]
+        # Улучшение - положительное значение movement (для мест - уменьшение номера места)
+        movement = result[f"{primary['column']}_delta"] * (-1 if primary.get("lower_is_better") else 1)
+        result["movement"] = movement
+        moved = result[result["status"] == "changed"].dropna(subset=["movement"])
+        top = pd.concat([
+            moved.nlargest(top_movers, "movement").loc[lambda frame: frame["movement"] > 0],
+            moved.nsmallest(top_movers, "movement").loc[lambda frame: frame["movement"] < 0]
+        ])
+        order = np.lexsort((-movement.abs().fillna(-1).to_numpy(), pd.Categorical(status, SNAPSHOT_DIFF_STATUSES).codes))
+    else:
+        order = np.argsort(pd.Categorical(status, SNAPSHOT_DIFF_STATUSES).codes, kind="stable")
+    diff = result.iloc[order]
+    diff = diff[diff["status"] != "unchanged"].reset_index(drop=True)
+    return diff, top.reset_index(drop=True), counts
+
+def add_snapshot_diff(df, config_key, output_excel_path, extra_sheets=None):
+    """
+    Сравнение результата конвертации с предыдущим снимком (snapshot_diff в настройках обработки)
+
+    Результат - листы DIFF / DIFF_TOP в дополнительных листах или файлы
+    <имя>_DIFF.parquet / <имя>_DIFF_TOP.parquet (output = "parquet").
+
+    Args:
+        df (pd.DataFrame): Текущий снимок (лист DATA)
+        config_key (str): Ключ конфигурации
+        output_excel_path (str): Путь к выходному файлу Excel
+        extra_sheets (dict, optional): Дополнительные листы данных
+
+    Returns:
+        dict: Дополнительные листы (с DIFF / DIFF_TOP при выводе в книгу)
+    """
+    _, processing_config = get_processing_config(config_key)
+    diff_config = processing_config.get("snapshot_diff", {})
+    if not diff_config.get("enabled"):
+        return extra_sheets
+
+    start_time = time.perf_counter()
+    keys = diff_config.get("keys", [])
+    missing_keys = [key for key in keys if key not in df.columns]
+    if not keys or missing_keys:
+        logger.warning(LOG_MESSAGES['snapshot_diff_keys_missing'].format(keys=", ".join(missing_keys or ["-"])))
+        return extra_sheets
+    previous, source = load_previous_snapshot(config_key, diff_config)
+    if previous is None or any(key not in previous.columns for key in keys):
+        logger.warning(LOG_MESSAGES['snapshot_diff_no_previous'].format(config_key=config_key))
+        return extra_sheets
+
+    diff, top, counts = compute_snapshot_diff(
+        df, previous, keys, diff_config.get("metrics", []), diff_config.get("columns"), diff_config.get("top_movers", 20)
+    )
+    logger.info(LOG_MESSAGES['snapshot_diff_done'].format(
+        source=source, seconds=time.perf_counter() - start_time, **counts
+    ))
+
+    if diff_config.get("output") == "parquet" and importlib.util.find_spec("pyarrow") is not None:
+        diff_path = f"{os.path.splitext(output_excel_path)[0]}_DIFF{FILE_EXTENSIONS['EXCEL']}"
+        for path in save_parquet_file(diff, diff_path, config_key, {"TOP": top}):
+            logger.info(LOG_MESSAGES['output_sink_saved'].format(
+                format="parquet", file_path=path, size=f"{os.path.getsize(path) / (1024 * 1024):.2f} МБ"
+            ))
+        return extra_sheets
+    return {**(extra_sheets or {}), "DIFF": diff, "DIFF_TOP": top}
+
+# Функции агрегирования (EMPLOYEE_ROLLUP, сводные листы), для которых колонка приводится к числу
+EMPLOYEE_ROLLUP_NUMERIC_FUNCTIONS = {"sum", "mean", "median", "min", "max", "std", "var"}
+
+def handle_empty_keys(source, keys, config):
+    """
+    Пустые ключи группировки (NaN и config["empty_values"], по умолчанию "") перед сводкой
+
+    С config["empty_label"] пустые ключи заменяются подписью, без подписи строки
+    с пустым ключом отбрасываются (иначе получаются строка-"сотрудник" без номера
+    и колонки вида crystals_ / crystals_0).
+
+    Args:
+        source (pd.DataFrame): Узкий DataFrame сводки
+        keys (list): Колонки ключей
+        config (dict): Настройки сводки (empty_values, empty_label)
+
+    Returns:
+        pd.DataFrame: DataFrame без пустых ключей
+    """
+    empty_values = list(config.get("empty_values", [""]))
+    empty_label = config.get("empty_label", "")
+    empty_rows = pd.Series(False, index=source.index)
+    for key in keys:
+        empty = source[key].isna() | source[key].isin(empty_values)
+        if not empty.any():
+            continue
+        if empty_label:
+            source[key] = source[key].astype(object).mask(empty, empty_label)
+        else:
+            empty_rows |= empty
+    return source[~empty_rows]
+
+def compute_employee_rollup(df, rollup_config):
+    """
+    Сводка по сотрудникам одной группировкой groupby().agg() с именованными агрегатами
+
+    С pivot_column группировка выполняется по keys + pivot_column, затем показатели
+    разворачиваются в колонки <результат>_<значение> (например crystals_ACTIVESEASON).
+    Пустые ключи и значения pivot_column обрабатываются handle_empty_keys().
+
+    Returns:
+        pd.DataFrame: сводка (None, если нет ключей группировки)
+    """
+    keys = [key for key in rollup_config.get("keys", ["employeeNumber"]) if key in df.columns]
+    if not keys:
+        return None
+    pivot = rollup_config.get("pivot_column") or None
+    if pivot not in df.columns:
+        pivot = None
+    group_keys = keys + ([pivot] if pivot else [])
+
+    columns = [column for column in rollup_config.get("columns", []) if column in df.columns and column not in group_keys]
+    aggregations = {}
+    missing = []
+    for result, (column, function) in rollup_config.get("aggregations", {}).items():
+        if column in df.columns:
+            aggregations[result] = (column, function)
+        else:
+            missing.append(column)
+    if missing:
+        logger.warning(LOG_MESSAGES['employee_rollup_columns_missing'].format(columns=", ".join(dict.fromkeys(missing))))
+
+    # Узкий DataFrame только с нужными колонками; числовые агрегаты - по числам
+    source = df[list(dict.fromkeys(group_keys + columns + [column for column, _ in aggregations.values()]))].copy()
+    for column, function in aggregations.values():
+        if function in EMPLOYEE_ROLLUP_NUMERIC_FUNCTIONS:
+            source[column] = pd.to_numeric(source[column], errors='coerce')
+    source = handle_empty_keys(source, group_keys, rollup_config)
+
+    named = {column: (column, "first") for column in columns}
+    named.update(aggregations)
+    rollup = source.groupby(group_keys, sort=True, observed=True).agg(**named)
+
+    if pivot:
+        metrics = rollup[list(aggregations)].unstack(pivot)
+        metrics.columns = [f"{result}_{value}" for result, value in metrics.columns]
+        rollup = rollup[columns].groupby(level=keys, sort=True).first().join(metrics)
+    return rollup.reset_index()
+
+def add_employee_rollup(df, config_key, extra_sheets=None):
+    """
+    Лист EMPLOYEE_ROLLUP (employee_rollup в настройках обработки)
+
+    Args:
+        df (pd.DataFrame): Плоский DataFrame (лист DATA)
+        config_key (str): Ключ конфигурации
+        extra_sheets (dict, optional): Дополнительные листы данных
+
+    Returns:
+        dict: Дополнительные листы (с EMPLOYEE_ROLLUP при включенной сводке)
+    """
+    _, processing_config = get_processing_config(config_key)
+    rollup_config = processing_config.get("employee_rollup", {})
+    if not rollup_config.get("enabled"):
+        return extra_sheets
+
+    start_time = time.perf_counter()
+    rollup = compute_employee_rollup(df, rollup_config)
+    if rollup is None:
+        return extra_sheets
+    logger.info(LOG_MESSAGES['employee_rollup_done'].format(
+        rows=len(rollup), columns=len(rollup.columns), seconds=time.perf_counter() - start_time
+    ))
+    return {**(extra_sheets or {}), "EMPLOYEE_ROLLUP": rollup}
+
+def compute_pivot_sheet(df, pivot_config):
+    """
+    Сводная таблица листа: crosstab (без values - количество строк) или pivot_table
+
+    Колонки результата - <показатель>_<значение columns> (несколько колонок
+    columns соединяются через "_"), с margins - итоги "Итого". Для каждого
+    показателя один pivot_table, результаты соединяются по индексу. Пустые
+    ключи (NaN и empty_values) подписываются empty_label, без подписи строки
+    с пустыми ключами отбрасываются.
+
+    Returns:
+        pd.DataFrame: сводная таблица с колонками index в начале
+    """
+    index = list(pivot_config.get("index", []))
+    columns = list(pivot_config.get("columns", []))
+    values = pivot_config.get("values") or {}
+    margins = bool(pivot_config.get("margins"))
+
+    # Узкий DataFrame: ключи в object (без пустых категорий), числовые агрегаты - по числам
+    source = pd.DataFrame({key: df[key].astype(object) for key in dict.fromkeys(index + columns)})
+    source = handle_empty_keys(source, list(source.columns), pivot_config)
+    for column, function in values.values():
+        if column not in source.columns:
+            source[column] = pd.to_numeric(df[column], errors='coerce') if function in EMPLOYEE_ROLLUP_NUMERIC_FUNCTIONS else df[column]
+
+    if not values:
+        pivot = pd.crosstab(
+            [source[key] for key in index],
+            [source[key] for key in columns] if columns else pd.Series("count", index=source.index, name=""),
+            margins=margins, margins_name="Итого"
+        )
+        if not columns:
+            return pivot[["count"]].reset_index()
+        pivot.columns = ["count_" + "_".join(map(str, value)) if isinstance(value, tuple) else f"count_{value}" for value in pivot.columns]
+        return pivot.reset_index()
+
+    # Отдельный pivot_table на показатель: итоги margins поддерживаются только для одной функции
+    parts = []
+    for result, (column, function) in values.items():
+        pivot = pd.pivot_table(
+            source, index=index, columns=columns or None, values=column, aggfunc=function,
+            margins=margins, margins_name="Итого", observed=True, sort=True
+        )
+        if isinstance(pivot, pd.Series):
+            pivot = pivot.to_frame(result)
+        elif columns:
+            pivot.columns = [f"{result}_" + ("_".join(map(str, value)) if isinstance(value, tuple) else str(value)) for value in pivot.columns]
+        else:
+            pivot.columns = [result]
+        parts.append(pivot)
+    return pd.concat(parts, axis=1).reset_index()
+
+def add_pivot_sheets(df, config_key, extra_sheets=None):
+    """
+    Сводные листы из pivot_sheets в настройках обработки
+
+    Сводные считаются в конвейере и записываются статичными значениями,
+    чтобы книга не пересчитывала сводные таблицы по листу DATA при открытии.
+
+    Args:
+        df (pd.DataFrame): Плоский DataFrame (лист DATA)
+        config_key (str): Ключ конфигурации
+        extra_sheets (dict, optional): Дополнительные листы данных
+
+    Returns:
+        dict: Дополнительные листы (со сводными листами)
+    """
+    _, processing_config = get_processing_config(config_key)
+    pivot_settings = processing_config.get("pivot_sheets", {})
+    if not pivot_settings.get("enabled"):
+        return extra_sheets
+
+    extra_sheets = dict(extra_sheets or {})
+    for pivot_config in pivot_settings.get("sheets", []):
+        sheet = pivot_config.get("sheet", "PIVOT")[:31]
+        required = list(pivot_config.get("index", [])) + list(pivot_config.get("columns", [])) + [
+            column for column, _ in (pivot_config.get("values") or {}).values()
+        ]
+        missing = [column for column in dict.fromkeys(required) if column not in df.columns]
+        if not pivot_config.get("index") or missing:
+            logger.warning(LOG_MESSAGES['pivot_sheet_columns_missing'].format(sheet=sheet, columns=", ".join(missing or ["index"])))
+            continue
+
+        start_time = time.perf_counter()
+        pivot = compute_pivot_sheet(df, pivot_config)
+        extra_sheets[sheet] = pivot
+        logger.info(LOG_MESSAGES['pivot_sheet_done'].format(
+            sheet=sheet, rows=len(pivot), columns=len(pivot.columns), seconds=time.perf_counter() - start_time
+        ))
+    return extra_sheets
 
-def apply_cell_formatting(workbook, df, config_key=None):
+def extract_leaders_rows(json_data):
     """
-    Применение форматирования ячеек в Excel
-    
+    Извлечение лидеров всех турниров из выгрузки LeadersForAdmin и преобразование в плоские строки
+
     Args:
-        workbook: Объект рабочей книги Excel
-        df (DataFrame): DataFrame с данными
-        config_key (str, optional): Ключ конфигурации для получения настроек
+        json_data (dict): Выгрузка {tournamentId: [страницы ответа API]} или ее часть
+
+    Returns:
+        dict: {"rows": плоские строки, "tournaments": турниров, "leaders": лидеров}
     """
-    from openpyxl.styles import NamedStyle
-    from openpyxl.utils import get_column_letter
+    rows = []
+    total_tournaments = 0
+    total_leaders = 0
+    
+    for tournament_key, tournament_value in json_data.items():
+        if isinstance(tournament_value, list) and len(tournament_value) > 0:
+            # Проверяем, содержит ли первый элемент данные о турнире
+            first_item = tournament_value[0]
+            if isinstance(first_item, dict) and 'body' in first_item:
+                body = first_item['body']
+                if 'tournament' in body:
+                    tournament = body['tournament']
+                    if 'leaders' in tournament:
+                        tournament_leaders = tournament['leaders']
+                        if tournament_leaders:
+                            # Добавляем информацию о турнире к каждому лидеру
+                            for leader in tournament_leaders:
+                                leader_with_tournament = leader.copy()
+                                leader_with_tournament['tournamentId'] = tournament.get('tournamentId', tournament_key)
+                                leader_with_tournament['tournamentIndicator'] = tournament.get('tournamentIndicator', '')
+                                leader_with_tournament['tournamentStatus'] = tournament.get('status', '')
+                                leader_with_tournament['contestants'] = tournament.get('contestants', '')
+                                rows.append(flatten_leader_data(leader_with_tournament))
+                            
+                            total_tournaments += 1
+                            total_leaders += len(tournament_leaders)
+                            logger.debug(LOG_MESSAGES['json_leaders_found'].format(key=tournament_key, count=len(tournament_leaders)))
     
-    try:
-        # Получаем настройки форматирования из конфигурации
-        column_settings = {}
-        if config_key and config_key in FUNCTION_CONFIGS:
-            config = FUNCTION_CONFIGS[config_key]
-            if config_key == "reward" and "reward_processing" in config:
-                column_settings = config["reward_processing"].get("column_settings", {})
-            elif config_key == "leaders_for_admin" and "leaders_processing" in config:
-                column_settings = config["leaders_processing"].get("column_settings", {})
-        
-        if not column_settings:
-            return
-        
-        # Получаем лист DATA
-        worksheet = workbook['DATA']
-        
-        # Создаем стили для форматирования
-        number_style = NamedStyle(name="number_style")
-        number_style.number_format = '#,##0'
-        
-        float_style = NamedStyle(name="float_style")
-        float_style.number_format = '#,##0.00'
-        
-        date_style = NamedStyle(name="date_style")
-        date_style.number_format = 'YYYY-MM-DD'
-        
-        # Применяем форматирование к числовым колонкам
-        numeric_conversions = column_settings.get('numeric_conversions', {})
-        for group_name, group_settings in numeric_conversions.items():
-            fields = group_settings.get('fields', [])
-            conversion_type = group_settings.get('type', 'integer')
-            decimal_places = group_settings.get('decimal_places', 2)
-            
-            for column in fields:
-                if column in df.columns:
-                    col_idx = df.columns.get_loc(column) + 1  # +1 потому что Excel начинается с 1
-                    col_letter = get_column_letter(col_idx)
-                    
-                    if conversion_type == 'integer':
-                        # Применяем целочисленный формат
-                        for row in range(2, len(df) + 2):  # +2 потому что Excel начинается с 1 и есть заголовок
-                            cell = worksheet[f'{col_letter}{row}']
-                            cell.style = number_style
-                    elif conversion_type == 'float':
-                        # Применяем дробный формат
-                        float_style.number_format = f'#,##0.{"0" * decimal_places}'
-                        for row in range(2, len(df) + 2):
-                            cell = worksheet[f'{col_letter}{row}']
-                            cell.style = float_style
-        
-        # Применяем форматирование к датам
-        date_conversions = column_settings.get('date_conversions', {})
-        for column, settings in date_conversions.items():
-            if column in df.columns:
-                col_idx = df.columns.get_loc(column) + 1
-                col_letter = get_column_letter(col_idx)
-                
-                # Применяем формат даты
-                for row in range(2, len(df) + 2):
-                    cell = worksheet[f'{col_letter}{row}']
-                    cell.style = date_style
-        
-        # Применяем форматирование к новым колонкам (с суффиксами)
-        for column in df.columns:
-            if column.endswith('_numeric'):
-                col_idx = df.columns.get_loc(column) + 1
-                col_letter = get_column_letter(col_idx)
-                
-                # Определяем тип по исходной колонке
-                original_column = column.replace('_numeric', '')
-                
-                # Ищем исходную колонку в группах
-                found_conversion_type = None
-                found_decimal_places = 2
-                
-                for group_name, group_settings in numeric_conversions.items():
-                    fields = group_settings.get('fields', [])
-                    if original_column in fields:
-                        found_conversion_type = group_settings.get('type', 'integer')
-                        found_decimal_places = group_settings.get('decimal_places', 2)
-                        break
-                
-                if found_conversion_type:
-                    if found_conversion_type == 'integer':
-                        for row in range(2, len(df) + 2):
-                            cell = worksheet[f'{col_letter}{row}']
-                            cell.style = number_style
-                    elif found_conversion_type == 'float':
-                        float_style.number_format = f'#,##0.{"0" * found_decimal_places}'
-                        for row in range(2, len(df) + 2):
-                            cell = worksheet[f'{col_letter}{row}']
-                            cell.style = float_style
-            
-            elif column.endswith('_formatted'):
-                col_idx = df.columns.get_loc(column) + 1
-                col_letter = get_column_letter(col_idx)
-                
-                # Применяем формат даты к отформатированным колонкам
-                for row in range(2, len(df) + 2):
-                    cell = worksheet[f'{col_letter}{row}']
-                    cell.style = date_style
-                    
-    except Exception as e:
-        logger.warning(f"Ошибка при применении форматирования ячеек: {e}")
+    return {"rows": rows, "tournaments": total_tournaments, "leaders": total_leaders}
 
-def save_excel_file(df, output_excel_path, config_key=None):
+def build_leaders_frame(input_json_path, config_key=None):
     """
-    Общая функция для сохранения DataFrame в Excel с применением стилей
-    
+    Разбор выгрузки LeadersForAdmin в итоговый DataFrame (места, типы, настройки колонок)
+
     Args:
-        df (DataFrame): DataFrame для сохранения
-        output_excel_path (str): Путь к выходному Excel файлу
+        input_json_path (str): Путь к входному JSON файлу
         config_key (str, optional): Ключ конфигурации для получения настроек
-        
+
     Returns:
-        bool: True если сохранение успешно, False в противном случае
+        tuple: (DataFrame листа DATA, дополнительные листы) или None, если данных нет
     """
-    try:
-        # Создание директории для выходного файла если не существует
-        output_dir = os.path.dirname(output_excel_path)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            logger.info(LOG_MESSAGES['json_directory_created'].format(directory=output_dir))
-        
-        # Создание Excel файла
-        filename = os.path.basename(output_excel_path)
-        rows, cols = df.shape
+    # Параллельный разбор крупной выгрузки по диапазонам ключей
+    extracted = extract_json_in_parallel(input_json_path, config_key, extract_leaders_rows)
+    
+    if extracted is None:
+        # Загрузка JSON данных
+        json_data = load_json_data(input_json_path, get_photo_data_mode(config_key) == "skip")
+        if json_data is None:
+            return None
         
-        # Оценка времени обработки (примерно 0.1 секунды на 1000 строк)
-        estimated_seconds = max(1, (rows * cols) / 10000)  # Минимум 1 секунда
-        if estimated_seconds < 60:
-            estimated_time = f"{estimated_seconds:.1f} сек"
+        # Обработка данных
+        logger.info(LOG_MESSAGES['json_data_processing'])
+        if isinstance(json_data, dict):
+            # Обрабатываем все турниры в структуре LeadersForAdmin
+            extracted = extract_leaders_rows(json_data)
+        elif isinstance(json_data, list):
+            # Прямой список лидеров
+            logger.info(LOG_MESSAGES['json_direct_leaders'].format(count=len(json_data)))
+            extracted = {"rows": [flatten_leader_data(leader) for leader in json_data]}
         else:
-            estimated_minutes = estimated_seconds / 60
-            estimated_time = f"{estimated_minutes:.1f} мин"
-        
-        logger.info(LOG_MESSAGES['json_excel_creation'].format(
-            filename=filename, 
-            rows=rows, 
-            cols=cols
-        ))
-        logger.info(LOG_MESSAGES['json_excel_processing_info'].format(
-            rows=rows,
-            cols=cols,
-            estimated_time=estimated_time
-        ))
-        with pd.ExcelWriter(output_excel_path, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='DATA', index=False)
-            workbook = writer.book
-            
-            # Получаем настройки закрепления из конфигурации
-            freeze_cell = "B2"  # По умолчанию закрепляем первую строку и первую колонку
-            if config_key and config_key in FUNCTION_CONFIGS:
-                config = FUNCTION_CONFIGS[config_key]
-                # Проверяем, есть ли вложенные конфигурации
-                if config_key == "reward" and "reward_processing" in config:
-                    reward_profiles_config = config["reward_processing"]
-                    freeze_cell = reward_profiles_config.get('excel_freeze_cell', "B2")
-                elif config_key == "leaders_for_admin" and "leaders_processing" in config:
-                    leaders_processing_config = config["leaders_processing"]
-                    freeze_cell = leaders_processing_config.get('excel_freeze_cell', "B2")
-                elif config_key == "rating_list" and "rating_processing" in config:
-                    rating_processing_config = config["rating_processing"]
-                    freeze_cell = rating_processing_config.get('excel_freeze_cell', "B2")
-                else:
-                    freeze_cell = config.get('excel_freeze_cell', "B2")
-            
-            # Применяем стили с настройками закрепления
-            apply_excel_styling(workbook, freeze_cell)
-            
-            # Применяем форматирование ячеек
-            apply_cell_formatting(workbook, df, config_key)
-            
-            # Создание дополнительных листов
-            create_summary_sheet(workbook, df)
-            create_statistics_sheet(workbook, df)
-            
-            # Создание специального листа для reward данных
-            if config_key == "reward" or (config_key and "reward" in config_key):
-                create_reward_summary_sheet(workbook, df)
-        
-        # Получаем размер файла
-        file_size = os.path.getsize(output_excel_path)
-        file_size_mb = file_size / (1024 * 1024)  # Конвертируем в МБ
-        
-        logger.info(LOG_MESSAGES['json_excel_success'].format(
-            file_path=output_excel_path,
-            size=f"{file_size_mb:.2f} МБ"
-        ))
-        return True
-        
-    except Exception as e:
-        logger.error(LOG_MESSAGES['excel_creation_error'].format(error=e))
-        return False
+            logger.error(LOG_MESSAGES['json_invalid_format'])
+            return None
+    
+    if "tournaments" in extracted:
+        logger.info(LOG_MESSAGES['tournaments_processed'].format(tournaments=extracted["tournaments"], leaders=extracted["leaders"]))
+    
+    if len(extracted["rows"]) == 0:
+        logger.error(LOG_MESSAGES['json_no_leaders'])
+        return None
+    
+    # Создание DataFrame
+    df = pd.DataFrame(extracted["rows"])
+    
+    if df.empty:
+        logger.warning(LOG_MESSAGES['no_data_warning'])
+        return None
+    
+    logger.info(LOG_MESSAGES['json_records_processed'].format(count=len(df)))
+    
+    # Вынос base64 photoData в файлы изображений (photo_data.mode = "files")
+    df = export_photo_data(df, config_key)
+    
+    # Расчет мест по показателям (если заданы в leaders_processing.rankings)
+    _, processing_config = get_processing_config(config_key)
+    if processing_config.get("rankings"):
+        df = calculate_rankings(df, processing_config["rankings"])
+    
+    # Планирование типов данных для экономии памяти
+    df = plan_dataframe_dtypes(df)
+    
+    # Применение настроек колонок
+    if config_key == "leaders_for_admin" and "leaders_for_admin" in FUNCTION_CONFIGS:
+        config = FUNCTION_CONFIGS["leaders_for_admin"]
+        if "leaders_processing" in config and "column_settings" in config["leaders_processing"]:
+            column_settings = config["leaders_processing"]["column_settings"]
+            logger.info(LOG_MESSAGES['column_settings_applying_leaders'])
+            df = apply_column_settings(df, column_settings)
+            logger.info(LOG_MESSAGES['column_settings_applied'].format(count=len(df.columns)))
+    
+    # Нормализованный вывод: атрибуты турниров в лист TOURNAMENTS
+    df, extra_sheets = split_dimension_table(df, "leaders_for_admin")
+    return df, extra_sheets
 
 @measure_time
 def convert_leaders_json_to_excel(input_json_path, output_excel_path, config_key=None):
@@ -2988,90 +6694,54 @@ def convert_leaders_json_to_excel(input_json_path, output_excel_path, config_key
             logger.error(LOG_MESSAGES['json_file_not_found'].format(file_path=input_json_path))
             return False
         
-        # Загрузка JSON данных
-        json_data = load_json_data(input_json_path)
-        if json_data is None:
-            return False
-        
-        # Обработка данных
-        logger.info(LOG_MESSAGES['json_data_processing'])
-        all_leaders_data = []
-        
-        if isinstance(json_data, dict):
-            # Обрабатываем все турниры в структуре LeadersForAdmin
-            total_tournaments = 0
-            total_leaders = 0
-            
-            for tournament_key, tournament_value in json_data.items():
-                if isinstance(tournament_value, list) and len(tournament_value) > 0:
-                    # Проверяем, содержит ли первый элемент данные о турнире
-                    first_item = tournament_value[0]
-                    if isinstance(first_item, dict) and 'body' in first_item:
-                        body = first_item['body']
-                        if 'tournament' in body:
-                            tournament = body['tournament']
-                            if 'leaders' in tournament:
-                                tournament_leaders = tournament['leaders']
-                                if tournament_leaders:
-                                    # Добавляем информацию о турнире к каждому лидеру
-                                    for leader in tournament_leaders:
-                                        leader_with_tournament = leader.copy()
-                                        leader_with_tournament['tournamentId'] = tournament.get('tournamentId', tournament_key)
-                                        leader_with_tournament['tournamentIndicator'] = tournament.get('tournamentIndicator', '')
-                                        leader_with_tournament['tournamentStatus'] = tournament.get('status', '')
-                                        leader_with_tournament['contestants'] = tournament.get('contestants', '')
-                                        all_leaders_data.append(leader_with_tournament)
-                                    
-                                    total_tournaments += 1
-                                    total_leaders += len(tournament_leaders)
-                                    logger.debug(LOG_MESSAGES['json_leaders_found'].format(key=tournament_key, count=len(tournament_leaders)))
-            
-            logger.info(LOG_MESSAGES['tournaments_processed'].format(tournaments=total_tournaments, leaders=total_leaders))
-            leaders_data = all_leaders_data
-            
-        elif isinstance(json_data, list):
-            # Прямой список лидеров
-            leaders_data = json_data
-            logger.info(LOG_MESSAGES['json_direct_leaders'].format(count=len(leaders_data)))
-        else:
-            logger.error(LOG_MESSAGES['json_invalid_format'])
-            return False
-        
-        if not leaders_data:
-            logger.error(LOG_MESSAGES['json_no_leaders'])
-            return False
-        
-        # Преобразование данных в плоскую структуру
-        flattened_data = []
-        for leader in leaders_data:
-            flattened_leader = flatten_leader_data(leader)
-            flattened_data.append(flattened_leader)
-        
-        # Создание DataFrame
-        df = pd.DataFrame(flattened_data)
-        
-        if df.empty:
-            logger.warning(LOG_MESSAGES['no_data_warning'])
+        frame = build_leaders_frame(input_json_path, config_key)
+        if frame is None:
             return False
+        df, extra_sheets = frame
         
-        logger.info(LOG_MESSAGES['json_records_processed'].format(count=len(df)))
-        
-        # Применение настроек колонок
-        if config_key == "leaders_for_admin" and "leaders_for_admin" in FUNCTION_CONFIGS:
-            config = FUNCTION_CONFIGS["leaders_for_admin"]
-            if "leaders_processing" in config and "column_settings" in config["leaders_processing"]:
-                column_settings = config["leaders_processing"]["column_settings"]
-                logger.info(LOG_MESSAGES['column_settings_applying_leaders'])
-                df = apply_column_settings(df, column_settings)
-                logger.info(LOG_MESSAGES['column_settings_applied'].format(count=len(df.columns)))
+        # Сравнение с предыдущим снимком (лист DIFF)
+        extra_sheets = add_snapshot_diff(df, config_key, output_excel_path, extra_sheets)
+        
+        # Сводка по сотрудникам (лист EMPLOYEE_ROLLUP) и сводные листы
+        extra_sheets = add_employee_rollup(df, config_key, extra_sheets)
+        extra_sheets = add_pivot_sheets(df, config_key, extra_sheets)
         
         # Сохранение в Excel
-        return save_excel_file(df, output_excel_path, "leaders_for_admin")
+        return save_output_files(df, output_excel_path, "leaders_for_admin", extra_sheets, input_json_path)
         
     except Exception as e:
         logger.error(LOG_MESSAGES['json_leaders_conversion_error'].format(error=e))
         return False
 
+def compile_json_path(path):
+    """
+    Компиляция пути вида "body.badge.profiles" в функцию доступа к значению
+
+    Args:
+        path (str): Ключи через точку ("" - сам объект)
+
+    Returns:
+        callable: accessor(obj) → значение по пути или None, если ключа нет
+    """
+    keys = tuple(path.split('.')) if path else ()
+
+    def accessor(obj):
+        for key in keys:
+            if not isinstance(obj, dict):
+                return None
+            obj = obj.get(key)
+        return obj
+    return accessor
+
+# Функции доступа к массиву профилей в data для четырех вариантов структуры ответа API наград
+# (в порядке автоматического определения, если structure неизвестна)
+REWARD_DATA_ACCESSORS = {
+    'body.badge.profiles': compile_json_path('body.badge.profiles'),  # Структура 1: body.badge.profiles
+    'body.profiles': compile_json_path('body.profiles'),  # Структура 2: body.profiles
+    'body.array': compile_json_path('body'),  # Структура 3: прямой массив профилей в body
+    'root.array': compile_json_path('')  # Структура 4: прямой массив в корне
+}
+
 def extract_profiles_from_data(data, structure):
     """
     Извлечение профилей из данных API наград
@@ -3083,41 +6753,135 @@ def extract_profiles_from_data(data, structure):
     Returns:
         list: Список профилей или None
     """
-    try:
-        if structure == 'body.badge.profiles':
-            # Структура 1: body.badge.profiles
-            if data.get('body', {}).get('badge', {}).get('profiles'):
-                return data['body']['badge']['profiles']
-        elif structure == 'body.profiles':
-            # Структура 2: body.profiles
-            if data.get('body', {}).get('profiles'):
-                return data['body']['profiles']
-        elif structure == 'body.array':
-            # Структура 3: прямой массив профилей в body
-            if isinstance(data.get('body'), list):
-                return data['body']
-        elif structure == 'root.array':
-            # Структура 4: прямой массив в корне
-            if isinstance(data, list):
-                return data
-        
-        # Попытка автоматического определения структуры
-        if data.get('body', {}).get('badge', {}).get('profiles'):
-            return data['body']['badge']['profiles']
-        elif data.get('body', {}).get('profiles'):
-            return data['body']['profiles']
-        elif isinstance(data.get('body'), list):
-            return data['body']
-        elif isinstance(data, list):
-            return data
-        
-        return None
-    except Exception as e:
-        logger.error(LOG_MESSAGES['profile_extraction_error'].format(error=e))
-        return None
+    # Сначала путь заявленной структуры, затем автоматическое определение
+    accessors = [REWARD_DATA_ACCESSORS[structure]] if structure in REWARD_DATA_ACCESSORS else []
+    for accessor in accessors + list(REWARD_DATA_ACCESSORS.values()):
+        profiles = accessor(data)
+        if isinstance(profiles, list) and profiles:
+            return profiles
+    return None
+
+# Варианты структуры значения кода награды и ожидаемый тип значения
+REWARD_VALUE_LAYOUT_TYPES = {
+    "pages": list,  # Ключ: [страницы ответа API] с body.badge.profiles / body.badge.leaders
+    "profiles": dict,  # Ключ: {profiles, profilesCount, badgeInfo}
+    "data": dict,  # Ключ: {data, structure, profilesCount, badgeInfo}
+    "dict": dict,  # Ключ: {badge.profiles} или {body.badge.profiles}
+    "badgeInfo": dict  # Ключ: {badgeInfo.leaders, profilesCount}
+}
+
+def detect_reward_value_layout(reward_value):
+    """Определение варианта структуры значения одного кода награды (см. REWARD_VALUE_LAYOUT_TYPES)"""
+    if isinstance(reward_value, list):
+        return "pages" if reward_value else None
+    if isinstance(reward_value, dict):
+        if 'profiles' in reward_value:
+            return "profiles"
+        if 'data' in reward_value or 'structure' in reward_value:
+            return "data"
+        if 'badgeInfo' in reward_value:
+            return "badgeInfo"
+        return "dict"
+    return None
+
+def get_reward_value_layout(reward_value, layout=None):
+    """
+    Вариант структуры значения кода награды: вариант файла, если тип значения ему соответствует,
+    иначе определение по самому значению
+    """
+    if layout and isinstance(reward_value, REWARD_VALUE_LAYOUT_TYPES[layout]) and reward_value:
+        return layout
+    return detect_reward_value_layout(reward_value)
+
+# Функции доступа к частям ответа API наград (компилируются один раз)
+REWARD_BADGE_ACCESSOR = compile_json_path('body.badge')
+
+def iter_reward_leader_blocks_pages(reward_code, reward_value):
+    """Блоки лидеров варианта "pages": body.badge.leaders каждой страницы и контекст награды"""
+    for item_index, item in enumerate(reward_value):
+        badge = REWARD_BADGE_ACCESSOR(item)
+        if isinstance(badge, dict):
+            leaders = badge.get('leaders', [])
+            yield leaders, {
+                'badgeId': badge.get('badgeId', reward_code),
+                'contestants': badge.get('contestants', ''),
+                'profilesCount': len(leaders),
+                'itemIndex': item_index + 1
+            }
+
+def iter_reward_leader_blocks_badge_info(reward_code, reward_value):
+    """Блок лидеров варианта "badgeInfo": badgeInfo.leaders и контекст награды"""
+    badge_info = reward_value.get('badgeInfo', {})
+    yield badge_info.get('leaders', []), {
+        'badgeId': badge_info.get('badgeId', ''),
+        'contestants': badge_info.get('contestants', ''),
+        'profilesCount': reward_value.get('profilesCount', 0)
+    }
+
+# Извлечение лидеров наград по варианту структуры значения кода награды:
+# функция блоков (лидеры, поля награды) и описание структуры для лога
+REWARD_LEADER_LAYOUTS = {
+    "pages": {"blocks": iter_reward_leader_blocks_pages, "structure": "body.badge.leaders"},
+    "badgeInfo": {"blocks": iter_reward_leader_blocks_badge_info, "structure": "badgeInfo.leaders"}
+}
+
+def extract_reward_leader_rows(json_data, long_format_tags=False, layout=None):
+    """
+    Извлечение лидеров всех кодов наград (body.badge.leaders / badgeInfo.leaders) в плоские строки
+
+    Вариант структуры выбирается один раз на файл (layout) или на код награды,
+    лидеры и поля награды извлекаются функцией из REWARD_LEADER_LAYOUTS за один проход.
+
+    Args:
+        json_data (dict): Выгрузка {rewardCode: [страницы] или {badgeInfo}} или ее часть
+        long_format_tags (bool): Собирать теги и полученные награды строками (LEADER_TAGS / LEADER_BADGES)
+        layout (str, optional): Вариант структуры всего файла ("pages", "badgeInfo");
+            None - определяется по каждому значению (detect_reward_value_layout)
+
+    Returns:
+        dict: {"rows", "tags", "badges": строки, "rewards": наград, "leaders": лидеров}
+    """
+    rows = []
+    bridge_rows = {"tags": [], "badges": []} if long_format_tags else None
+    total_rewards = 0
+    total_leaders = 0
+    
+    for reward_code, reward_value in json_data.items():
+        value_layout = get_reward_value_layout(reward_value, layout)
+        if value_layout is None:
+            continue
+        if value_layout != "pages":
+            value_layout = "badgeInfo"
+        layout_config = REWARD_LEADER_LAYOUTS[value_layout]
+        
+        leaders_for_reward = 0
+        for leaders, badge_context in layout_config["blocks"](reward_code, reward_value):
+            for leader in leaders:
+                if isinstance(leader, dict):
+                    leader_with_reward = flatten_reward_leader_data(leader, reward_code, bridge_rows)
+                    leader_with_reward.update(badge_context)
+                    rows.append(leader_with_reward)
+            leaders_for_reward += len(leaders)
+        
+        # Награды со страницами учитываются всегда, старая структура - только при наличии лидеров
+        if value_layout == "pages" or leaders_for_reward:
+            total_rewards += 1
+            total_leaders += leaders_for_reward
+            logger.debug(LOG_MESSAGES['json_reward_found'].format(key=reward_code, count=leaders_for_reward))
+            logger.info(LOG_MESSAGES['reward_profiles_leaders_found'].format(
+                code=reward_code, count=leaders_for_reward, structure=layout_config["structure"]
+            ))
+    
+    return {
+        "rows": rows,
+        "tags": bridge_rows["tags"] if bridge_rows else [],
+        "badges": bridge_rows["badges"] if bridge_rows else [],
+        "rewards": total_rewards,
+        "leaders": total_leaders
+    }
 
 @measure_time
-def convert_reward_profiles_json_to_excel(input_json_path, output_excel_path, config_key=None):
+def convert_reward_profiles_json_to_excel(input_json_path, output_excel_path, config_key=None, layout=None):
     """
     Конвертация JSON файла с данными профилей наград в Excel
     
@@ -3125,6 +6889,7 @@ def convert_reward_profiles_json_to_excel(input_json_path, output_excel_path, co
         input_json_path (str): Путь к входному JSON файлу
         output_excel_path (str): Путь к выходному Excel файлу
         config_key (str, optional): Ключ конфигурации для получения настроек
+        layout (str, optional): Вариант структуры из sniff_json_structure ("pages", "badgeInfo")
         
     Returns:
         bool: True если конвертация успешна, False в противном случае
@@ -3137,106 +6902,43 @@ def convert_reward_profiles_json_to_excel(input_json_path, output_excel_path, co
             logger.error(LOG_MESSAGES['json_file_not_found'].format(file_path=input_json_path))
             return False
         
-        # Загрузка JSON данных
-        json_data = load_json_data(input_json_path)
-        if json_data is None:
-            return False
+        # Длинный формат тегов и полученных наград (листы LEADER_TAGS / LEADER_BADGES)
+        _, processing_config = get_processing_config("reward")
+        long_format_tags = bool(processing_config.get("long_format_tags"))
         
-        # Обработка данных
-        logger.info(LOG_MESSAGES['json_data_processing'])
-        all_leaders_data = []
+        # Параллельный разбор крупной выгрузки по диапазонам ключей
+        extracted = extract_json_in_parallel(
+            input_json_path, "reward", extract_reward_leader_rows, long_format_tags=long_format_tags, layout=layout
+        )
         
-        if isinstance(json_data, dict):
-            # Обрабатываем все коды наград
-            total_rewards = 0
-            total_leaders = 0
-            
-            for reward_code, reward_value in json_data.items():
-                # Новая структура: массив с body.badge.leaders - ОБРАБАТЫВАЕМ ВСЕ ЭЛЕМЕНТЫ
-                if isinstance(reward_value, list) and reward_value:
-                    logger.debug(f"Обрабатываем массив из {len(reward_value)} элементов для {reward_code}")
-                    
-                    # Обрабатываем все элементы в массиве
-                    for item_index, item in enumerate(reward_value):
-                        if isinstance(item, dict) and 'body' in item:
-                            body = item['body']
-                            if isinstance(body, dict) and 'badge' in body:
-                                badge = body['badge']
-                                
-                                # Получаем лидеров из body.badge.leaders
-                                leaders = badge.get('leaders', [])
-                                contestants = badge.get('contestants', '')
-                                badge_id = badge.get('badgeId', reward_code)
-                                
-                                logger.debug(f"Элемент {item_index + 1}/{len(reward_value)} для {reward_code}: {len(leaders)} лидеров")
-                                
-                                if leaders:
-                                    # Добавляем информацию о коде награды к каждому лидеру
-                                    for leader in leaders:
-                                        if isinstance(leader, dict):
-                                            leader_with_reward = flatten_reward_leader_data(leader, reward_code)
-                                            
-                                            # Добавляем информацию о награде
-                                            leader_with_reward['badgeId'] = badge_id
-                                            leader_with_reward['contestants'] = contestants
-                                            leader_with_reward['profilesCount'] = len(leaders)
-                                            leader_with_reward['itemIndex'] = item_index + 1  # Добавляем индекс элемента
-                                            
-                                            all_leaders_data.append(leader_with_reward)
-                                    
-                                    total_leaders += len(leaders)
-                                    logger.debug(f"Элемент {item_index + 1}: добавлено {len(leaders)} лидеров")
-                    
-                    total_rewards += 1
-                    total_leaders_for_reward = sum(len(item.get('body', {}).get('badge', {}).get('leaders', [])) for item in reward_value if isinstance(item, dict) and 'body' in item)
-                    logger.debug(LOG_MESSAGES['json_reward_found'].format(key=reward_code, count=total_leaders_for_reward))
-                    logger.info(LOG_MESSAGES['reward_profiles_leaders_found'].format(code=reward_code, count=total_leaders_for_reward, structure=f"body.badge.leaders (все элементы: {len(reward_value)})"))
-                
-                # Старая структура: объект с badgeInfo.leaders
-                elif isinstance(reward_value, dict):
-                    # Получаем информацию о награде
-                    profiles_count = reward_value.get('profilesCount', 0)
-                    badge_info = reward_value.get('badgeInfo', {})
-                    contestants = badge_info.get('contestants', '')
-                    
-                    # Получаем лидеров из badgeInfo.leaders
-                    leaders = badge_info.get('leaders', [])
-                    
-                    if leaders:
-                        # Добавляем информацию о коде награды к каждому лидеру
-                        for leader in leaders:
-                            if isinstance(leader, dict):
-                                leader_with_reward = flatten_reward_leader_data(leader, reward_code)
-                                
-                                # Добавляем информацию о награде
-                                leader_with_reward['badgeId'] = badge_info.get('badgeId', '')
-                                leader_with_reward['contestants'] = contestants
-                                leader_with_reward['profilesCount'] = profiles_count
-                                
-                                all_leaders_data.append(leader_with_reward)
-                        
-                        total_rewards += 1
-                        total_leaders += len(leaders)
-                        logger.debug(LOG_MESSAGES['json_reward_found'].format(key=reward_code, count=len(leaders)))
-                        logger.info(LOG_MESSAGES['reward_profiles_leaders_found'].format(code=reward_code, count=len(leaders), structure="badgeInfo.leaders"))
-            
-            logger.info(LOG_MESSAGES['reward_profiles_leaders_processed'].format(rewards=total_rewards, leaders=total_leaders))
-            leaders_data = all_leaders_data
+        if extracted is None:
+            # Загрузка JSON данных
+            json_data = load_json_data(input_json_path, get_photo_data_mode("reward") == "skip")
+            if json_data is None:
+                return False
             
-        elif isinstance(json_data, list):
-            # Прямой список лидеров
-            leaders_data = json_data
-            logger.info(LOG_MESSAGES['json_direct_leaders'].format(count=len(leaders_data)))
-        else:
-            logger.error(LOG_MESSAGES['json_invalid_format'])
-            return False
+            # Обработка данных
+            logger.info(LOG_MESSAGES['json_data_processing'])
+            if isinstance(json_data, dict):
+                # Обрабатываем все коды наград
+                extracted = extract_reward_leader_rows(json_data, long_format_tags, layout)
+            elif isinstance(json_data, list):
+                # Прямой список лидеров
+                logger.info(LOG_MESSAGES['json_direct_leaders'].format(count=len(json_data)))
+                extracted = {"rows": json_data, "tags": [], "badges": []}
+            else:
+                logger.error(LOG_MESSAGES['json_invalid_format'])
+                return False
         
-        if not leaders_data:
+        if "rewards" in extracted:
+            logger.info(LOG_MESSAGES['reward_profiles_leaders_processed'].format(rewards=extracted["rewards"], leaders=extracted["leaders"]))
+        
+        if len(extracted["rows"]) == 0:
             logger.error(LOG_MESSAGES['no_profiles_error'])
             return False
         
         # Создание DataFrame
-        df = pd.DataFrame(leaders_data)
+        df = pd.DataFrame(extracted["rows"])
         
         if df.empty:
             logger.warning(LOG_MESSAGES['no_data_warning'])
@@ -3244,6 +6946,12 @@ def convert_reward_profiles_json_to_excel(input_json_path, output_excel_path, co
         
         logger.info(LOG_MESSAGES['json_records_processed'].format(count=len(df)))
         
+        # Вынос base64 photoData в файлы изображений (photo_data.mode = "files")
+        df = export_photo_data(df, "reward")
+        
+        # Планирование типов данных для экономии памяти
+        df = plan_dataframe_dtypes(df)
+        
         # Применение настроек колонок
         if config_key == "reward" and "reward" in FUNCTION_CONFIGS:
             config = FUNCTION_CONFIGS["reward"]
@@ -3253,15 +6961,125 @@ def convert_reward_profiles_json_to_excel(input_json_path, output_excel_path, co
                 df = apply_column_settings(df, column_settings)
                 logger.info(LOG_MESSAGES['column_settings_applied'].format(count=len(df.columns)))
         
+        # Нормализованный вывод: атрибуты наград в лист BADGES
+        df, extra_sheets = split_dimension_table(df, "reward")
+        if long_format_tags:
+            extra_sheets["LEADER_TAGS"] = pd.DataFrame(extracted["tags"], columns=LEADER_TAGS_COLUMNS)
+            extra_sheets["LEADER_BADGES"] = pd.DataFrame(extracted["badges"], columns=LEADER_BADGES_COLUMNS)
+        
         # Сохранение в Excel
-        return save_excel_file(df, output_excel_path, "reward")
+        return save_output_files(df, output_excel_path, "reward", extra_sheets, input_json_path, "leaders")
         
     except Exception as e:
         logger.error(LOG_MESSAGES['json_reward_profiles_conversion_error'].format(error=e))
         return False
 
+def iter_reward_profile_blocks_pages(reward_value):
+    """Блоки профилей варианта "pages": body.badge.profiles каждой страницы с номером страницы"""
+    for page_index, page_data in enumerate(reward_value):
+        if isinstance(page_data, dict) and 'body' in page_data:
+            badge = REWARD_BADGE_ACCESSOR(page_data)
+            badge = badge if isinstance(badge, dict) else {}
+            yield badge.get('profiles', []), badge, {'pageNumber': page_index + 1}
+
+def iter_reward_profile_blocks_profiles(reward_value):
+    """Блок профилей варианта "profiles": profiles и badgeInfo"""
+    yield reward_value.get('profiles', []), reward_value.get('badgeInfo', {}), {}
+
+def iter_reward_profile_blocks_data(reward_value):
+    """Блок профилей варианта "data": профили из data по полю structure"""
+    structure = reward_value.get('structure', 'unknown')
+    profiles = extract_profiles_from_data(reward_value.get('data', {}), structure)
+    yield profiles or [], reward_value.get('badgeInfo', {}), {'structure': structure}
+
+# Пути (профили, награда) для варианта "dict" в порядке поиска
+REWARD_DICT_PROFILE_PATHS = [
+    (compile_json_path('badge.profiles'), compile_json_path('badge')),
+    (compile_json_path('body.badge.profiles'), compile_json_path('body.badge'))
+]
+
+def iter_reward_profile_blocks_dict(reward_value):
+    """Блок профилей варианта "dict": badge.profiles или body.badge.profiles"""
+    for profiles_accessor, badge_accessor in REWARD_DICT_PROFILE_PATHS:
+        profiles = profiles_accessor(reward_value)
+        if profiles is not None:
+            yield (profiles if isinstance(profiles, list) else []), badge_accessor(reward_value), {}
+            return
+
+# Извлечение профилей наград по варианту структуры значения кода награды:
+# функция блоков (профили, награда, дополнительные поля) и описание структуры для лога
+REWARD_PROFILE_LAYOUTS = {
+    "pages": {"blocks": iter_reward_profile_blocks_pages, "structure": "body.badge.profiles (страницы)"},
+    "profiles": {"blocks": iter_reward_profile_blocks_profiles, "structure": "profiles"},
+    "data": {"blocks": iter_reward_profile_blocks_data, "structure": None},
+    "dict": {"blocks": iter_reward_profile_blocks_dict, "structure": "badge.profiles"}
+}
+
+def extract_reward_profile_rows(json_data, layout=None):
+    """
+    Извлечение профилей всех кодов наград (страницы body.badge.profiles и старые структуры) в плоские строки
+
+    Вариант структуры выбирается один раз на файл (layout) или на код награды,
+    профили и поля награды извлекаются функцией из REWARD_PROFILE_LAYOUTS за один проход.
+
+    Args:
+        json_data (dict): Выгрузка {rewardCode: [страницы] или объект} или ее часть
+        layout (str, optional): Вариант структуры всего файла ("pages", "profiles", "data", "dict");
+            None - определяется по каждому значению (detect_reward_value_layout)
+
+    Returns:
+        dict: {"rows": плоские строки, "rewards": наград, "profiles": профилей}
+    """
+    script_logger = get_script_logger("reward", "conversion")
+    rows = []
+    total_rewards = 0
+    total_profiles = 0
+    
+    script_logger.debug(f"Начинаем обработку {len(json_data)} кодов наград")
+    
+    for reward_code, reward_value in json_data.items():
+        value_layout = get_reward_value_layout(reward_value, layout)
+        if value_layout is None:
+            continue
+        if value_layout == "badgeInfo":
+            value_layout = "dict"
+        layout_config = REWARD_PROFILE_LAYOUTS[value_layout]
+        
+        profiles_for_reward = 0
+        structure = layout_config["structure"]
+        for profiles, badge_info, extra_fields in layout_config["blocks"](reward_value):
+            structure = extra_fields.get('structure', structure)
+            for profile in profiles:
+                if isinstance(profile, dict):
+                    profile_with_reward = profile.copy()
+                    profile_with_reward['rewardCode'] = reward_code
+                    profile_with_reward.update(extra_fields)
+                    
+                    # Добавляем информацию о награде
+                    if badge_info:
+                        profile_with_reward['badgeName'] = badge_info.get('name', '')
+                        profile_with_reward['badgeDescription'] = badge_info.get('description', '')
+                        profile_with_reward['badgeType'] = badge_info.get('type', '')
+                        profile_with_reward['badgeCategory'] = badge_info.get('category', '')
+                    
+                    rows.append(flatten_reward_profile_data(profile_with_reward))
+            profiles_for_reward += len(profiles)
+        
+        # Награды со страницами учитываются всегда, остальные структуры - только при наличии профилей
+        if value_layout == "pages" or profiles_for_reward:
+            total_rewards += 1
+            total_profiles += profiles_for_reward
+            script_logger.debug(LOG_MESSAGES['json_reward_found'].format(key=reward_code, count=profiles_for_reward))
+            script_logger.info(LOG_MESSAGES['reward_profiles_found'].format(
+                code=reward_code, count=profiles_for_reward, structure=structure
+            ))
+        else:
+            script_logger.debug(f"Профили не найдены для {reward_code} (структура: {value_layout})")
+    
+    return {"rows": rows, "rewards": total_rewards, "profiles": total_profiles}
+
 @measure_time
-def convert_reward_json_to_excel(input_json_path, output_excel_path, config_key=None):
+def convert_reward_json_to_excel(input_json_path, output_excel_path, config_key=None, layout=None):
     """
     Конвертация JSON файла с данными наград в Excel
     
@@ -3269,6 +7087,7 @@ def convert_reward_json_to_excel(input_json_path, output_excel_path, config_key=
         input_json_path (str): Путь к входному JSON файлу
         output_excel_path (str): Путь к выходному Excel файлу
         config_key (str, optional): Ключ конфигурации для получения настроек
+        layout (str, optional): Вариант структуры из sniff_json_structure ("pages", "profiles", "data", "dict")
         
     Returns:
         bool: True если конвертация успешна, False в противном случае
@@ -3282,215 +7101,39 @@ def convert_reward_json_to_excel(input_json_path, output_excel_path, config_key=
             logger.error(LOG_MESSAGES['json_file_not_found'].format(file_path=input_json_path))
             return False
         
-        # Загрузка JSON данных
-        json_data = load_json_data(input_json_path)
-        if json_data is None:
-            return False
-        
-        # Обработка данных
-        script_logger.info(LOG_MESSAGES['json_data_processing'])
-        script_logger.debug(f"Тип данных: {type(json_data)}")
-        script_logger.debug(f"Ключи в данных: {list(json_data.keys()) if isinstance(json_data, dict) else 'не словарь'}")
-        all_profiles_data = []
+        # Параллельный разбор крупной выгрузки по диапазонам ключей
+        extracted = extract_json_in_parallel(input_json_path, config_key, extract_reward_profile_rows, layout=layout)
         
-        if isinstance(json_data, dict):
-            # Обрабатываем все коды наград
-            total_rewards = 0
-            total_profiles = 0
-            
-            script_logger.debug(f"Начинаем обработку {len(json_data)} кодов наград")
-            
-            for reward_code, reward_value in json_data.items():
-                script_logger.debug(f"Обрабатываем код награды: {reward_code}, тип значения: {type(reward_value)}")
-                # Новая структура данных (список как в leaders) - ОБРАБАТЫВАЕМ ВСЕ СТРАНИЦЫ
-                if isinstance(reward_value, list) and len(reward_value) > 0:
-                    script_logger.debug(f"Обрабатываем массив из {len(reward_value)} страниц для {reward_code}")
-                    
-                    # Обрабатываем все страницы в массиве
-                    for page_index, page_data in enumerate(reward_value):
-                        if isinstance(page_data, dict) and 'body' in page_data:
-                            body = page_data.get('body', {})
-                            badge = body.get('badge', {})
-                            profiles = badge.get('profiles', [])
-                            badge_info = badge
-                            
-                            script_logger.debug(f"Страница {page_index + 1}/{len(reward_value)} для {reward_code}: профилей={len(profiles)}")
-                            
-                            if profiles and len(profiles) > 0:
-                                # Добавляем информацию о коде награды и данных награды к каждому профилю
-                                for profile in profiles:
-                                    if isinstance(profile, dict):
-                                        profile_with_reward = profile.copy()
-                                        profile_with_reward['rewardCode'] = reward_code
-                                        profile_with_reward['pageNumber'] = page_index + 1  # Добавляем номер страницы
-                                        
-                                        # Добавляем информацию о награде
-                                        if badge_info:
-                                            profile_with_reward['badgeName'] = badge_info.get('name', '')
-                                            profile_with_reward['badgeDescription'] = badge_info.get('description', '')
-                                            profile_with_reward['badgeType'] = badge_info.get('type', '')
-                                            profile_with_reward['badgeCategory'] = badge_info.get('category', '')
-                                        
-                                        all_profiles_data.append(profile_with_reward)
-                                
-                                total_profiles += len(profiles)
-                                script_logger.debug(f"Страница {page_index + 1}: добавлено {len(profiles)} профилей")
-                            else:
-                                script_logger.debug(f"Страница {page_index + 1}: профили пусты для {reward_code}")
-                    
-                    total_rewards += 1
-                    total_profiles_for_reward = sum(len(page_data.get('body', {}).get('badge', {}).get('profiles', [])) for page_data in reward_value if isinstance(page_data, dict) and 'body' in page_data)
-                    script_logger.debug(LOG_MESSAGES['json_reward_found'].format(key=reward_code, count=total_profiles_for_reward))
-                    script_logger.info(f"Найдено профилей для кода награды {reward_code}: {total_profiles_for_reward} (все страницы: {len(reward_value)})")
-                
-                # Старая структура данных (прямая структура с profiles)
-                elif isinstance(reward_value, dict) and 'profiles' in reward_value:
-                    profiles = reward_value.get('profiles', [])
-                    profiles_count = reward_value.get('profilesCount', 0)
-                    badge_info = reward_value.get('badgeInfo', {})
-                    
-                    script_logger.debug(f"Обрабатываем прямую структуру для {reward_code}: профилей={len(profiles)}")
-                    
-                    if profiles and len(profiles) > 0:
-                        # Добавляем информацию о коде награды и данных награды к каждому профилю
-                        for profile in profiles:
-                            if isinstance(profile, dict):
-                                profile_with_reward = profile.copy()
-                                profile_with_reward['rewardCode'] = reward_code
-                                
-                                # Добавляем информацию о награде
-                                if badge_info:
-                                    profile_with_reward['badgeName'] = badge_info.get('name', '')
-                                    profile_with_reward['badgeDescription'] = badge_info.get('description', '')
-                                    profile_with_reward['badgeType'] = badge_info.get('type', '')
-                                    profile_with_reward['badgeCategory'] = badge_info.get('category', '')
-                                
-                                all_profiles_data.append(profile_with_reward)
-                        
-                        total_rewards += 1
-                        total_profiles += len(profiles)
-                        script_logger.debug(LOG_MESSAGES['json_reward_found'].format(key=reward_code, count=len(profiles)))
-                        script_logger.info(f"Найдено профилей для кода награды {reward_code}: {len(profiles)} (прямая структура)")
-                    else:
-                        script_logger.debug(f"Профили пусты для {reward_code}: {len(profiles)} профилей")
-                
-                # Новая структура данных (с информацией о структуре - старая логика)
-                elif isinstance(reward_value, dict) and ('data' in reward_value or 'structure' in reward_value):
-                    data = reward_value.get('data', {})
-                    structure = reward_value.get('structure', 'unknown')
-                    profiles_count = reward_value.get('profilesCount', 0)
-                    badge_info = reward_value.get('badgeInfo', {})
-                    
-                    # Извлекаем профили из данных
-                    profiles = extract_profiles_from_data(data, structure)
-                    
-                    if profiles:
-                        # Добавляем информацию о коде награды и данных награды к каждому профилю
-                        for profile in profiles:
-                            if isinstance(profile, dict):
-                                profile_with_reward = profile.copy()
-                                profile_with_reward['rewardCode'] = reward_code
-                                profile_with_reward['structure'] = structure
-                                
-                                # Добавляем информацию о награде
-                                if badge_info:
-                                    profile_with_reward['badgeName'] = badge_info.get('name', '')
-                                    profile_with_reward['badgeDescription'] = badge_info.get('description', '')
-                                    profile_with_reward['badgeType'] = badge_info.get('type', '')
-                                    profile_with_reward['badgeCategory'] = badge_info.get('category', '')
-                                
-                                all_profiles_data.append(profile_with_reward)
-                        
-                        total_rewards += 1
-                        total_profiles += len(profiles)
-                        script_logger.debug(LOG_MESSAGES['json_reward_found'].format(key=reward_code, count=len(profiles)))
-                        script_logger.info(LOG_MESSAGES['reward_profiles_found'].format(code=reward_code, count=len(profiles), structure=structure))
-                
-                # Обработка словаря старой структуры (когда reward_value - dict, но без ключей новой структуры)
-                elif isinstance(reward_value, dict):
-                    script_logger.debug(f"Обрабатываем старую структуру dict для {reward_code}")
-                    # Возможно, это старая структура в виде словаря
-                    # Ищем профили напрямую в словаре или в подструктурах
-                    profiles = None
-                    badge_info = None
-                    
-                    # Пытаемся найти профили в разных возможных местах
-                    if 'profiles' in reward_value:
-                        profiles = reward_value['profiles']
-                        badge_info = reward_value
-                        script_logger.debug(f"Найдены профили напрямую в {reward_code}: {len(profiles) if profiles else 0}")
-                    elif 'badge' in reward_value and 'profiles' in reward_value['badge']:
-                        profiles = reward_value['badge']['profiles']
-                        badge_info = reward_value['badge']
-                        script_logger.debug(f"Найдены профили в badge для {reward_code}: {len(profiles) if profiles else 0}")
-                    elif 'body' in reward_value and 'badge' in reward_value['body'] and 'profiles' in reward_value['body']['badge']:
-                        profiles = reward_value['body']['badge']['profiles']
-                        badge_info = reward_value['body']['badge']
-                        script_logger.debug(f"Найдены профили в body.badge для {reward_code}: {len(profiles) if profiles else 0}")
-                    
-                    if profiles and isinstance(profiles, list):
-                        # Добавляем информацию о коде награды к каждому профилю
-                        for profile in profiles:
-                            if isinstance(profile, dict):
-                                profile_with_reward = profile.copy()
-                                profile_with_reward['rewardCode'] = reward_code
-                                
-                                # Добавляем информацию о награде
-                                if badge_info:
-                                    profile_with_reward['badgeName'] = badge_info.get('name', '')
-                                    profile_with_reward['badgeDescription'] = badge_info.get('description', '')
-                                    profile_with_reward['badgeType'] = badge_info.get('type', '')
-                                    profile_with_reward['badgeCategory'] = badge_info.get('category', '')
-                                
-                                all_profiles_data.append(profile_with_reward)
-                        
-                        total_rewards += 1
-                        total_profiles += len(profiles)
-                        script_logger.debug(LOG_MESSAGES['json_reward_found'].format(key=reward_code, count=len(profiles)))
-                        script_logger.info(LOG_MESSAGES['reward_profiles_found_old'].format(code=reward_code, count=len(profiles)))
-                    else:
-                        script_logger.debug(f"Профили не найдены в структуре dict для {reward_code}")
-                
-                # Прямая структура данных (профили в корне)
-                elif isinstance(reward_value, list):
-                    # Прямой список профилей
-                    profiles = reward_value
-                    if profiles and isinstance(profiles, list):
-                        # Добавляем информацию о коде награды к каждому профилю
-                        for profile in profiles:
-                            if isinstance(profile, dict):
-                                profile_with_reward = profile.copy()
-                                profile_with_reward['rewardCode'] = reward_code
-                                all_profiles_data.append(profile_with_reward)
-                        
-                        total_rewards += 1
-                        total_profiles += len(profiles)
-                        script_logger.debug(LOG_MESSAGES['json_reward_found'].format(key=reward_code, count=len(profiles)))
-                        script_logger.info(LOG_MESSAGES['reward_profiles_found_old'].format(code=reward_code, count=len(profiles)))
+        if extracted is None:
+            # Загрузка JSON данных
+            json_data = load_json_data(input_json_path, get_photo_data_mode(config_key) == "skip")
+            if json_data is None:
+                return False
             
-            script_logger.info(LOG_MESSAGES['rewards_processed'].format(rewards=total_rewards, profiles=total_profiles))
-            profiles_data = all_profiles_data
-            
-        elif isinstance(json_data, list):
-            # Прямой список профилей
-            profiles_data = json_data
-            script_logger.info(LOG_MESSAGES['direct_profiles_list'].format(count=len(profiles_data)))
-        else:
-            script_logger.error(LOG_MESSAGES['json_invalid_format'])
-            return False
+            # Обработка данных
+            script_logger.info(LOG_MESSAGES['json_data_processing'])
+            script_logger.debug(f"Тип данных: {type(json_data)}")
+            script_logger.debug(f"Ключи в данных: {list(json_data.keys()) if isinstance(json_data, dict) else 'не словарь'}")
+            if isinstance(json_data, dict):
+                # Обрабатываем все коды наград
+                extracted = extract_reward_profile_rows(json_data, layout)
+            elif isinstance(json_data, list):
+                # Прямой список профилей
+                script_logger.info(LOG_MESSAGES['direct_profiles_list'].format(count=len(json_data)))
+                extracted = {"rows": [flatten_reward_profile_data(profile) for profile in json_data]}
+            else:
+                script_logger.error(LOG_MESSAGES['json_invalid_format'])
+                return False
+        
+        if "rewards" in extracted:
+            script_logger.info(LOG_MESSAGES['rewards_processed'].format(rewards=extracted["rewards"], profiles=extracted["profiles"]))
         
-        if not profiles_data:
+        if len(extracted["rows"]) == 0:
             script_logger.error(LOG_MESSAGES['no_profiles_error'])
             return False
         
-        # Преобразование данных в плоскую структуру
-        flattened_data = []
-        for profile in profiles_data:
-            flattened_profile = flatten_reward_profile_data(profile)
-            flattened_data.append(flattened_profile)
-        
         # Создание DataFrame
-        df = pd.DataFrame(flattened_data)
+        df = pd.DataFrame(extracted["rows"])
         
         if df.empty:
             logger.warning(LOG_MESSAGES['no_data_warning'])
@@ -3498,104 +7141,479 @@ def convert_reward_json_to_excel(input_json_path, output_excel_path, config_key=
         
         script_logger.info(LOG_MESSAGES['json_records_processed'].format(count=len(df)))
         
+        # Вынос base64 photoData в файлы изображений (photo_data.mode = "files")
+        df = export_photo_data(df, config_key)
+        
+        # Планирование типов данных для экономии памяти
+        df = plan_dataframe_dtypes(df)
+        
+        # Нормализованный вывод: атрибуты наград в лист BADGES
+        df, extra_sheets = split_dimension_table(df, "reward")
+        
         # Сохранение в Excel
-        return save_excel_file(df, output_excel_path, "reward")
+        return save_output_files(df, output_excel_path, "reward", extra_sheets, input_json_path)
         
     except Exception as e:
         script_logger.error(LOG_MESSAGES['json_reward_conversion_error'].format(error=e))
         return False
 
-@measure_time
-def convert_rating_list_json_to_excel(input_json_path, output_excel_path, config_key=None):
-    """Конвертация JSON rating_list в плоскую структуру Excel"""
+def extract_rating_response_rows(response_obj, rows, fallback_business_block="", fallback_time_period=""):
+    """Добавление в rows плоских строк лидеров одного ответа API рейтинга (body.rating.leaders)"""
+    rating = (response_obj or {}).get('body', {}).get('rating', {})
+    leaders = rating.get('leaders')
+    contestants_text = rating.get('contestants', '')
+    # Пытаемся извлечь численное значение из текста (например: "1 557 участников по стране")
+    contestants_count = parse_contestants_count(contestants_text)
+    # Числовое значение contestants сохраняется текстом, как в движке DuckDB
+    if isinstance(contestants_text, (int, float)) and not isinstance(contestants_text, bool):
+        contestants_text = str(contestants_text)
+
+    if isinstance(leaders, list):
+        for leader in leaders:
+            row = flatten_rating_leader_data(leader, fallback_business_block, fallback_time_period)
+            # Добавляем информацию о количестве участников
+            row['rating_contestantsText'] = contestants_text
+            if contestants_count is not None:
+                row['rating_contestantsCount'] = contestants_count
+            rows.append(row)
+
+def extract_rating_rows(json_data):
+    """
+    Извлечение лидеров из агрегированной выгрузки рейтинга { "BLOCK_PERIOD": [страницы] }
+
+    Args:
+        json_data (dict): Выгрузка или ее часть
+
+    Returns:
+        dict: {"rows": плоские строки}
+    """
+    rows = []
+    for key, pages in json_data.items():
+        business_block = key.split('_')[0] if '_' in key else key
+        time_period = key[len(business_block) + 1:] if '_' in key else ''
+        logger.debug(LOG_MESSAGES['rating_group_processing'].format(
+            business_block=business_block, time_period=time_period, count=len(pages) if isinstance(pages, list) else 1))
+        if isinstance(pages, list):
+            for item in pages:
+                extract_rating_response_rows(item, rows, business_block, time_period)
+        else:
+            # Если по ключу лежит одиночный объект ответа
+            extract_rating_response_rows(pages, rows, business_block, time_period)
+    return {"rows": rows}
+
+# Макросы DuckDB, повторяющие convert_to_integer / convert_to_float / convert_to_date
+DUCKDB_CONVERSION_MACROS = [
+    """CREATE OR REPLACE MACRO clean_number(value) AS (
+        WITH cleaned AS (SELECT replace(regexp_replace(trim(value), '[^0-9.,\\-]', '', 'g'), ',', '.') AS text)
+        SELECT CASE WHEN length(text) - length(replace(text, '.', '')) > 1
+            THEN split_part(text, '.', 1) || '.' || replace(substr(text, strpos(text, '.') + 1), '.', '')
+            ELSE text END
+        FROM cleaned
+    )""",
+    "CREATE OR REPLACE MACRO to_integer(value) AS COALESCE(TRY_CAST(trunc(TRY_CAST(clean_number(value) AS DOUBLE)) AS BIGINT), 0)",
+    "CREATE OR REPLACE MACRO to_float(value, places) AS COALESCE(round(TRY_CAST(clean_number(value) AS DOUBLE), places), 0.0)",
+    "CREATE OR REPLACE MACRO to_date(value, format) AS TRY_STRPTIME(regexp_replace(value, '\\s+', '', 'g'), format)"
+]
+
+# Функции DuckDB для методов ранжирования calculate_rankings ("max" - количество строк со значением не хуже)
+DUCKDB_RANKING_FUNCTIONS = {
+    "min": "rank()",
+    "dense": "dense_rank()",
+    "first": "row_number()",
+    "max": "count(*)"
+}
+
+def quote_sql_literal(value):
+    """Строковая константа SQL"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def get_duckdb_json_path(path):
+    """Путь JSON для json_extract_string / json_exists по пути через точку"""
+    return quote_sql_literal("$" + "".join('."' + key.replace('"', '\\"') + '"' for key in path.split('.')))
+
+def get_duckdb_value_sql(path, missing, record_keys):
+    """
+    Текстовое значение поля записи лидера: ключ верхнего уровня берется из структуры
+    record (запись разбирается один раз), вложенный путь - из JSON leader
+
+    Args:
+        path (str): Путь через точку
+        missing (str): Выражение SQL для отсутствующего ключа
+        record_keys (list): Накопитель ключей верхнего уровня для структуры record
+    """
+    if '.' not in path:
+        if path not in record_keys:
+            record_keys.append(path)
+        key = quote_sql_literal(path)
+        return f"CASE WHEN list_contains(leader_keys, {key}) THEN struct_extract(record, {key}) ELSE {missing} END"
+    json_path = get_duckdb_json_path(path)
+    return f"CASE WHEN json_exists(leader, {json_path}) THEN json_extract_string(leader, {json_path}) ELSE {missing} END"
+
+def build_duckdb_field_sql(field, params, record_keys):
+    """
+    Выражение SQL для одного поля из описания flatten_fields (виды field, param, concat)
+
+    Повторяет поведение compile_flattener: отсутствующий ключ дает значение по
+    умолчанию, null в JSON остается пропуском (в concat - текст 'None').
+
+    Returns:
+        str: Выражение SQL или None, если вид поля не поддерживается движком
+    """
+    if isinstance(field, str):
+        field = {"column": field, "path": field}
+    kind = field.get("kind", "field")
+    default = field.get("default", "")
+    if not isinstance(default, str) or field.get("type") or field.get("mode"):
+        return None
+
+    if kind == "field":
+        value = get_duckdb_value_sql(field.get("path", field["column"]), quote_sql_literal(default), record_keys)
+        if field.get("empty_values"):
+            empty_values = ", ".join(quote_sql_literal(empty) for empty in field["empty_values"])
+            value = f"CASE WHEN ({value}) IN ({empty_values}) THEN {quote_sql_literal(default)} ELSE ({value}) END"
+        return value
+    if kind == "param":
+        return params.get(field["param"], quote_sql_literal(default))
+    if kind == "concat":
+        parts = [f"COALESCE({get_duckdb_value_sql(path, chr(39) * 2, record_keys)}, 'None')" for path in field["paths"]]
+        if field.get("skip_empty"):
+            parts = [f"NULLIF({part}, '')" for part in parts]
+            joined = f"trim(concat_ws(' ', {', '.join(parts)}))"
+        else:
+            joined = "trim(" + " || ' ' || ".join(parts) + ")"
+        if field.get("path"):
+            return f"COALESCE(NULLIF({get_duckdb_value_sql(field['path'], chr(39) * 2, record_keys)}, ''), {joined})"
+        return joined
+    return None
+
+def build_duckdb_rating_sql(flatten_fields, rankings, column_settings, skip_photo_data=False):
+    """
+    Запрос DuckDB: разворачивание выгрузки рейтинга, расчет мест и преобразование типов
+
+    Поддерживаются форматы convert_rating_list_json_to_excel: агрегированный
+    { "BLOCK_PERIOD": [страницы] }, одиночный ответ, список ответов и NDJSON.
+    Порядок строк и колонок совпадает с расчетом через pandas.
+
+    Args:
+        flatten_fields (list): rating_processing.flatten_fields
+        rankings (list): rating_processing.rankings
+        column_settings (dict): Настройки колонок (numeric_conversions, date_conversions)
+        skip_photo_data (bool): Не извлекать photoData (photo_data.mode = "skip")
+
+    Returns:
+        tuple: (sql, колонки мест) или None, если описание полей не поддерживается
+    """
+    params = {
+        "business_block": "CASE WHEN strpos(group_key, '_') > 0 THEN split_part(group_key, '_', 1) ELSE group_key END",
+        "time_period": "CASE WHEN strpos(group_key, '_') > 0 THEN substr(group_key, strpos(group_key, '_') + 1) ELSE '' END"
+    }
+    columns = {}
+    record_keys = []
+    for field in flatten_fields:
+        column = field if isinstance(field, str) else field.get("column")
+        expression = build_duckdb_field_sql(field, params, record_keys)
+        if expression is None:
+            return None
+        columns[column] = "''" if skip_photo_data and column == "photoData" else expression
+    columns["rating_contestantsText"] = "contestants_text"
+    columns["rating_contestantsCount"] = (
+        "CASE WHEN contestants_type IN ('BIGINT', 'UBIGINT', 'DOUBLE') THEN TRY_CAST(trunc(TRY_CAST(contestants_text AS DOUBLE)) AS BIGINT) "
+        "ELSE TRY_CAST(regexp_replace(regexp_extract(contestants_text, '(\\d+(?:\\s*\\d+)*)', 1), '\\s+', '', 'g') AS BIGINT) END"
+    )
+    flat_select = ",\n        ".join(f"{expression} AS {quote_sql_identifier(column)}" for column, expression in columns.items())
+
+    # Места: показатель приводится к числу, строки с пропуском в показателе или ключах не ранжируются
+    ranking_columns = {}
+    for ranking in rankings or []:
+        metric = ranking["metric"]
+        if metric not in columns:
+            continue
+        value = f"TRY_CAST({quote_sql_identifier(metric)} AS DOUBLE)"
+        direction = "ASC" if ranking.get("ascending", False) else "DESC"
+        method = ranking.get("method", "min")
+        function = DUCKDB_RANKING_FUNCTIONS.get(method, "rank()")
+        # "first" - при равенстве порядок строк выгрузки, "max" - рамка до последнего равного значения
+        order = f"{value} {direction} NULLS LAST"
+        if method == "first":
+            order += ", src_index, group_index, page_index, leader_index"
+        elif method == "max":
+            order += " RANGE BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW"
+        for column, keys in ranking.get("levels", {}).items():
+            if not all(key in columns for key in keys):
+                continue
+            partition = ", ".join(quote_sql_identifier(key) for key in keys)
+            missing = " OR ".join([f"{value} IS NULL"] + [f"{quote_sql_identifier(key)} IS NULL" for key in keys])
+            ranking_columns[column] = (
+                f"CASE WHEN {missing} THEN NULL ELSE {function} OVER "
+                f"(PARTITION BY {partition} ORDER BY {order}) END"
+            )
+    ranked_select = "".join(f",\n        {expression} AS {quote_sql_identifier(column)}" for column, expression in ranking_columns.items())
+
+    # Преобразования типов (numeric_conversions / date_conversions): замена колонки или новая колонка
+    replaced = {}
+    appended = {}
+    for group_settings in (column_settings or {}).get("numeric_conversions", {}).values():
+        for column in group_settings.get("fields", []):
+            if column not in columns:
+                continue
+            source = f"CAST({quote_sql_identifier(column)} AS VARCHAR)"
+            if group_settings.get("type", "integer") == "float":
+                expression = f"to_float({source}, {int(group_settings.get('decimal_places', 2))})"
+            else:
+                expression = f"to_integer({source})"
+            if group_settings.get("replace_original", True):
+                replaced[column] = expression
+            else:
+                appended[f"{column}_numeric"] = expression
+    for column, settings in (column_settings or {}).get("date_conversions", {}).items():
+        if column not in columns:
+            continue
+        python_format = settings.get("input_format", "DD.MM.YY").replace('DD', '%d').replace('MM', '%m').replace('YY', '%y').replace('YYYY', '%Y')
+        expression = f"to_date({quote_sql_identifier(column)}, {quote_sql_literal(python_format)})"
+        if settings.get("replace_original", True):
+            replaced[column] = expression
+        else:
+            appended[f"{column}_formatted"] = expression
+
+    # Структура записи лидера: ключи верхнего уровня как текст (одним разбором на запись)
+    record_structure = json.dumps({key: "VARCHAR" for key in record_keys or ["employeeNumber"]})
+    output_columns = [*columns, *ranking_columns]
+    final_select = ",\n    ".join(
+        [f"{replaced.get(column, quote_sql_identifier(column))} AS {quote_sql_identifier(column)}" for column in output_columns]
+        + [f"{expression} AS {quote_sql_identifier(column)}" for column, expression in appended.items()]
+    )
+    sql = f"""
+WITH src AS (
+    SELECT row_number() OVER () AS src_index, json AS doc
+    FROM read_json_objects($path, format = 'auto', maximum_object_size = $max_size)
+),
+groups AS (
+    SELECT src_index, unnest(map_entries(from_json(doc, '"MAP(VARCHAR, JSON)"'))) AS entry,
+        generate_subscripts(map_keys(from_json(doc, '"MAP(VARCHAR, JSON)"')), 1) AS group_index
+    FROM src
+    WHERE json_type(doc) = 'OBJECT' AND NOT json_exists(doc, '$.body.rating')
+),
+responses AS (
+    SELECT src_index, 0 AS group_index, '' AS group_key, 1 AS page_index, doc AS response
+    FROM src WHERE json_exists(doc, '$.body.rating')
+    UNION ALL
+    SELECT src_index, group_index, entry.key AS group_key,
+        generate_subscripts(pages, 1) AS page_index, unnest(pages) AS response
+    FROM (
+        SELECT src_index, group_index, entry,
+            CASE WHEN json_type(entry.value) = 'ARRAY' THEN from_json(entry.value, '["JSON"]') ELSE [entry.value] END AS pages
+        FROM groups
+    )
+),
+ratings AS (
+    SELECT src_index, group_index, group_key, page_index,
+        CASE WHEN json_exists(rating, '$.contestants') THEN json_extract_string(rating, '$.contestants') ELSE '' END AS contestants_text,
+        json_type(rating, '$.contestants') AS contestants_type,
+        from_json(json_extract(rating, '$.leaders'), '["JSON"]') AS leaders_list
+    FROM (
+        SELECT *, json_extract(response, '$.body.rating') AS rating
+        FROM responses
+        WHERE json_type(json_extract(response, '$.body.rating.leaders')) = 'ARRAY'
+    )
+),
+leaders AS (
+    SELECT src_index, group_index, group_key, page_index, contestants_text, contestants_type,
+        unnest(leaders_list) AS leader, generate_subscripts(leaders_list, 1) AS leader_index
+    FROM ratings
+),
+records AS (
+    SELECT *, json_keys(leader) AS leader_keys, from_json(leader, {quote_sql_literal(record_structure)}) AS record
+    FROM leaders
+),
+flat AS (
+    SELECT src_index, group_index, page_index, leader_index,
+        {flat_select}
+    FROM records
+),
+ranked AS (
+    SELECT *{ranked_select}
+    FROM flat
+)
+SELECT
+    {final_select}
+FROM ranked
+ORDER BY src_index, group_index, page_index, leader_index
+"""
+    return sql, list(ranking_columns)
+
+def transform_rating_json_with_duckdb(input_json_path, processing_config, column_settings, skip_photo_data=False):
+    """
+    Преобразование выгрузки рейтинга во встроенной DuckDB (engine = "duckdb")
+
+    Файл регистрируется в DuckDB напрямую (read_json_objects), разворачивание
+    body.rating.leaders, расчет мест (оконные функции) и numeric/date_conversions
+    выполняются одним запросом на всех ядрах. Колонки совпадают с расчетом через
+    pandas до фильтрации columns_to_keep / columns_to_remove.
+
+    Args:
+        input_json_path (str): Путь к JSON / NDJSON выгрузке
+        processing_config (dict): rating_processing (flatten_fields, rankings, duckdb_threads)
+        column_settings (dict): Настройки колонок (преобразования типов)
+        skip_photo_data (bool): Не извлекать photoData
+
+    Returns:
+        pd.DataFrame: Результат или None, если DuckDB не установлена или описание полей не поддерживается
+    """
+    if importlib.util.find_spec("duckdb") is None:
+        logger.warning(LOG_MESSAGES['duckdb_engine_unavailable'])
+        return None
+    query = build_duckdb_rating_sql(processing_config["flatten_fields"], processing_config.get("rankings"), column_settings, skip_photo_data)
+    if query is None:
+        logger.warning(LOG_MESSAGES['duckdb_engine_unsupported_fields'])
+        return None
+    sql, ranking_columns = query
+
+    import duckdb
+    start_time = time.perf_counter()
+    connection = duckdb.connect()
     try:
-        logger.info(LOG_MESSAGES['json_conversion_start'].format(input=input_json_path, output=output_excel_path))
-        if not os.path.exists(input_json_path):
-            logger.error(LOG_MESSAGES['json_file_not_found'].format(file_path=input_json_path))
-            return False
-        json_data = load_json_data(input_json_path)
+        if processing_config.get("duckdb_threads"):
+            connection.execute(f"SET threads = {int(processing_config['duckdb_threads'])}")
+        for macro in DUCKDB_CONVERSION_MACROS:
+            connection.execute(macro)
+        df = connection.execute(sql, {"path": input_json_path, "max_size": os.path.getsize(input_json_path) + 1}).df()
+    finally:
+        connection.close()
+
+    if df["rating_contestantsCount"].isna().all():
+        df = df.drop(columns="rating_contestantsCount")
+    else:
+        # Тип как у колонки из словарей строк в pandas: float64 при пропусках, иначе int64
+        counts = df["rating_contestantsCount"]
+        df["rating_contestantsCount"] = counts.astype("float64") if counts.isna().any() else counts.astype("int64")
+    for column in ranking_columns:
+        df[column] = df[column].astype("Int64")
+    logger.info(LOG_MESSAGES['duckdb_engine_done'].format(
+        file_name=os.path.basename(input_json_path), rows=len(df), seconds=time.perf_counter() - start_time
+    ))
+    return df
+
+def get_rating_column_settings(config_key):
+    """Настройки колонок рейтинга: rating_processing.column_settings, иначе column_settings скрипта"""
+    if config_key != "rating_list" or "rating_list" not in FUNCTION_CONFIGS:
+        return None
+    config = FUNCTION_CONFIGS["rating_list"]
+    # Приоритет настроек из rating_processing, если они заданы
+    if "rating_processing" in config and "column_settings" in config["rating_processing"]:
+        return config["rating_processing"]["column_settings"]
+    return config.get("column_settings")
+
+def build_rating_list_frame(input_json_path, config_key=None):
+    """
+    Разбор выгрузки rating_list в итоговый DataFrame (места, типы, настройки колонок)
+
+    Args:
+        input_json_path (str): Путь к входному JSON файлу
+        config_key (str, optional): Ключ конфигурации для получения настроек
+
+    Returns:
+        pd.DataFrame: Данные листа DATA или None, если данных нет
+    """
+    _, processing_config = get_processing_config(config_key)
+    column_settings = get_rating_column_settings(config_key)
+
+    # Движок DuckDB: разворачивание, места и преобразование типов одним запросом
+    if processing_config.get("engine") == "duckdb":
+        df = transform_rating_json_with_duckdb(
+            input_json_path, processing_config, column_settings, get_photo_data_mode(config_key) == "skip"
+        )
+        if df is not None:
+            if df.empty:
+                logger.warning(LOG_MESSAGES['no_data_warning'])
+                return None
+            df = export_photo_data(df, config_key)
+            df = plan_dataframe_dtypes(df)
+            if column_settings:
+                df = apply_column_settings(df, {
+                    "columns_to_keep": column_settings.get("columns_to_keep", []),
+                    "columns_to_remove": column_settings.get("columns_to_remove", [])
+                })
+            return df
+
+    # Параллельный разбор крупной выгрузки по диапазонам ключей
+    extracted = extract_json_in_parallel(input_json_path, config_key, extract_rating_rows)
+
+    if extracted is None:
+        json_data = load_json_data(input_json_path, get_photo_data_mode(config_key) == "skip")
         if json_data is None:
-            return False
+            return None
 
         logger.info(LOG_MESSAGES['json_data_processing'])
-        rows = []
-
-        def extract_from_one_response(response_obj, fallback_business_block="", fallback_time_period=""):
-            rating = (response_obj or {}).get('body', {}).get('rating', {})
-            leaders = rating.get('leaders')
-            contestants_text = rating.get('contestants', '')
-            # Пытаемся извлечь численное значение из текста (например: "1 557 участников по стране")
-            contestants_count = None
-            try:
-                match = re.search(r"(\d+(?:\s*\d+)*)", str(contestants_text))
-                if match:
-                    contestants_count = int(re.sub(r"\s+", "", match.group(1)))
-            except Exception:
-                contestants_count = None
-
-            if isinstance(leaders, list):
-                for leader in leaders:
-                    row = flatten_rating_leader_data(leader, fallback_business_block, fallback_time_period)
-                    # Добавляем информацию о количестве участников
-                    row['rating_contestantsText'] = contestants_text
-                    if contestants_count is not None:
-                        row['rating_contestantsCount'] = contestants_count
-                    rows.append(row)
+        extracted = {"rows": []}
 
         # Вариант 1: агрегированный формат { "BLOCK_PERIOD": [ {page1}, {page2}, ... ] }
         if isinstance(json_data, dict) and not ('body' in json_data and 'rating' in json_data.get('body', {})):
-            for key, pages in json_data.items():
-                business_block = key.split('_')[0] if '_' in key else key
-                time_period = key[len(business_block) + 1:] if '_' in key else ''
-                logger.debug(LOG_MESSAGES['rating_group_processing'].format(
-                    business_block=business_block, time_period=time_period, count=len(pages) if isinstance(pages, list) else 1))
-                if isinstance(pages, list):
-                    for item in pages:
-                        extract_from_one_response(item, business_block, time_period)
-                else:
-                    # Если по ключу лежит одиночный объект ответа
-                    extract_from_one_response(pages, business_block, time_period)
+            extracted = extract_rating_rows(json_data)
         # Вариант 2: одиночный ответ { "success": true, "body": { "rating": { "leaders": [...] } } }
         elif isinstance(json_data, dict) and ('body' in json_data and 'rating' in json_data.get('body', {})):
-            extract_from_one_response(json_data)
+            extract_rating_response_rows(json_data, extracted["rows"])
         # Вариант 3: список ответов [ {singleResponse}, {singleResponse}, ... ]
         elif isinstance(json_data, list):
             for item in json_data:
-                extract_from_one_response(item)
+                extract_rating_response_rows(item, extracted["rows"])
 
-        if not rows:
-            logger.warning(LOG_MESSAGES['no_data_warning'])
-            return False
+    if len(extracted["rows"]) == 0:
+        logger.warning(LOG_MESSAGES['no_data_warning'])
+        return None
 
-        df = pd.DataFrame(rows)
-        if df.empty:
-            logger.warning(LOG_MESSAGES['no_data_warning'])
-            return False
+    df = pd.DataFrame(extracted["rows"])
+    if df.empty:
+        logger.warning(LOG_MESSAGES['no_data_warning'])
+        return None
 
-        logger.info(LOG_MESSAGES['json_records_processed'].format(count=len(df)))
-        
-        # Расчет мест по кристаллам на разных уровнях
+    logger.info(LOG_MESSAGES['json_records_processed'].format(count=len(df)))
+    
+    # Вынос base64 photoData в файлы изображений (photo_data.mode = "files")
+    df = export_photo_data(df, config_key)
+    
+    # Расчет мест по кристаллам на разных уровнях
+    if processing_config.get("rankings"):
         logger.info(LOG_MESSAGES['crystal_rankings_start'])
-        df = calculate_crystal_rankings(df)
+        df = calculate_rankings(df, processing_config["rankings"])
         logger.info(LOG_MESSAGES['crystal_rankings_completed'])
 
-        if config_key == "rating_list" and "rating_list" in FUNCTION_CONFIGS:
-            config = FUNCTION_CONFIGS["rating_list"]
-            # Приоритет настроек из rating_processing, если они заданы
-            if "rating_processing" in config and "column_settings" in config["rating_processing"]:
-                column_settings = config["rating_processing"]["column_settings"]
-            else:
-                column_settings = config.get("column_settings")
-            if column_settings:
-                logger.info(LOG_MESSAGES['column_settings_applying'])
-                df = apply_column_settings(df, column_settings)
-                logger.info(LOG_MESSAGES['column_settings_applied'].format(count=len(df.columns)))
+    # Планирование типов данных для экономии памяти
+    df = plan_dataframe_dtypes(df)
+
+    if column_settings:
+        logger.info(LOG_MESSAGES['column_settings_applying'])
+        df = apply_column_settings(df, column_settings)
+        logger.info(LOG_MESSAGES['column_settings_applied'].format(count=len(df.columns)))
+    return df
+
+@measure_time
+def convert_rating_list_json_to_excel(input_json_path, output_excel_path, config_key=None):
+    """Конвертация JSON rating_list в плоскую структуру Excel"""
+    try:
+        logger.info(LOG_MESSAGES['json_conversion_start'].format(input=input_json_path, output=output_excel_path))
+        if not os.path.exists(input_json_path):
+            logger.error(LOG_MESSAGES['json_file_not_found'].format(file_path=input_json_path))
+            return False
+        df = build_rating_list_frame(input_json_path, config_key)
+        if df is None:
+            return False
 
-        return save_excel_file(df, output_excel_path, "rating_list")
+        # Сравнение с предыдущим снимком (лист DIFF)
+        extra_sheets = add_snapshot_diff(df, config_key, output_excel_path)
+        # Сводка по сотрудникам (лист EMPLOYEE_ROLLUP) и сводные листы
+        extra_sheets = add_employee_rollup(df, config_key, extra_sheets)
+        extra_sheets = add_pivot_sheets(df, config_key, extra_sheets)
+        return save_output_files(df, output_excel_path, "rating_list", extra_sheets, input_json_path)
     except Exception as e:
         logger.error(LOG_MESSAGES['json_conversion_error'].format(error=str(e)))
         return False
 
+# Построение снимка из JSON выгрузки для сравнения (snapshot_diff.previous_json_file)
+SNAPSHOT_FRAME_BUILDERS = {
+    "leaders_for_admin": build_leaders_frame,
+    "rating_list": build_rating_list_frame
+}
+
 @measure_time
 def convert_json_to_excel(input_json_path, output_excel_path, config_key=None):
     """
@@ -3609,6 +7627,22 @@ def convert_json_to_excel(input_json_path, output_excel_path, config_key=None):
     Returns:
         bool: True если конвертация успешна, False в противном случае
     """
+    # Определяем конвертер и вариант структуры по началу файла
+    structure = sniff_json_structure(input_json_path) if os.path.exists(input_json_path) else None
+    if structure:
+        converter_key, layout = structure
+        logger.info(LOG_MESSAGES['json_structure_detected'].format(
+            file_name=os.path.basename(input_json_path), converter=converter_key, layout=layout
+        ))
+        if converter_key == "leaders_for_admin":
+            return convert_leaders_json_to_excel(input_json_path, output_excel_path, "leaders_for_admin")
+        elif converter_key == "reward":
+            return convert_reward_json_to_excel(input_json_path, output_excel_path, "reward", layout)
+        elif converter_key == "reward_processing":
+            return convert_reward_profiles_json_to_excel(input_json_path, output_excel_path, "reward", layout)
+        elif converter_key == "rating_list":
+            return convert_rating_list_json_to_excel(input_json_path, output_excel_path, "rating_list")
+    
     # Определяем тип данных по config_key
     if config_key == "leaders_for_admin":
         return convert_leaders_json_to_excel(input_json_path, output_excel_path, config_key)
@@ -3736,25 +7770,41 @@ def convert_specific_json_file(file_name_without_extension, config_key=None):
             logger.error(LOG_MESSAGES['json_file_not_found'].format(file_path=input_json_path))
             return False
         
+        # Слияние JSON файлов шардов одного запуска (если файл является шардом)
+        input_json_path = merge_shard_json_files(input_json_path) or input_json_path
+
+        # Слияние с файлом догрузки и проверка полноты выгрузки (если включено в настройках)
+        _, processing_config = get_processing_config(config_key)
+        gap_fill_json_file = processing_config.get("gap_fill_json_file")
+        if gap_fill_json_file:
+            gap_json_path = os.path.join(json_dir, f"{gap_fill_json_file}{FILE_EXTENSIONS['JSON']}")
+            if os.path.exists(gap_json_path):
+                input_json_path = merge_gap_fill_json(input_json_path, gap_json_path) or input_json_path
+            else:
+                logger.warning(LOG_MESSAGES['json_file_not_found'].format(file_path=gap_json_path))
+        if processing_config.get("gap_fill_check"):
+            check_and_generate_gap_fill_script(input_json_path, config_key)
+
         # Логируем начало конвертации
         logger.debug(LOG_MESSAGES['data_validation_start'])
         logger.debug(LOG_MESSAGES['data_cleaning_start'])
             
         # Конвертируем файл
         if convert_json_to_excel(input_json_path, output_excel_path, config_key):
-            # Получаем размер файла
-            if os.path.exists(output_excel_path):
-                file_size = os.path.getsize(output_excel_path)
-                file_size_mb = file_size / (1024 * 1024)  # Конвертируем в МБ
-                logger.info(LOG_MESSAGES['json_excel_success'].format(
-                    file_path=output_excel_path,
-                    size=f"{file_size_mb:.2f} МБ"
-                ))
-            else:
-                logger.info(LOG_MESSAGES['json_excel_success'].format(
-                    file_path=output_excel_path,
-                    size="неизвестно"
-                ))
+            # Получаем размер файла (отложенный результат логируется при записи в save_enriched_outputs())
+            if not is_output_pending(output_excel_path):
+                if os.path.exists(output_excel_path):
+                    file_size = os.path.getsize(output_excel_path)
+                    file_size_mb = file_size / (1024 * 1024)  # Конвертируем в МБ
+                    logger.info(LOG_MESSAGES['json_excel_success'].format(
+                        file_path=output_excel_path,
+                        size=f"{file_size_mb:.2f} МБ"
+                    ))
+                else:
+                    logger.info(LOG_MESSAGES['json_excel_success'].format(
+                        file_path=output_excel_path,
+                        size="неизвестно"
+                    ))
             
             # Логируем завершение конвертации
             logger.debug(LOG_MESSAGES['data_validation_completed'])
@@ -3909,6 +7959,7 @@ def main():
             
             # ВТОРОЙ ЭТАП: Обработка всех JSON файлов в Excel
             main_logger.info(LOG_MESSAGES['stage2_title'])
+            begin_enrichment_batch()
             for script_name in ACTIVE_SCRIPTS:
                 if script_name in FUNCTION_CONFIGS:
                     config = FUNCTION_CONFIGS[script_name]
@@ -3986,6 +8037,10 @@ def main():
                             main_logger.warning(f"Для скрипта {script_name} не указан json_file в конфигурации")
                     else:
                         main_logger.info(LOG_MESSAGES['json_processing_skipped'].format(script_name=script_name, operations=active_operations))
+
+            # Отложенное сохранение с обогащением атрибутами сотрудников
+            if not save_enriched_outputs():
+                main_logger.error(LOG_MESSAGES['employee_enrichment_failed'])
         else:
             main_logger.warning(LOG_MESSAGES['no_active_scripts'])
             
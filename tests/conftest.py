@@ -0,0 +1,17 @@
+"""Общие настройки тестов: импорт main.py из корня репозитория и логгер без файлов"""
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def test_logger(monkeypatch):
+    """Логгер модуля пишет в стандартный logging (setup_logging создает файлы в LOGS)"""
+    monkeypatch.setattr(main, "logger", logging.getLogger("GameScriptGenerator.tests"))
+    return main.logger
@@ -0,0 +1,71 @@
+"""Равенство результатов движков rating_list: DuckDB (engine = "duckdb") и pandas"""
+import json
+import random
+
+import pandas as pd
+import pytest
+
+import main
+
+pytest.importorskip("duckdb")
+
+BUSINESS_BLOCKS = ["KMKKSB", "MNS", "SERVICEMEN"]
+TIME_PERIODS = ["ACTIVESEASON", "SEASON_2025_1"]
+
+
+def random_leader(rng):
+    """Лидер рейтинга с пропусками, null и значениями, требующими очистки"""
+    leader = {}
+    for key in ["employeeNumber", "lastName", "firstName", "employeeStatus", "businessBlock", "photoData"]:
+        roll = rng.random()
+        if roll < 0.05:
+            continue
+        if roll < 0.08:
+            leader[key] = None
+            continue
+        leader[key] = str(rng.randint(1, 300)) if key == "employeeNumber" else rng.choice(["A", "B", "Иванов", "x y"])
+    leader["terDivisionName"] = rng.choice(["T1", "T2", None, ""])
+    leader["gosbCode"] = rng.choice(["-", "12", "013", 7, "", None, "1 2"])
+    leader["placeInRating"] = rng.choice(["-", "3", 4, "5.7"])
+    leader["crystalsEarned"] = rng.choice(["-", str(rng.randint(0, 30)), rng.randint(0, 30), "1,5", "1.2.3", None, ""])
+    return leader
+
+
+def random_rating_dump(seed):
+    """Выгрузка {BLOCK_PERIOD: [страницы]} (часть групп - одна страница без массива, группа без периода)"""
+    rng = random.Random(seed)
+    groups = [f"{block}_{period}" for block in BUSINESS_BLOCKS for period in TIME_PERIODS] + ["X"]
+    dump = {}
+    for group in groups:
+        pages = [
+            {"body": {"rating": {
+                "leaders": [random_leader(rng) for _ in range(rng.randint(0, 30))],
+                "contestants": rng.choice(["1 557 участников", "нет", 12, "", None])
+            }}}
+            for _ in range(rng.randint(1, 3))
+        ]
+        dump[group] = pages if rng.random() < 0.8 else pages[0]
+    return dump
+
+
+def build_frame(path, engine, method, monkeypatch):
+    processing_config = main.get_processing_config("rating_list")[1]
+    monkeypatch.setitem(processing_config, "engine", engine)
+    monkeypatch.setitem(processing_config["rankings"][0], "method", method)
+    return main.build_rating_list_frame(str(path), "rating_list")
+
+
+@pytest.mark.parametrize("method", ["min", "max", "dense", "first"])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_duckdb_matches_pandas(tmp_path, monkeypatch, seed, method):
+    path = tmp_path / "rating_list.json"
+    path.write_text(json.dumps(random_rating_dump(seed), ensure_ascii=False), encoding="utf-8")
+
+    expected = build_frame(path, "pandas", method, monkeypatch)
+    result = build_frame(path, "duckdb", method, monkeypatch)
+
+    assert list(result.columns) == list(expected.columns)
+    assert result.dtypes.to_dict() == expected.dtypes.to_dict()
+    pd.testing.assert_frame_equal(
+        result.reset_index(drop=True), expected.reset_index(drop=True), check_categorical=False
+    )
@@ -0,0 +1,61 @@
+"""Обогащение результатов атрибутами сотрудников (EMPLOYEE_ENRICHMENT_SETTINGS)"""
+import pandas as pd
+import pytest
+
+import main
+
+
+@pytest.fixture
+def enrichment(monkeypatch):
+    monkeypatch.setitem(main.EMPLOYEE_ENRICHMENT_SETTINGS, "enabled", True)
+    monkeypatch.setattr(main, "PENDING_ENRICHMENT_OUTPUTS", [])
+    monkeypatch.setattr(main, "enrichment_batch_open", False)
+    monkeypatch.setitem(main.get_processing_config("rating_list")[1], "output_formats", ["csv"])
+
+
+def read_csv(path):
+    return pd.read_csv(path.with_suffix(".csv"), sep=";", dtype=str, keep_default_na=False)
+
+
+def test_dimension_prefers_latest_non_empty_value():
+    old = pd.DataFrame({"employeeNumber": ["1", "2"], "terDivisionName": ["old", "x"], "gosbCode": ["g", ""]})
+    new = pd.DataFrame({"employeeNumber": [1, 3], "terDivisionName": ["new", None], "gosbCode": [None, "z"]})
+    dimension = main.build_employee_dimension(
+        [{"df": old, "snapshot_time": 1}, {"df": new, "snapshot_time": 2}], "employeeNumber", ["terDivisionName", "gosbCode"]
+    )
+    assert dimension.to_dict("index") == {
+        "1": {"terDivisionName": "new", "gosbCode": "g"},
+        "2": {"terDivisionName": "x", "gosbCode": None},
+        "3": {"terDivisionName": None, "gosbCode": "z"}
+    }
+
+
+def test_outside_batch_writes_immediately(tmp_path, enrichment):
+    df = pd.DataFrame({"employeeNumber": ["1"], "terDivisionName": ["ТБ"]})
+    output_path = tmp_path / "RATING.xlsx"
+    assert main.save_output_files(df, str(output_path), "rating_list") is True
+    assert main.PENDING_ENRICHMENT_OUTPUTS == []
+    assert read_csv(output_path)["emp_terDivisionName"].tolist() == ["ТБ"]
+
+
+def test_batch_defers_until_flush(tmp_path, enrichment):
+    main.begin_enrichment_batch()
+    first = pd.DataFrame({"employeeNumber": ["1"], "terDivisionName": ["ТБ"]})
+    second = pd.DataFrame({"employeeNumber": ["1"], "crystalsEarned": [5]})
+    paths = [tmp_path / "FIRST.xlsx", tmp_path / "SECOND.xlsx"]
+    assert main.save_output_files(first, str(paths[0]), "rating_list", source_path="a_20250101-000000.json")
+    assert main.save_output_files(second, str(paths[1]), "rating_list", source_path="b_20250102-000000.json")
+    assert main.is_output_pending(str(paths[1]))
+    assert not paths[1].with_suffix(".csv").exists()
+
+    assert main.save_enriched_outputs() is True
+    assert main.enrichment_batch_open is False
+    assert read_csv(paths[1])["emp_terDivisionName"].tolist() == ["ТБ"]
+
+
+def test_flush_reports_write_failure(tmp_path, enrichment, monkeypatch):
+    monkeypatch.setitem(main.get_processing_config("rating_list")[1], "output_formats", ["unknown"])
+    main.begin_enrichment_batch()
+    main.save_output_files(pd.DataFrame({"employeeNumber": ["1"]}), str(tmp_path / "X.xlsx"), "rating_list")
+    assert main.save_enriched_outputs() is False
+
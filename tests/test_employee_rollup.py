@@ -0,0 +1,32 @@
+"""Сводка по сотрудникам (compute_employee_rollup)"""
+import pandas as pd
+
+import main
+
+DATA = pd.DataFrame({
+    "employeeNumber": ["1", "1", "2", "", None, "2"],
+    "fullName": ["Иванов", "Иванов", "Петров", "Без номера", "Без номера", "Петров"],
+    "rating_timePeriod": ["SEASON", "MONTH", "SEASON", "SEASON", "MONTH", ""],
+    "crystalsEarned": ["10", "5", "7", "100", "200", "3"]
+})
+ROLLUP = {
+    "keys": ["employeeNumber"], "columns": ["fullName"],
+    "aggregations": {"crystals": ["crystalsEarned", "sum"]}, "pivot_column": "rating_timePeriod"
+}
+
+
+def test_rollup_drops_blank_keys_and_pivot_values():
+    rollup = main.compute_employee_rollup(DATA, ROLLUP)
+
+    assert rollup["employeeNumber"].tolist() == ["1", "2"]
+    assert rollup.columns.tolist() == ["employeeNumber", "fullName", "crystals_MONTH", "crystals_SEASON"]
+    assert rollup["crystals_SEASON"].tolist() == [10, 7]
+
+
+def test_rollup_labels_blank_keys():
+    rollup = main.compute_employee_rollup(DATA, {**ROLLUP, "empty_label": "Не указан"})
+
+    assert rollup["employeeNumber"].tolist() == ["1", "2", "Не указан"]
+    assert rollup.columns.tolist() == ["employeeNumber", "fullName", "crystals_MONTH", "crystals_SEASON", "crystals_Не указан"]
+    assert rollup.set_index("employeeNumber").loc["Не указан", "crystals_SEASON"] == 100
+    assert rollup.set_index("employeeNumber").loc["2", "crystals_Не указан"] == 3
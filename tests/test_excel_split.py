@@ -0,0 +1,35 @@
+"""Разбиение DATA на части (excel_split): строки с пустым ключом не теряются"""
+import openpyxl
+import pandas as pd
+import pytest
+
+import main
+
+
+def make_leaders():
+    divisions = ["ТБ-1", None, "ТБ-2", "ТБ-1", None, "ТБ-3", None]
+    df = pd.DataFrame({"employeeNumber": [str(number) for number in range(len(divisions))], "terDivisionName": divisions})
+    # Планировщик переводит повторяющиеся колонки в category
+    df["terDivisionName"] = df["terDivisionName"].astype("category")
+    return df
+
+
+def test_partitions_cover_rows_with_nan_key():
+    df = make_leaders()
+    partitions = main.get_excel_partitions(df, {"key": "terDivisionName", "max_rows": 2})
+
+    assert sum(len(partition["positions"]) for partition in partitions) == len(df)
+    assert sorted(position for partition in partitions for position in partition["positions"]) == list(range(len(df)))
+    nan_positions = [list(partition["positions"]) for partition in partitions if pd.isna(partition["key_value"])]
+    assert nan_positions == [[1, 4], [6]]
+
+
+@pytest.mark.parametrize("target", ["sheets", "workbooks"])
+def test_split_writes_every_row(tmp_path, target):
+    df = make_leaders()
+    output_path = tmp_path / "LEADERS.xlsx"
+
+    assert main.save_excel_partitions(df, str(output_path), "leaders_for_admin", None, {"key": "terDivisionName", "target": target})
+
+    index_rows = list(openpyxl.load_workbook(output_path)["INDEX"].values)[1:]
+    assert sum(row[4] for row in index_rows) == len(df)
@@ -0,0 +1,57 @@
+"""Парсеры JSON выгрузок (JSON_PARSE_BACKENDS): откат на json и бенчмарк по видам выгрузок"""
+import json
+import logging
+import math
+
+import pytest
+
+import main
+
+LEADER = {
+    "employeeNumber": "00123456", "lastName": "Иванов", "firstName": "Иван", "terDivisionName": "Московский банк",
+    "gosbCode": 9038, "indicatorValue": 1234.5, "successValue": "1 234,5", "photoData": "iVBORw0KGgo" * 20,
+    "divisionRatings": [{"groupCode": "BANK", "placeInRating": 12}, {"groupCode": "TB", "placeInRating": 3}]
+}
+
+# Виды выгрузок: турниры и награды {код: [страницы]}, профили наград и ответы рейтинга
+DUMP_SHAPES = {
+    "leaders_pages": lambda count: {
+        f"T{code}": [{"body": {"tournament": {"leaders": [LEADER] * 50}}}] * 4 for code in range(count)
+    },
+    "reward_pages": lambda count: {
+        f"R{code}": [{"body": {"badge": {"rewardCode": f"R{code}", "leaders": [LEADER] * 50}}}] * 4 for code in range(count)
+    },
+    "reward_profiles": lambda count: {"profiles": [LEADER] * (count * 200)},
+    "rating_responses": lambda count: [{"body": {"rating": {"contestants": "1 557 участников", "leaders": [LEADER] * 50}}}] * (count * 4)
+}
+
+
+@pytest.mark.parametrize("shape", DUMP_SHAPES)
+def test_benchmark_json_backends_per_dump_shape(tmp_path, shape, caplog):
+    raw_bytes = json.dumps(DUMP_SHAPES[shape](20), ensure_ascii=False).encode()
+    path = tmp_path / f"{shape}.json"
+    path.write_bytes(raw_bytes)
+
+    with caplog.at_level(logging.INFO):
+        timings = main.benchmark_json_backends(str(path), raw_bytes)
+
+    assert list(timings) == list(reversed(main.get_available_json_backends()))
+    assert all(seconds > 0 for seconds in timings.values())
+    assert len([record for record in caplog.records if "Бенчмарк JSON" in record.getMessage()]) == len(timings)
+    expected = json.loads(raw_bytes)
+    for name in timings:
+        assert main.JSON_PARSE_BACKENDS[name]["function"](raw_bytes) == expected
+
+
+@pytest.mark.skipif("orjson" not in main.get_available_json_backends(), reason="orjson не установлен")
+def test_orjson_falls_back_to_stdlib_on_nan(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(main, "JSON_PARSE_BACKEND", "orjson")
+    path = tmp_path / "nan.json"
+    path.write_bytes(b'{"T1": [{"indicatorValue": NaN, "successValue": Infinity}]}')
+
+    with caplog.at_level(logging.WARNING):
+        json_data = main.load_json_data(str(path))
+
+    assert math.isnan(json_data["T1"][0]["indicatorValue"])
+    assert json_data["T1"][0]["successValue"] == math.inf
+    assert any("повторный разбор стандартным json" in record.getMessage() for record in caplog.records)
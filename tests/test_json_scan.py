@@ -0,0 +1,45 @@
+"""Поиск границ членов объекта верхнего уровня (scan_json_top_level_members)"""
+import json
+
+import pytest
+
+import main
+
+DUMP = {
+    "T1": [{"leaders": [{"name": "a]}\"[{"}]}],
+    'T2\\"{': {"profiles": ["\\\\", "x\\\\\"]"]},
+    "T3": 1,
+    "T4": [[], {}]
+}
+
+
+def expected_scan(raw_bytes):
+    """Границы членов по разбору json.loads: конец каждого члена-контейнера"""
+    body_start = raw_bytes.index(b'{') + 1
+    member_ends = []
+    position = body_start
+    decoder = json.JSONDecoder()
+    text = raw_bytes.decode()
+    for key, value in json.loads(text).items():
+        position = text.index(json.dumps(key), position) + len(json.dumps(key))
+        position = text.index(':', position) + 1
+        while text[position] in ' \n':
+            position += 1
+        _, position = decoder.raw_decode(text, position)
+        if isinstance(value, (list, dict)):
+            member_ends.append(position)
+    return body_start, raw_bytes.rindex(b'}'), member_ends
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 16, main.JSON_SCAN_BLOCK_SIZE])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_scan_skips_brackets_and_escaped_quotes_in_strings(monkeypatch, block_size, indent):
+    monkeypatch.setattr(main, "JSON_SCAN_BLOCK_SIZE", block_size)
+    raw_bytes = b' \n' + json.dumps(DUMP, indent=indent).encode() + b'\n'
+
+    assert main.scan_json_top_level_members(raw_bytes) == expected_scan(raw_bytes)
+
+
+@pytest.mark.parametrize("raw_bytes", [b'[{"a": 1}]', b'"{}"', b'', b'{"a": [1, 2]'])
+def test_scan_rejects_non_object_and_truncated(raw_bytes):
+    assert main.scan_json_top_level_members(raw_bytes) is None
@@ -0,0 +1,56 @@
+"""Запись в базу LoadDB (save_sqlite_file): несколько файлов одного запуска в одной таблице"""
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import main
+
+
+def read_table(db_path, table):
+    with sqlite3.connect(db_path) as connection:
+        return pd.read_sql_query(f"SELECT * FROM {table} ORDER BY source_file, employeeNumber", connection)
+
+
+def test_files_of_one_run_do_not_replace_each_other(tmp_path):
+    first = pd.DataFrame({"employeeNumber": ["1", "2"], "rewardCode": ["A", "A"]})
+    second = pd.DataFrame({"employeeNumber": ["3"], "rewardCode": ["B"]})
+    (db_path,) = main.save_sqlite_file(first, str(tmp_path / "REWARD_A.xlsx"), "reward")
+    main.save_sqlite_file(second, str(tmp_path / "REWARD_B.xlsx"), "reward")
+    # Повторная запись того же файла заменяет только его строки
+    main.save_sqlite_file(first, str(tmp_path / "REWARD_A.xlsx"), "reward")
+
+    table = read_table(db_path, "reward")
+    assert table["employeeNumber"].tolist() == ["1", "2", "3"]
+    assert table["source_file"].tolist() == ["REWARD_A.xlsx", "REWARD_A.xlsx", "REWARD_B.xlsx"]
+    with sqlite3.connect(db_path) as connection:
+        runs = connection.execute("SELECT source_file, rows FROM load_runs ORDER BY source_file").fetchall()
+    assert runs == [("REWARD_A.xlsx", 2), ("REWARD_B.xlsx", 1)]
+
+
+def test_reward_leaders_use_own_table(tmp_path):
+    profiles = pd.DataFrame({"employeeNumber": ["1"], "badgeName": ["X"]})
+    leaders = pd.DataFrame({"employeeNumber": ["2"], "contestants": [10]})
+    (db_path,) = main.save_sqlite_file(profiles, str(tmp_path / "REWARD_P.xlsx"), "reward")
+    main.save_sqlite_file(leaders, str(tmp_path / "REWARD_L.xlsx"), "reward", dataset="leaders")
+
+    assert list(read_table(db_path, "reward").columns) == ["run_id", "source_file", "employeeNumber", "badgeName"]
+    assert read_table(db_path, "reward_leaders")["contestants"].tolist() == [10]
+
+
+
+@pytest.mark.parametrize("dates, dtype", [
+    (["01.02.25", "", "15.03.25"], "str"),
+    # Колонка category после планировщика типов: даты приходят значениями Timestamp
+    (["01.02.25", "15.03.25", "15.03.25"], "category")
+])
+def test_converted_date_column_is_stored_as_text(tmp_path, dates, dtype):
+    column_settings = main.get_processing_config("reward")[1]["column_settings"]
+    df = pd.DataFrame({"employeeNumber": ["1", "2", "3"], "receivingDate": pd.Series(dates, dtype=dtype)})
+    df = main.apply_column_settings(df, {"date_conversions": column_settings["date_conversions"]})
+
+    (db_path,) = main.save_sqlite_file(df, str(tmp_path / "REWARD_L.xlsx"), "reward", dataset="leaders")
+
+    stored = read_table(db_path, "reward_leaders")["receivingDate"].tolist()
+    assert stored[0] == "2025-02-01 00:00:00" and stored[2] == "2025-03-15 00:00:00"
+    assert stored[1] in ("", "2025-03-15 00:00:00")
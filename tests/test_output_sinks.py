@@ -0,0 +1,39 @@
+"""Колоночные форматы (parquet / feather) для DataFrame после планировщика типов"""
+import os
+
+import pandas as pd
+import pytest
+
+import main
+
+
+def make_planned_leaders():
+    values = [1.5, "2,5", "", 3] * 250
+    df = pd.DataFrame({"employeeNumber": [str(number) for number in range(len(values))], "indicatorValue": values})
+    df = main.plan_dataframe_dtypes(df)
+    assert isinstance(df["indicatorValue"].dtype, pd.CategoricalDtype)
+    return df
+
+
+@pytest.mark.parametrize("sink, read", [
+    (main.save_parquet_file, pd.read_parquet),
+    (main.save_feather_file, pd.read_feather)
+])
+def test_mixed_type_category_is_written(tmp_path, sink, read):
+    df = make_planned_leaders()
+
+    (path,) = sink(df, str(tmp_path / "LEADERS.xlsx"))
+
+    assert read(path)["indicatorValue"].astype(str).tolist()[:4] == ["1.5", "2,5", "", "3"]
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_failed_write_leaves_no_partial_file(tmp_path):
+    def write(frame, target):
+        with open(target, "wb") as f:
+            f.write(b"partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        main.write_columnar_file(make_planned_leaders(), str(tmp_path / "LEADERS.feather"), write)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,42 @@
+"""Пропуск photoData до разбора JSON (read_json_without_photo_data)"""
+import json
+
+import main
+
+DUMP = {
+    "T1": [{"body": {"tournament": {"leaders": [
+        {"employeeNumber": "1", "photoData": "iVBORw0KGgo" * 100},
+        {"employeeNumber": "2", "photoData" : "", "lastName": "photoData"}
+    ]}}}]
+}
+
+
+def expected_dump():
+    expected = json.loads(json.dumps(DUMP))
+    for leader in expected["T1"][0]["body"]["tournament"]["leaders"]:
+        leader["photoData"] = ""
+    return expected
+
+
+def test_read_json_without_photo_data_range(tmp_path):
+    raw_bytes = json.dumps(DUMP, indent=1).encode()
+    path = tmp_path / "leaders.json"
+    path.write_bytes(b'\xef\xbb\xbf' + raw_bytes)
+
+    json_bytes, stripped = main.read_json_without_photo_data(str(path))
+    assert stripped == len("iVBORw0KGgo") * 100
+    assert json.loads(json_bytes) == expected_dump()
+
+    # Диапазон тела объекта, как у частей параллельного разбора
+    body_start = raw_bytes.index(b'{') + 4
+    body_end = raw_bytes.rindex(b'}') + 3
+    chunk, _ = main.read_json_without_photo_data(str(path), body_start, body_end)
+    assert json.loads(b'{' + chunk + b'}') == expected_dump()
+
+
+def test_load_json_data_skips_photo_data_with_bom(tmp_path):
+    path = tmp_path / "leaders.json"
+    path.write_bytes(b'\xef\xbb\xbf' + json.dumps(DUMP).encode())
+
+    assert main.load_json_data(str(path), skip_photo_data=True) == expected_dump()
+    assert main.load_json_data(str(path))["T1"][0]["body"]["tournament"]["leaders"][0]["photoData"] != ""
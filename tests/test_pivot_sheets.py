@@ -0,0 +1,29 @@
+"""Сводные листы (pivot_sheets): пустые ключи"""
+import pandas as pd
+
+import main
+
+DATA = pd.DataFrame({
+    "rating_businessBlock": ["KMB", "KMB", "KMB", "RB"],
+    "gosbCode": [38, 0, 40, 38],
+    "crystalsEarned": [10, 5, 7, 1]
+})
+PIVOT = {"index": ["rating_businessBlock"], "columns": ["gosbCode"], "values": {"crystals": ["crystalsEarned", "sum"]}}
+
+
+def test_blank_keys_are_labelled():
+    pivot = main.compute_pivot_sheet(DATA, {**PIVOT, "empty_values": ["", 0], "empty_label": "Без ГОСБ"})
+    assert pivot.columns.tolist() == ["rating_businessBlock", "crystals_38", "crystals_40", "crystals_Без ГОСБ"]
+    assert pivot["crystals_Без ГОСБ"].tolist()[0] == 5
+
+
+def test_blank_keys_are_dropped_without_label():
+    pivot = main.compute_pivot_sheet(DATA, {**PIVOT, "empty_values": ["", 0]})
+    assert pivot.columns.tolist() == ["rating_businessBlock", "crystals_38", "crystals_40"]
+    assert pivot["crystals_38"].tolist() == [10, 1]
+
+
+def test_empty_string_and_nan_keys_dropped_by_default():
+    df = pd.DataFrame({"terDivisionName": ["A", "", None, "A"], "employeeStatus": ["C", "C", "C", ""]})
+    pivot = main.compute_pivot_sheet(df, {"index": ["terDivisionName"], "columns": ["employeeStatus"], "values": {}})
+    assert pivot.to_dict("list") == {"terDivisionName": ["A"], "count_C": [1]}
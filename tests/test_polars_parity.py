@@ -0,0 +1,78 @@
+"""Равенство результатов DATAFRAME_BACKEND = "polars" и "pandas": преобразования типов и места"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+
+pytest.importorskip("polars")
+
+# Значения с пропусками (None, NaN, пустая строка), пробелами, запятыми и мусором
+NUMBER_VALUES = ["-", "12", "013", 7, "", None, "1 2", "5.", "1,5", "1.2.3", "abc", np.nan, "-3.9", 3.7, "2,675", "  8 ", "1e3"]
+DATE_VALUES = ["01.02.24", "1.2.24", "x", "", None, " 03.04.25 ", "31.02.24", np.nan]
+
+
+def make_frame(rows=3000, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def pick(values):
+        return [values[index] for index in rng.integers(0, len(values), rows)]
+
+    df = pd.DataFrame({
+        "integer_text": pick(NUMBER_VALUES),
+        "float_text": pick(NUMBER_VALUES),
+        "date_text": pick(DATE_VALUES),
+        "metric": pick(NUMBER_VALUES + [str(value) for value in range(40)]),
+        "group_a": pick(["A", "B", None, "", 7, "7"]),
+        "group_b": pick(["x", "y", "z", np.nan])
+    })
+    df["integer_category"] = df["integer_text"].astype("category")
+    return df
+
+
+COLUMN_SETTINGS = {
+    "numeric_conversions": {
+        "integers": {"fields": ["integer_text", "integer_category"], "type": "integer"},
+        "floats": {"fields": ["float_text"], "type": "float", "decimal_places": 2, "replace_original": False}
+    },
+    "date_conversions": {"date_text": {"input_format": "DD.MM.YY", "replace_original": False}}
+}
+
+
+def run_backend(backend, monkeypatch, function, *args):
+    monkeypatch.setattr(main, "DATAFRAME_BACKEND", backend)
+    return function(*args)
+
+
+def assert_backends_equal(function, df, monkeypatch, *args):
+    expected = run_backend("pandas", monkeypatch, function, df.copy(), *args)
+    result = run_backend("polars", monkeypatch, function, df.copy(), *args)
+    assert list(result.columns) == list(expected.columns)
+    assert result.dtypes.to_dict() == expected.dtypes.to_dict()
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_column_settings_parity(monkeypatch):
+    assert_backends_equal(main.apply_column_settings, make_frame(), monkeypatch, COLUMN_SETTINGS)
+
+
+@pytest.mark.parametrize("value", ["", None, np.nan, "-", "abc"])
+def test_numeric_conversion_of_empty_values(monkeypatch, value):
+    df = pd.DataFrame({"integer_text": [value, "5", value], "float_text": [value, "1,25", "2.5"]})
+    settings = {"numeric_conversions": {
+        "integers": {"fields": ["integer_text"], "type": "integer"},
+        "floats": {"fields": ["float_text"], "type": "float", "decimal_places": 1}
+    }}
+    assert_backends_equal(main.apply_column_settings, df, monkeypatch, settings)
+
+
+@pytest.mark.parametrize("method", ["min", "max", "dense", "first"])
+@pytest.mark.parametrize("ascending", [False, True])
+def test_rankings_parity(monkeypatch, method, ascending):
+    rankings = [{
+        "metric": "metric",
+        "ascending": ascending,
+        "method": method,
+        "levels": {"ALL_place": [], "A_place": ["group_a"], "AB_place": ["group_a", "group_b"]}
+    }]
+    assert_backends_equal(main.calculate_rankings, make_frame(seed=1), monkeypatch, rankings)
@@ -0,0 +1,58 @@
+"""Определение структуры выгрузок наград и конвертация каждого варианта через convert_json_to_excel"""
+import json
+
+import pandas as pd
+import pytest
+
+import main
+
+PROFILE = {"employeeNumber": "1", "lastName": "Иванов", "firstName": "Иван", "terDivisionName": "ТБ"}
+
+# Вариант выгрузки → (данные, ожидаемый результат sniff_json_structure)
+REWARD_LAYOUTS = {
+    "pages_profiles": (
+        {"R1": [{"body": {"badge": {"badgeId": "R1", "profiles": [PROFILE]}}}]},
+        ("reward", "pages")
+    ),
+    "profiles": (
+        {"R1": {"profiles": [PROFILE], "profilesCount": 1, "badgeInfo": {"badgeId": "R1"}}},
+        ("reward", "profiles")
+    ),
+    "data": (
+        {"R1": {"data": {"body": {"badge": {"profiles": [PROFILE]}}}, "structure": "body.badge.profiles",
+                "profilesCount": 1, "badgeInfo": {}}},
+        ("reward", "data")
+    ),
+    "dict": (
+        {"R1": {"badge": {"profiles": [PROFILE]}}},
+        ("reward", "dict")
+    ),
+    "pages_leaders": (
+        {"R1": [{"body": {"badge": {"badgeId": "R1", "leaders": [PROFILE]}}}]},
+        ("reward_processing", "pages")
+    ),
+    "badgeInfo": (
+        {"R1": {"badgeInfo": {"badgeId": "R1", "leaders": [PROFILE]}, "profilesCount": 1}},
+        ("reward_processing", "badgeInfo")
+    )
+}
+
+
+@pytest.mark.parametrize("layout", sorted(REWARD_LAYOUTS))
+def test_reward_layout_detected_and_converted(tmp_path, layout):
+    data, expected_structure = REWARD_LAYOUTS[layout]
+    input_path = tmp_path / f"{layout}.json"
+    input_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    output_path = tmp_path / f"{layout}.xlsx"
+
+    assert main.sniff_json_structure(str(input_path)) == expected_structure
+    assert main.convert_json_to_excel(str(input_path), str(output_path)) is True
+
+    result = pd.read_excel(output_path, sheet_name="DATA", dtype=str)
+    assert result["employeeNumber"].tolist() == ["1"]
+
+
+@pytest.mark.parametrize("layout", sorted(REWARD_LAYOUTS))
+def test_get_reward_value_layout_keeps_file_layout(layout):
+    data, (_, file_layout) = REWARD_LAYOUTS[layout]
+    assert main.get_reward_value_layout(data["R1"], file_layout) == file_layout
@@ -0,0 +1,45 @@
+"""Сравнение снимков выгрузок (compute_snapshot_diff)"""
+import logging
+
+import pandas as pd
+
+import main
+
+METRICS = [
+    {"column": "BANK_placeByCrystals", "lower_is_better": True},
+    {"column": "crystalsEarned", "lower_is_better": False}
+]
+
+
+def make_snapshot(rows):
+    df = pd.DataFrame(rows, columns=["employeeNumber", "BANK_placeByCrystals", "crystalsEarned"])
+    df["BANK_placeByCrystals"] = df["BANK_placeByCrystals"].astype("Int64")
+    df["crystalsEarned"] = df["crystalsEarned"].astype("Int64")
+    return df
+
+
+def test_snapshot_diff_nullable_int_with_na():
+    current = make_snapshot([["1", 1, 100], ["2", pd.NA, 50], ["3", 3, pd.NA], ["5", 5, 10]])
+    previous = make_snapshot([["1", 2, 90], ["2", pd.NA, 50], ["3", 3, pd.NA], ["4", 4, 40]])
+
+    diff, top, counts = main.compute_snapshot_diff(current, previous, ["employeeNumber"], METRICS, top_movers=5)
+
+    assert counts == {"changed": 1, "new": 1, "dropped": 1, "unchanged": 2}
+    statuses = dict(zip(diff["employeeNumber"], diff["status"]))
+    assert statuses == {"1": "changed", "5": "new", "4": "dropped"}
+    assert top["employeeNumber"].tolist() == ["1"]
+    assert top["movement"].tolist() == [1]
+
+
+def test_snapshot_diff_skips_blank_and_duplicate_keys(caplog):
+    current = make_snapshot([["1", 1, 100], ["", 2, 70], [None, 3, 60], ["1", 9, 1]])
+    previous = make_snapshot([["1", 1, 100], ["", 5, 10]])
+
+    with caplog.at_level(logging.WARNING):
+        diff, _, counts = main.compute_snapshot_diff(current, previous, ["employeeNumber"], METRICS, top_movers=5)
+
+    assert counts == {"changed": 0, "new": 0, "dropped": 0, "unchanged": 1}
+    assert diff.empty
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("(текущий)" in message and "ключом 2, повторов ключа 1" in message for message in messages)
+    assert any("(предыдущий)" in message and "ключом 1, повторов ключа 0" in message for message in messages)
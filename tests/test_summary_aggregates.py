@@ -0,0 +1,46 @@
+"""Показатели листов SUMMARY / STATISTICS / REWARD_SUMMARY (get_dataset_aggregates)"""
+import openpyxl
+import pandas as pd
+import pytest
+
+import main
+
+
+@pytest.fixture
+def reward_outputs(monkeypatch):
+    processing_config = main.get_processing_config("reward")[1]
+    monkeypatch.setitem(processing_config, "normalized_output", True)
+    monkeypatch.setitem(processing_config, "output_formats", ["xlsx", "parquet"])
+
+
+def make_rewards():
+    df = pd.DataFrame({
+        "employeeNumber": ["1", "2", "3", "4"],
+        "rewardCode": ["R1", "R1", "R2", None],
+        "badgeType": ["gold", "gold", "silver", None],
+        "terDivisionName": ["A", "B", "B", "B"],
+        "indicatorValue_numeric": [1.0, 2.0, 3.0, 4.0]
+    })
+    return main.plan_dataframe_dtypes(df)
+
+
+def test_xlsx_then_parquet_with_dimension_sheet(tmp_path, reward_outputs):
+    df, extra_sheets = main.split_dimension_table(make_rewards(), "reward")
+    assert "badgeType" not in df.columns
+    output_path = tmp_path / "REWARD.xlsx"
+
+    assert main.write_output_files(df, str(output_path), "reward", extra_sheets) is True
+
+    assert df.attrs == {}
+    assert pd.read_parquet(output_path.with_suffix(".parquet"))["employeeNumber"].tolist() == ["1", "2", "3", "4"]
+    rows = list(openpyxl.load_workbook(output_path)["REWARD_SUMMARY"].values)
+    # Распределение вынесенной в BADGES колонки считается по всем строкам DATA
+    assert rows[rows.index(("Статистика по типам наград", None)) + 1:][:2] == [("gold", 2), ("silver", 1)]
+    assert rows[2] == ("Количество уникальных кодов наград", 2)
+
+
+def test_aggregates_follow_column_changes():
+    df = make_rewards()
+    assert main.get_dataset_aggregates(df)["nunique"]["terDivisionName"] == 2
+    df["terDivisionName"] = ["A", "B", "C", "D"]
+    assert main.get_dataset_aggregates(df)["nunique"]["terDivisionName"] == 4